@@ -5,12 +5,24 @@ from dyad.agent_api.agent_context import (
 from dyad.agent_api.agent_context import (
     tool as tool,
 )
+from dyad.indexing.lexical_index import (
+    fuse_rankings as fuse_rankings,
+)
+from dyad.indexing.lexical_index import (
+    lexical_search as lexical_search,
+)
+from dyad.indexing.lexical_index import (
+    symbol_search as symbol_search,
+)
 from dyad.indexing.semantic_search_store import (
     is_semantic_search_enabled as is_semantic_search_enabled,
 )
 from dyad.indexing.semantic_search_store import (
     semantic_search as semantic_search,
 )
+from dyad.indexing.semantic_search_store import (
+    semantic_search_chunks as semantic_search_chunks,
+)
 from dyad.language_model.language_model_clients import (
     is_provider_setup as is_provider_setup,
 )
@@ -425,15 +425,19 @@ class AgentContext:
             request,
             client,
         )
-        response = LanguageModelResponse(chunks=[])
+        # Only the text is kept for the call log, not every chunk object.
+        response_text_parts: list[str] = []
+        response = LanguageModelResponse()
         for language_model_chunk in client.stream_chunks(request):
-            response.chunks.append(language_model_chunk)
             if isinstance(language_model_chunk, TextChunk):
+                response_text_parts.append(language_model_chunk.text)
                 yield language_model_chunk
             elif isinstance(language_model_chunk, ErrorChunk):
+                response.errors.append(language_model_chunk.message)
                 # TODO: raise an exception instead of yielding this
                 yield language_model_chunk
             elif isinstance(language_model_chunk, CompletionMetadataChunk):
+                response.completion_metadata = language_model_chunk
                 last_call = content.metadata.calls[-1]
                 if not content.metadata.calls:
                     last_call = LanguageModelCallMetadata()
@@ -455,6 +459,7 @@ class AgentContext:
                 last_call.finish_reason = language_model_chunk.finish_reason
             else:
                 raise ValueError(f"Unknown chunk type: {language_model_chunk}")
+        response.text = "".join(response_text_parts)
         llm_call_logger().record_response(request_id, response)
 
     def stream_structured_output(
@@ -6,13 +6,13 @@ from dyad.agents.tools import (
     search_codebase,
 )
 from dyad.prompts.prompts import get_default_system_prompt
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 
 
 def default_agent(
     context: dyad.AgentContext,
 ) -> Generator[None, None, None]:
-    if get_user_settings().pad_mode == "all":
+    if get_readonly_user_settings().pad_mode == "all":
         yield from context.stream_to_content(
             system_prompt=get_default_system_prompt()
         )
@@ -118,15 +118,10 @@ def referenced_file_box(stage: CodeSearchResultStage):
                             )
 
 
-def is_code_search_supported():
-    return dyad.is_semantic_search_enabled()
-
-
 @dyad.tool(
     description="Searching codebase",
     icon="search",
     render=render_code_search,
-    is_available=is_code_search_supported,
 )
 def search_codebase(
     context: dyad.AgentContext,
@@ -193,15 +188,26 @@ def search_codebase(
     """
     result = CodeSearchResult(stages=[])
     output.set_data(result)
-    search_results = []
+    # Results of the lexical index (ranked by terms and by symbols) and, if
+    # embeddings are set up, semantic search are fused.
+    rankings = []
     try:
-        search_results = list(dyad.semantic_search(query=query, limit=10))
-        result.stages.append(
-            CodeSearchResultStage(
-                title="Semantically similar files", file_paths=search_results
+        if dyad.is_semantic_search_enabled():
+            semantic_results = list(
+                dict.fromkeys(
+                    chunk.file_path
+                    for chunk in dyad.semantic_search_chunks(
+                        query=query, limit=10
+                    )
+                )
+            )
+            rankings.append(semantic_results)
+            result.stages.append(
+                CodeSearchResultStage(
+                    title="Semantically similar files",
+                    file_paths=semantic_results,
+                )
             )
-        )
-
     except Exception as e:
         output.append_chunk(
             chunk=dyad.TextChunk(
@@ -209,8 +215,25 @@ def search_codebase(
             )
         )
         dyad.logger().warning(f"Error performing semantic search: {e!s}")
-    finally:
-        yield
+    lexical_results = dyad.lexical_search(query=query, limit=10)
+    rankings.append(lexical_results)
+    result.stages.append(
+        CodeSearchResultStage(
+            title="Files matching the query's terms",
+            file_paths=lexical_results,
+        )
+    )
+    symbol_results = dyad.symbol_search(query=query, limit=10)
+    if symbol_results:
+        rankings.append(symbol_results)
+        result.stages.append(
+            CodeSearchResultStage(
+                title="Files defining or using the query's symbols",
+                file_paths=symbol_results,
+            )
+        )
+    search_results = dyad.fuse_rankings(rankings)[:10]
+    yield
 
     # Filter these results based on an LLM call
     relevant_files = None
@@ -10,6 +10,10 @@ from dyad.workspace_util import get_workspace_path
 
 _code_edit_handler = {}
 
+# Files at least this large are edited with search/replace blocks, so the
+# editor model only generates the changed lines instead of the whole file.
+SEARCH_REPLACE_MIN_FILE_SIZE = 8 * 1024
+
 
 def register_code_edit_handler(
     id: str,
@@ -21,10 +25,21 @@ def register_code_edit_handler(
 def generate_apply_code_candidate(
     input: CodeEdit,
 ) -> Generator[str, Any, Any]:
-    handler = _code_edit_handler["whole-file"]
+    handler = _code_edit_handler[_get_code_edit_handler_id(input)]
     yield from handler(input)
 
 
+def _get_code_edit_handler_id(input: CodeEdit) -> str:
+    if "search-replace" in _code_edit_handler:
+        try:
+            file_size = os.path.getsize(get_workspace_path(input.file_path))
+        except OSError:
+            file_size = 0
+        if file_size >= SEARCH_REPLACE_MIN_FILE_SIZE:
+            return "search-replace"
+    return "whole-file"
+
+
 def apply_code(apply_code: ApplyCodeCandidate) -> FileCheckpoint:
     checkpoint = create_checkpoint(apply_code.file_path)
     file_path = get_workspace_path(apply_code.file_path)
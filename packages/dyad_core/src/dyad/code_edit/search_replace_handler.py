@@ -0,0 +1,305 @@
+import difflib
+import re
+from collections.abc import Generator, Iterator
+from typing import Any
+
+from dyad.apply_code import CodeEdit
+from dyad.chat import LanguageModelRequest
+from dyad.code_edit.simple_handler import simple_apply_code_handler
+from dyad.language_model.language_model_clients import (
+    get_editor_language_model,
+    get_language_model_client,
+)
+from dyad.logging.logging import logger
+from dyad.public.chat_message import (
+    ErrorChunk,
+    LanguageModelChunk,
+    TextChunk,
+)
+from dyad.public.input import Input
+from dyad.workspace_util import (
+    does_workspace_file_exist,
+    read_workspace_file,
+)
+
+_SEARCH_MARKER = re.compile(r"^<{5,9} ?SEARCH\s*$")
+_DIVIDER_MARKER = re.compile(r"^={5,9}\s*$")
+_REPLACE_MARKER = re.compile(r"^>{5,9} ?REPLACE\s*$")
+
+# Minimum similarity for a block of lines to be accepted as the location of a
+# search block which did not match exactly or modulo whitespace.
+_FUZZY_MATCH_THRESHOLD = 0.9
+
+
+class SearchReplaceBlockParser:
+    """
+    Parses search/replace blocks out of streamed text.
+
+        <<<<<<< SEARCH
+        lines to find
+        =======
+        lines to replace them with
+        >>>>>>> REPLACE
+
+    `feed` takes the next chunk and returns the (search, replace) pairs which
+    were completed by it; `finish` flushes the last line at the end of the
+    stream. Text outside of blocks is ignored.
+    """
+
+    def __init__(self):
+        self._partial_line = ""
+        self._state: str = "outside"
+        self._search_lines: list[str] = []
+        self._replace_lines: list[str] = []
+
+    def feed(self, chunk: str) -> list[tuple[str, str]]:
+        lines = (self._partial_line + chunk).split("\n")
+        self._partial_line = lines.pop()
+        blocks = []
+        for line in lines:
+            block = self._add_line(line.removesuffix("\r"))
+            if block:
+                blocks.append(block)
+        return blocks
+
+    def finish(self) -> list[tuple[str, str]]:
+        line = self._partial_line
+        self._partial_line = ""
+        block = self._add_line(line.removesuffix("\r"))
+        return [block] if block else []
+
+    def _add_line(self, line: str) -> tuple[str, str] | None:
+        if self._state == "outside":
+            if _SEARCH_MARKER.match(line):
+                self._state = "search"
+                self._search_lines = []
+                self._replace_lines = []
+        elif self._state == "search":
+            if _DIVIDER_MARKER.match(line):
+                self._state = "replace"
+            else:
+                self._search_lines.append(line)
+        elif _REPLACE_MARKER.match(line):
+            self._state = "outside"
+            return "\n".join(self._search_lines), "\n".join(self._replace_lines)
+        else:
+            self._replace_lines.append(line)
+        return None
+
+
+def apply_search_replace(code: str, search: str, replace: str) -> str | None:
+    """
+    Replaces the first occurrence of `search` in `code` with `replace`.
+
+    If `search` does not occur verbatim, it is anchored line by line, first
+    ignoring trailing whitespace, then ignoring indentation (the replacement
+    is re-indented to match) and finally by fuzzy matching.
+
+    Returns None if `search` could not be located.
+    """
+    if not search.strip():
+        # Only an empty file can be "replaced" without anchoring.
+        return None if code.strip() else replace
+    # Only verbatim matches of whole lines, so the replacement is not spliced
+    # into the middle of a line.
+    start = code.find(search)
+    while start != -1 and not _is_whole_lines(code, start, len(search)):
+        start = code.find(search, start + 1)
+    if start != -1:
+        return code[:start] + replace + code[start + len(search) :]
+
+    newline = "\r\n" if "\r\n" in code else "\n"
+    code_lines = code.splitlines()
+    search_lines = _trim_blank_lines(search.splitlines())
+    replace_lines = replace.splitlines()
+
+    match = _find_lines(code_lines, search_lines)
+    if match is None:
+        return None
+    start, end = match
+    replace_lines = _reindent(
+        replace_lines,
+        from_indent=_first_indent(search_lines),
+        to_indent=_first_indent(code_lines[start:end]),
+    )
+    updated = newline.join(
+        code_lines[:start] + replace_lines + code_lines[end:]
+    )
+    if code.endswith(("\n", "\r")):
+        updated += newline
+    return updated
+
+
+def _is_whole_lines(code: str, start: int, length: int) -> bool:
+    end = start + length
+    starts_line = start == 0 or code[start - 1] == "\n"
+    ends_line = end == len(code) or code[end - 1] == "\n" or code[end] in "\r\n"
+    return starts_line and ends_line
+
+
+def _trim_blank_lines(lines: list[str]) -> list[str]:
+    start = 0
+    end = len(lines)
+    while start < end and not lines[start].strip():
+        start += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+    return lines[start:end]
+
+
+def _find_lines(
+    code_lines: list[str], search_lines: list[str]
+) -> tuple[int, int] | None:
+    """Returns the [start, end) line range of `code_lines` matching the search."""
+    count = len(search_lines)
+    for normalize in (str.rstrip, str.strip):
+        target = [normalize(line) for line in search_lines]
+        normalized = [normalize(line) for line in code_lines]
+        for start in range(len(code_lines) - count + 1):
+            if (
+                normalized[start] == target[0]
+                and normalized[start : start + count] == target
+            ):
+                return start, start + count
+
+    target_text = "\n".join(line.strip() for line in search_lines)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target_text)
+    best_ratio = _FUZZY_MATCH_THRESHOLD
+    best_match = None
+    stripped = [line.strip() for line in code_lines]
+    for start in range(len(code_lines) - count + 1):
+        matcher.set_seq1("\n".join(stripped[start : start + count]))
+        if (
+            matcher.real_quick_ratio() >= best_ratio
+            and matcher.quick_ratio() >= best_ratio
+        ):
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best_ratio = ratio
+                best_match = (start, start + count)
+    return best_match
+
+
+def _first_indent(lines: list[str]) -> str:
+    for line in lines:
+        if line.strip():
+            return line[: len(line) - len(line.lstrip())]
+    return ""
+
+
+def _reindent(
+    lines: list[str], *, from_indent: str, to_indent: str
+) -> list[str]:
+    if from_indent == to_indent:
+        return lines
+    return [
+        to_indent + line[len(from_indent) :]
+        if line.startswith(from_indent)
+        else line
+        for line in lines
+    ]
+
+
+def search_replace_apply_code_handler(
+    input: CodeEdit,
+) -> Generator[str, Any, Any]:
+    """
+    Applies the edit from search/replace blocks generated by the editor model,
+    so only the changed lines are generated instead of the whole file.
+
+    Yields the file with the blocks applied so far. Falls back to the
+    "whole-file" handler if a block cannot be located in the file.
+    """
+    if not does_workspace_file_exist(input.file_path):
+        yield input.code_edit
+        return
+
+    model = get_editor_language_model()
+    model_provider = get_language_model_client(
+        model_id=model.id,
+    )
+
+    original_code = read_workspace_file(input.file_path)
+    prompt = f"""
+Given the original code:
+<original-code>
+{original_code}
+</original-code>
+
+Here is some context on the overall changes being made, use this to determine how to apply the edit (given later):
+<context>
+{input.edit_context}
+</context>
+
+OK, now apply the following edits:
+<edit>
+{input.code_edit}
+</edit>
+
+I want you to apply ALL the specified changes, including ALL comments and code modifications, but do NOT introduce any additional changes of your own.
+
+Give me the changes as one or more search/replace blocks in exactly this format:
+
+<<<<<<< SEARCH
+lines copied verbatim from the original code
+=======
+the lines which replace them
+>>>>>>> REPLACE
+
+* Copy the SEARCH lines *exactly* from the original code, including whitespace and comments
+* Include just enough lines in SEARCH for them to appear only once in the original code
+* Order the blocks from the top of the file to the bottom and do NOT overlap them
+* Do NOT add any explanations, suggestions, or improvements
+* Do NOT give me anything except for the search/replace blocks
+
+Search/replace blocks:
+    """
+    logger().debug("Applying code edit (search/replace): %s", prompt)
+
+    response = model_provider.stream_chunks(
+        LanguageModelRequest(
+            input=Input.from_text(prompt),
+            language_model_id=model.id,
+            system_prompt="FOLLOW MY INSTRUCTIONS PRECISELY.",
+        )
+    )
+    code = original_code
+    applied_count = 0
+    yield code
+
+    for search, replace in _stream_blocks(response):
+        updated_code = apply_search_replace(code, search, replace)
+        if updated_code is None:
+            logger().warning(
+                "Could not locate search block in %s, falling back to "
+                "whole-file edit",
+                input.file_path,
+            )
+            yield from simple_apply_code_handler(input)
+            return
+        code = updated_code
+        applied_count += 1
+        yield code
+
+    if not applied_count:
+        logger().warning(
+            "No search/replace blocks generated for %s, falling back to "
+            "whole-file edit",
+            input.file_path,
+        )
+        yield from simple_apply_code_handler(input)
+
+
+def _stream_blocks(
+    response: Iterator[LanguageModelChunk],
+) -> Generator[tuple[str, str], Any, Any]:
+    parser = SearchReplaceBlockParser()
+    for chunk in response:
+        if isinstance(chunk, ErrorChunk):
+            raise Exception(
+                "Could not apply code edit because of:", chunk.message
+            )
+        if isinstance(chunk, TextChunk):
+            yield from parser.feed(chunk.text)
+    yield from parser.finish()
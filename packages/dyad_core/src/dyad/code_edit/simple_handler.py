@@ -1,4 +1,5 @@
 import re
+import time
 from collections.abc import Generator
 from typing import Any
 
@@ -16,6 +17,106 @@ from dyad.workspace_util import (
     read_workspace_file,
 )
 
+# A fence is a line that, when stripped, consists solely of three backticks
+# optionally followed by an alphanumeric language identifier.
+_FENCE_PATTERN = re.compile(r"^```(?:[a-zA-Z0-9]+)?\s*$")
+_FENCE_TOP_THRESHOLD = 3
+_FENCE_BOTTOM_THRESHOLD = 3
+_YIELD_INTERVAL_SECONDS = 0.1
+
+
+class CodeFenceStripper:
+    """
+    Incremental version of `remove_code_fence` for streamed text.
+
+    `feed` takes the next chunk and `text` is `remove_code_fence` of all the
+    text fed so far. Only the new chunk and the trailing partial line are
+    scanned; the fence positions, the open/closed block state and the lines
+    inside blocks are kept between calls. The text is only joined when
+    `text` is read, so feeding is linear in the length of the stream.
+    """
+
+    def __init__(self):
+        self._chunks: list[str] = []
+        # The trailing line which has not been terminated by a line break yet.
+        self._partial_line = ""
+        self._line_count = 0
+        self._fence_count = 0
+        self._first_fence_index = -1
+        self._last_fence_index = -1
+        self._in_block = False
+        # The completed lines which are inside a block.
+        self._block_lines: list[str] = []
+        self._text: str | None = ""
+
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self._text = None
+        lines = (self._partial_line + chunk).splitlines(keepends=True)
+        self._partial_line = ""
+        if lines and (
+            # "\r" may be the first half of a "\r\n" in the next chunk.
+            lines[-1].endswith("\r") or lines[-1] == lines[-1].splitlines()[0]
+        ):
+            self._partial_line = lines.pop()
+        for line in lines:
+            self._add_line(line.splitlines()[0])
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._get_text()
+        return self._text
+
+    def _add_line(self, line: str):
+        if _FENCE_PATTERN.fullmatch(line.strip()):
+            if self._first_fence_index == -1:
+                self._first_fence_index = self._line_count
+            self._last_fence_index = self._line_count
+            self._fence_count += 1
+            self._in_block = not self._in_block
+        elif self._in_block:
+            self._block_lines.append(line)
+        self._line_count += 1
+
+    def _get_text(self) -> str:
+        line_count = self._line_count
+        first_fence_index = self._first_fence_index
+        last_fence_index = self._last_fence_index
+        fence_count = self._fence_count
+        partial_line = None
+        if self._partial_line:
+            partial_line = self._partial_line.splitlines()[0]
+            if _FENCE_PATTERN.fullmatch(partial_line.strip()):
+                if first_fence_index == -1:
+                    first_fence_index = line_count
+                last_fence_index = line_count
+                fence_count += 1
+                partial_line = None
+            elif not self._in_block:
+                partial_line = None
+            line_count += 1
+
+        # If the first fence is near the top and (either there's only one fence
+        # or the last fence is near the bottom), treat the text as entirely
+        # fenced code.
+        if (
+            fence_count
+            and first_fence_index < _FENCE_TOP_THRESHOLD
+            and (
+                fence_count == 1
+                or last_fence_index >= line_count - _FENCE_BOTTOM_THRESHOLD
+            )
+        ):
+            if partial_line is None:
+                return "\n".join(self._block_lines)
+            return "\n".join([*self._block_lines, partial_line])
+        # Joined into a single chunk, so reading it again is cheap.
+        self._chunks = ["".join(self._chunks)]
+        return self._chunks[0]
+
 
 def remove_code_fence(text: str) -> str:
     """
@@ -26,48 +127,9 @@ def remove_code_fence(text: str) -> str:
     """
     if "```" not in text:
         return text
-
-    lines = text.splitlines()
-    n = len(lines)
-    top_threshold = 3
-    bottom_threshold = 3
-
-    # A fence is a line that, when stripped, consists solely of three backticks
-    # optionally followed by an alphanumeric language identifier.
-    fence_pattern = re.compile(r"^```(?:[a-zA-Z0-9]+)?\s*$")
-    fence_indices = [
-        i
-        for i, line in enumerate(lines)
-        if fence_pattern.fullmatch(line.strip())
-    ]
-
-    # If the first fence is near the top and (either there's only one fence or the last fence
-    # is near the bottom), treat the text as entirely fenced code.
-    if (
-        fence_indices
-        and fence_indices[0] < top_threshold
-        and (
-            len(fence_indices) == 1 or fence_indices[-1] >= n - bottom_threshold
-        )
-    ):
-        in_block = False
-        blocks = []
-        current_block_lines = []
-        for line in lines:
-            if fence_pattern.fullmatch(line.strip()):
-                in_block = not in_block
-                # When closing a block, save its contents.
-                if not in_block and current_block_lines:
-                    blocks.append("\n".join(current_block_lines))
-                    current_block_lines = []
-                continue
-            if in_block:
-                current_block_lines.append(line)
-        # In case a block wasn't properly closed, add its contents.
-        if current_block_lines:
-            blocks.append("\n".join(current_block_lines))
-        return "\n".join(blocks)
-    return text
+    stripper = CodeFenceStripper()
+    stripper.feed(text)
+    return stripper.text
 
 
 def simple_apply_code_handler(input: CodeEdit) -> Generator[str, Any, Any]:
@@ -117,7 +179,13 @@ Updated code:
             system_prompt="FOLLOW MY INSTRUCTIONS PRECISELY.",
         )
     )
-    buffer = ""
+    # Only the new text of each chunk is scanned for fences.
+    stripper = CodeFenceStripper()
+    # The whole text is yielded at most every `_YIELD_INTERVAL_SECONDS`
+    # (and once more at the end), copying it for every chunk would be
+    # quadratic in the length of the file.
+    last_yield_time = None
+    yielded_text = None
 
     for chunk in response:
         if isinstance(chunk, ErrorChunk):
@@ -125,5 +193,14 @@ Updated code:
                 "Could not apply code edit because of:", chunk.message
             )
         if isinstance(chunk, TextChunk):
-            buffer += chunk.text
-            yield remove_code_fence(buffer)
+            stripper.feed(chunk.text)
+            current_time = time.monotonic()
+            if (
+                last_yield_time is None
+                or current_time - last_yield_time >= _YIELD_INTERVAL_SECONDS
+            ):
+                last_yield_time = current_time
+                yielded_text = stripper.text
+                yield yielded_text
+    if yielded_text is not None and stripper.text is not yielded_text:
+        yield stripper.text
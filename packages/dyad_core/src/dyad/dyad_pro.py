@@ -1,5 +1,5 @@
 from dyad.language_model.language_model_clients import is_provider_setup
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 
 
 def is_dyad_pro_user() -> bool:
@@ -7,4 +7,7 @@ def is_dyad_pro_user() -> bool:
 
 
 def is_dyad_pro_enabled() -> bool:
-    return is_dyad_pro_user() and not get_user_settings().disable_llm_proxy
+    return (
+        is_dyad_pro_user()
+        and not get_readonly_user_settings().disable_llm_proxy
+    )
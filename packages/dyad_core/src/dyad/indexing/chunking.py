@@ -0,0 +1,234 @@
+import bisect
+import os
+import threading
+from typing import Any, NamedTuple
+
+from dyad.logging.logging import logger
+
+# Chunk sizes are measured in UTF-8 bytes, which is what tree-sitter reports
+# and is the same as characters for most code.
+MAX_CHUNK_SIZE = 2000
+# Chunks smaller than this are merged into a neighbour if the result fits.
+MIN_CHUNK_SIZE = 200
+
+# Languages whose syntax tree is used to find chunk boundaries, other files
+# are split into windows of whole lines.
+_LANGUAGES_BY_EXTENSION = {
+    ".py": "python",
+    ".pyi": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".mts": "typescript",
+    ".cts": "typescript",
+    ".tsx": "tsx",
+    ".java": "java",
+    ".kt": "kotlin",
+    ".scala": "scala",
+    ".go": "go",
+    ".rs": "rust",
+    ".rb": "ruby",
+    ".php": "php",
+    ".cs": "c_sharp",
+    ".c": "c",
+    ".h": "c",
+    ".cc": "cpp",
+    ".cpp": "cpp",
+    ".cxx": "cpp",
+    ".hpp": "cpp",
+    ".hxx": "cpp",
+    ".lua": "lua",
+    ".ex": "elixir",
+    ".exs": "elixir",
+    ".css": "css",
+    ".html": "html",
+}
+
+_thread_local = threading.local()
+
+
+class CodeChunk(NamedTuple):
+    """
+    A chunk of a file.
+
+    Attributes:
+        content: Text of the chunk
+        start_pos: Character offset of the chunk in the file
+        end_pos: Character offset of the end of the chunk (exclusive)
+        start_line: 1-based line of the chunk's first non-blank character
+        end_line: 1-based line of the chunk's last non-blank character
+    """
+
+    content: str
+    start_pos: int
+    end_pos: int
+    start_line: int
+    end_line: int
+
+
+def chunk_file(
+    file_path: str,
+    text: str,
+    *,
+    max_chunk_size: int = MAX_CHUNK_SIZE,
+    min_chunk_size: int = MIN_CHUNK_SIZE,
+) -> list[CodeChunk]:
+    """
+    Splits a file into chunks along its syntax tree, so functions and classes
+    end up in chunks of their own where they fit.
+
+    Sibling nodes are packed into a chunk until it would exceed
+    `max_chunk_size`; a node which is too large on its own is split along its
+    children, and a node without children along lines. Files in languages
+    without a parser are split into windows of whole lines.
+
+    The chunks cover the whole file without overlapping, except that chunks
+    containing only whitespace are left out.
+    """
+    source = text.encode("utf-8")
+    parser = get_parser(file_path)
+    spans: list[tuple[int, int]] | None = None
+    if parser is not None:
+        try:
+            tree = parser.parse(source)
+            spans = _split_node(
+                source, tree.root_node, 0, len(source), max_chunk_size
+            )
+        except Exception as e:
+            logger().warning(
+                f"Could not parse {file_path}, splitting lines: {e}"
+            )
+    if spans is None:
+        spans = _split_lines(source, 0, len(source), max_chunk_size)
+    spans = _merge_small_spans(spans, max_chunk_size, min_chunk_size)
+
+    newline_offsets = _get_newline_offsets(source)
+    chunks = []
+    position = 0
+    for start, end in spans:
+        span = source[start:end]
+        content = span.decode("utf-8")
+        if content.strip():
+            first = start + len(span) - len(span.lstrip())
+            last = start + len(span.rstrip()) - 1
+            chunks.append(
+                CodeChunk(
+                    content=content,
+                    start_pos=position,
+                    end_pos=position + len(content),
+                    start_line=bisect.bisect_left(newline_offsets, first) + 1,
+                    end_line=bisect.bisect_left(newline_offsets, last) + 1,
+                )
+            )
+        position += len(content)
+    return chunks
+
+
+def get_parser(file_path: str) -> Any:
+    """
+    Returns a tree-sitter parser for the file's language, or None if there is
+    no parser for it. Parsers aren't thread-safe, so each thread has its own.
+    """
+    _, extension = os.path.splitext(file_path)
+    language = _LANGUAGES_BY_EXTENSION.get(extension.lower())
+    if language is None:
+        return None
+    parsers: dict[str, Any] = getattr(_thread_local, "parsers", None) or {}
+    _thread_local.parsers = parsers
+    if language not in parsers:
+        try:
+            import tree_sitter_languages
+
+            parsers[language] = tree_sitter_languages.get_parser(language)
+        except Exception as e:
+            logger().warning(f"Could not load {language} parser: {e}")
+            parsers[language] = None
+    return parsers[language]
+
+
+def _split_node(
+    source: bytes, node: Any, start: int, end: int, max_chunk_size: int
+) -> list[tuple[int, int]]:
+    """
+    Splits [start, end), which contains `node` and any text around it, into
+    spans of at most `max_chunk_size` bytes.
+
+    Each child of `node` owns the text from the end of the previous child, so
+    comments and whitespace stay with the code after them.
+    """
+    children = node.children
+    if not children:
+        return _split_lines(source, start, end, max_chunk_size)
+    spans: list[tuple[int, int]] = []
+    chunk_start = start
+    child_start = start
+    for i, child in enumerate(children):
+        child_end = end if i == len(children) - 1 else child.end_byte
+        if child_end - chunk_start <= max_chunk_size:
+            pass
+        elif child_end - child_start <= max_chunk_size:
+            if child_start > chunk_start:
+                spans.append((chunk_start, child_start))
+            chunk_start = child_start
+        else:
+            # The pending siblings are passed on, so e.g. a class's header is
+            # chunked together with its first method.
+            child_spans = _split_node(
+                source, child, chunk_start, child_end, max_chunk_size
+            )
+            spans.extend(child_spans[:-1])
+            chunk_start = child_spans[-1][0]
+        child_start = child_end
+    spans.append((chunk_start, end))
+    return spans
+
+
+def _split_lines(
+    source: bytes, start: int, end: int, max_chunk_size: int
+) -> list[tuple[int, int]]:
+    """
+    Splits [start, end) into spans of whole lines of at most `max_chunk_size`
+    bytes. Longer lines are split at a character boundary.
+    """
+    spans = []
+    while end - start > max_chunk_size:
+        limit = start + max_chunk_size
+        split = source.rfind(b"\n", start, limit) + 1
+        if split <= start:
+            split = limit
+            # Don't split a multi-byte character.
+            while source[split] & 0xC0 == 0x80:
+                split -= 1
+        spans.append((start, split))
+        start = split
+    if end > start or not spans:
+        spans.append((start, end))
+    return spans
+
+
+def _merge_small_spans(
+    spans: list[tuple[int, int]], max_chunk_size: int, min_chunk_size: int
+) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in spans:
+        if merged:
+            previous_start, previous_end = merged[-1]
+            if (
+                end - start < min_chunk_size
+                or previous_end - previous_start < min_chunk_size
+            ) and end - previous_start <= max_chunk_size:
+                merged[-1] = (previous_start, end)
+                continue
+        merged.append((start, end))
+    return merged
+
+
+def _get_newline_offsets(source: bytes) -> list[int]:
+    offsets = []
+    offset = source.find(b"\n")
+    while offset != -1:
+        offsets.append(offset)
+        offset = source.find(b"\n", offset + 1)
+    return offsets
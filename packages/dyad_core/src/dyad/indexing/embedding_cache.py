@@ -0,0 +1,141 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from dyad.logging.logging import logger
+from dyad.settings.user_settings import EmbeddingModelConfig
+from dyad.utils.user_data_dir_utils import get_user_data_dir
+
+
+def hash_chunk(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Caches chunk embeddings by (embedding model, sha256 of the chunk text).
+
+    The cache lives in the user data dir so it is shared across branches,
+    workspaces and renamed or duplicated files, and survives clearing a
+    workspace's index. Embeddings are stored as float32, the same precision
+    as the vector store.
+    """
+
+    # Entries which haven't been used for this long are evicted on startup.
+    MAX_UNUSED_SECONDS = 60 * 60 * 24 * 90
+    # Keeps the number of SQL variables per statement below SQLite's limit.
+    _QUERY_BATCH_SIZE = 500
+
+    def __init__(
+        self, db_path: str, embedding_model_config: EmbeddingModelConfig
+    ):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.model_key = ":".join(
+            [
+                embedding_model_config.provider_id,
+                embedding_model_config.embedding_model_name,
+                str(embedding_model_config.embedding_dim),
+                embedding_model_config.version,
+            ]
+        )
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model_key TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    last_used_at INTEGER NOT NULL,
+                    PRIMARY KEY (model_key, content_hash)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "DELETE FROM embedding_cache WHERE last_used_at < ?",
+                (int(time.time()) - self.MAX_UNUSED_SECONDS,),
+            )
+
+    def get_many(self, content_hashes: list[str]) -> dict[str, list[float]]:
+        """
+        Returns the cached embeddings for the given chunk hashes, leaving out
+        the ones which are not cached.
+        """
+        unique_hashes = list(dict.fromkeys(content_hashes))
+        embeddings: dict[str, list[float]] = {}
+        now = int(time.time())
+        with self._lock:
+            for i in range(0, len(unique_hashes), self._QUERY_BATCH_SIZE):
+                batch = unique_hashes[i : i + self._QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT content_hash, embedding FROM embedding_cache "
+                    f"WHERE model_key = ? AND content_hash IN ({placeholders})",
+                    [self.model_key, *batch],
+                ).fetchall()
+                for content_hash, blob in rows:
+                    embeddings[content_hash] = array("f", blob).tolist()
+                if rows:
+                    hit_placeholders = ",".join("?" * len(rows))
+                    self._conn.execute(
+                        "UPDATE embedding_cache SET last_used_at = ? "
+                        "WHERE model_key = ? AND content_hash IN "
+                        f"({hit_placeholders})",
+                        [now, self.model_key, *(row[0] for row in rows)],
+                    )
+        return embeddings
+
+    def put_many(self, embeddings: dict[str, list[float]]) -> None:
+        now = int(time.time())
+        rows = [
+            (self.model_key, content_hash, array("f", embedding).tobytes(), now)
+            for content_hash, embedding in embeddings.items()
+            if embedding
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache "
+                    "(model_key, content_hash, embedding, last_used_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_embedding_cache_path() -> str:
+    return os.path.join(get_user_data_dir(), "embedding_cache.db")
+
+
+def open_embedding_cache(
+    embedding_model_config: EmbeddingModelConfig,
+) -> EmbeddingCache | None:
+    """
+    Opens the embedding cache, or returns None if it can't be opened (e.g.
+    the user data dir is read-only) so indexing works without it.
+    """
+    try:
+        return EmbeddingCache(
+            get_embedding_cache_path(), embedding_model_config
+        )
+    except Exception as e:
+        logger().warning(f"Could not open embedding cache: {e}")
+        return None
@@ -1,3 +1,7 @@
+# Import to make sure it's registered
+from dyad.indexing.embeddings import (
+    local_embedding_provider as local_embedding_provider,
+)
 from dyad.indexing.embeddings.embedding_provider import (
     EmbeddingProvider as EmbeddingProvider,
 )
@@ -1,6 +1,10 @@
 import os
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import to make sure they are registered
 from dyad import language_model_registry as language_model_registry
@@ -10,7 +14,10 @@ from dyad.language_model.language_model_clients import (
     should_use_llm_proxy,
 )
 from dyad.logging.logging import logger
-from dyad.settings.user_settings import EmbeddingModelConfig, get_user_settings
+from dyad.settings.user_settings import (
+    EmbeddingModelConfig,
+    get_readonly_user_settings,
+)
 
 
 class EmbeddingProvider(ABC):
@@ -18,6 +25,10 @@ class EmbeddingProvider(ABC):
 
     provider_id: str
 
+    @property
+    def display_name(self) -> str:
+        return get_language_model_provider(self.provider_id).display_name
+
     @abstractmethod
     def generate_single_embedding(self, text: str) -> list[float]:
         """Generate embedding for a single string."""
@@ -25,13 +36,30 @@ class EmbeddingProvider(ABC):
 
     @abstractmethod
     def generate_embeddings(self, texts: list[str]) -> list[list[float]]:
-        """Generate embeddings for a list of strings in batches."""
+        """
+        Generate embeddings for a list of strings in batches.
+
+        Returns one embedding per text, in order; texts which could not be
+        embedded get an empty embedding.
+        """
         pass
 
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
     """OpenAI-specific implementation of the embedding provider."""
 
+    # Upper bounds for a single embeddings request.
+    MAX_BATCH_SIZE = 100
+    MAX_BATCH_TOKENS = 100_000
+    # Rough number of characters per token, used to size batches without
+    # tokenizing the texts.
+    CHARS_PER_TOKEN = 4
+    MAX_CONCURRENT_REQUESTS = 4
+    MAX_RETRIES = 5
+    INITIAL_BACKOFF_SECONDS = 1.0
+    MAX_BACKOFF_SECONDS = 60.0
+    REQUEST_TIMEOUT_SECONDS = 60.0
+
     def __repr(self) -> str:
         return f"OpenAIEmbeddingProvider(provider_id={self.provider_id}, base_url={self.base_url}, model_prefix={self.model_prefix})"
 
@@ -45,100 +73,208 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         Initialize the OpenAI embedding provider.
 
         Args:
-            model (str): OpenAI embedding model to use.
-            batch_size (int): Number of texts to process in each batch.
-            api_key (Optional[str]): OpenAI API key. If None, uses environment variable.
+            provider_id (str): Provider whose API key is used.
+            base_url (Optional[str]): Base URL of the OpenAI-compatible API.
+            model_prefix (str): Prefix added to the embedding model name.
         """
         super().__init__()
         self.provider_id = provider_id
-        self.batch_size = 100
+        self.batch_size = self.MAX_BATCH_SIZE
         self.base_url = base_url
         self.model_prefix = model_prefix
+        self._client = None
+        self._client_api_key: str | None = None
+        self._client_lock = threading.Lock()
+        # Set when the provider rate limits us, so all in-flight batches back
+        # off together instead of each one hitting the limit again.
+        self._rate_limited_until = 0.0
+        self._rate_limit_lock = threading.Lock()
 
     @property
     def client(self):
+        """
+        The OpenAI client, reused across requests so connections are pooled.
+        It's re-created if the provider's API key changes.
+        """
         from openai import OpenAI
 
-        return OpenAI(
-            api_key=get_provider_api_key(self.provider_id),
-            base_url=self.base_url,
-        )
+        api_key = get_provider_api_key(self.provider_id)
+        with self._client_lock:
+            if self._client is None or self._client_api_key != api_key:
+                # Retries are handled per batch in _create_embeddings.
+                self._client = OpenAI(
+                    api_key=api_key,
+                    base_url=self.base_url,
+                    max_retries=0,
+                    timeout=self.REQUEST_TIMEOUT_SECONDS,
+                )
+                self._client_api_key = api_key
+            return self._client
 
     def generate_single_embedding(self, text: str) -> list[float]:
         if not text:
             raise ValueError("Input text is empty.")
-        model_config = get_user_settings().get_embedding_model_config_or_throw()
+        model_name = self._get_model_name()
         try:
-            response = self.client.embeddings.create(
-                encoding_format="float",
-                model=self.model_prefix + model_config.embedding_model_name,
-                input=[text],
-            )
-            return response.data[0].embedding
+            return self._create_embeddings(model_name, [text])[0]
         except Exception as e:
             logger().error(f"Error generating embedding: {e}")
             return []
 
-    def _batch_texts(self, texts: list[str]) -> Iterator[list[str]]:
+    def _get_model_name(self) -> str:
+        model_config = (
+            get_readonly_user_settings().get_embedding_model_config_or_throw()
+        )
+        return self.model_prefix + model_config.embedding_model_name
+
+    def _batch_texts(self, texts: list[str]) -> Iterator[tuple[int, list[str]]]:
         """
-        Split texts into batches.
+        Split texts into batches which stay within the request limits.
 
         Args:
             texts (List[str]): List of texts to batch.
 
         Yields:
-            Iterator[List[str]]: Batches of texts.
+            Iterator[Tuple[int, List[str]]]: Index of the first text in each
+            batch and the batch of texts.
+        """
+        max_chars = self.MAX_BATCH_TOKENS * self.CHARS_PER_TOKEN
+        start = 0
+        batch: list[str] = []
+        batch_chars = 0
+        for i, text in enumerate(texts):
+            if batch and (
+                len(batch) >= self.batch_size
+                or batch_chars + len(text) > max_chars
+            ):
+                yield start, batch
+                start = i
+                batch = []
+                batch_chars = 0
+            batch.append(text)
+            batch_chars += len(text)
+        if batch:
+            yield start, batch
+
+    def _wait_for_rate_limit(self) -> None:
+        with self._rate_limit_lock:
+            delay = self._rate_limited_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _set_rate_limited(self, delay: float) -> None:
+        with self._rate_limit_lock:
+            self._rate_limited_until = max(
+                self._rate_limited_until, time.monotonic() + delay
+            )
+
+    def _create_embeddings(
+        self, model_name: str, batch: list[str]
+    ) -> list[list[float]]:
+        """
+        Embeds one batch, backing off and retrying when rate limited (429),
+        on server errors (5xx) and on connection errors.
         """
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i : i + self.batch_size]
-            yield batch
+        from openai import APIConnectionError, APIStatusError, RateLimitError
+
+        backoff = self.INITIAL_BACKOFF_SECONDS
+        attempt = 0
+        while True:
+            self._wait_for_rate_limit()
+            try:
+                response = self.client.embeddings.create(
+                    model=model_name,
+                    encoding_format="float",
+                    input=batch,
+                )
+                return [item.embedding for item in response.data]
+            except (APIConnectionError, APIStatusError) as e:
+                retryable = isinstance(
+                    e, APIConnectionError | RateLimitError
+                ) or (isinstance(e, APIStatusError) and e.status_code >= 500)
+                if not retryable or attempt == self.MAX_RETRIES:
+                    raise
+                delay = _get_retry_after(e)
+                if delay is None:
+                    delay = backoff * random.uniform(1, 1.5)
+                delay = min(delay, self.MAX_BACKOFF_SECONDS)
+                if isinstance(e, RateLimitError):
+                    self._set_rate_limited(delay)
+                logger().warning(
+                    f"Embedding request failed ({e}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                backoff = min(backoff * 2, self.MAX_BACKOFF_SECONDS)
+                attempt += 1
 
     def generate_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds the texts in batches, sending up to MAX_CONCURRENT_REQUESTS
+        batches at a time.
+
+        Each batch is retried on its own, so if a batch still fails the
+        embeddings of the other batches are kept and the texts of the failed
+        batch get an empty embedding.
+        """
         if not texts:
             raise ValueError("Input list of texts is empty.")
-        model_config = get_user_settings().get_embedding_model_config_or_throw()
+        model_name = self._get_model_name()
         total_texts = len(texts)
+        batches = list(self._batch_texts(texts))
         logger().info(
-            f"Generating embeddings for {total_texts} texts in batches of {self.batch_size}"
+            f"Generating embeddings for {total_texts} texts in {len(batches)} batches"
         )
-
-        all_embeddings: list[list[float]] = []
-        batch_num = -1
-        try:
-            for batch_num, batch in enumerate(self._batch_texts(texts), 1):
-                batch_size = len(batch)
-                start_idx = (batch_num - 1) * self.batch_size
-                end_idx = start_idx + batch_size
-
-                logger().info(
-                    f"Processing batch {batch_num}: texts {start_idx + 1}-{end_idx} "
-                    f"({batch_size} texts)"
-                )
-                logger().debug(
-                    "Using model: %s",
-                    self.model_prefix + model_config.embedding_model_name,
+        logger().debug("Using model: %s", model_name)
+
+        all_embeddings: list[list[float]] = [[] for _ in texts]
+        failed_batches = 0
+        with ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_REQUESTS,
+            thread_name_prefix="embeddings",
+        ) as executor:
+            futures = {
+                executor.submit(self._create_embeddings, model_name, batch): (
+                    start,
+                    batch,
                 )
-                response = self.client.embeddings.create(
-                    model=self.model_prefix + model_config.embedding_model_name,
-                    encoding_format="float",
-                    input=batch,
-                )
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
+                for start, batch in batches
+            }
+            for future in as_completed(futures):
+                start, batch = futures[future]
+                end = start + len(batch)
+                try:
+                    batch_embeddings = future.result()
+                except Exception as e:
+                    failed_batches += 1
+                    logger().error(
+                        f"Error embedding texts {start + 1}-{end}: {e}"
+                    )
+                    continue
+                if len(batch_embeddings) != len(batch):
+                    failed_batches += 1
+                    logger().error(
+                        f"Expected {len(batch)} embeddings for texts "
+                        f"{start + 1}-{end}, got {len(batch_embeddings)}"
+                    )
+                    continue
+                all_embeddings[start:end] = batch_embeddings
+                logger().debug(f"✓ Completed texts {start + 1}-{end}")
 
-                logger().info(
-                    f"✓ Completed batch {batch_num} "
-                    f"({end_idx}/{total_texts} texts processed)"
-                )
+        logger().info(
+            f"✓ Completed {len(batches) - failed_batches}/{len(batches)} batches "
+            f"for {total_texts} texts."
+        )
+        return all_embeddings
 
-            logger().info(
-                f"✓ Completed all batches. Generated {len(all_embeddings)} embeddings."
-            )
-            return all_embeddings
 
-        except Exception as e:
-            logger().error(f"Error occurred during batch {batch_num}: {e}")
-            return []
+def _get_retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
 
 
 _registered_models: list[EmbeddingModelConfig] = []
@@ -185,9 +321,13 @@ def register_embedding_provider(provider: EmbeddingProvider):
     if not provider.provider_id:
         raise ValueError("Provider ID is required")
     _providers[provider.provider_id] = provider
-    proxy_config = get_language_model_provider(
-        provider.provider_id
-    ).proxy_config
+    try:
+        proxy_config = get_language_model_provider(
+            provider.provider_id
+        ).proxy_config
+    except ValueError:
+        # Providers which run locally have no language model provider.
+        proxy_config = None
     if proxy_config:
         _proxy_providers[provider.provider_id] = OpenAIEmbeddingProvider(
             base_url=os.getenv(
@@ -203,7 +343,7 @@ def get_embedding_providers() -> list[EmbeddingProvider]:
 
 
 def get_embedding_provider(provider_id: str) -> EmbeddingProvider:
-    if should_use_llm_proxy():
+    if should_use_llm_proxy() and provider_id in _proxy_providers:
         return _proxy_providers[provider_id]
     if provider_id not in _providers:
         raise ValueError(f"Provider {provider_id} not found")
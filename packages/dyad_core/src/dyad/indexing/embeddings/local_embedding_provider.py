@@ -0,0 +1,174 @@
+import importlib.util
+import os
+import threading
+from typing import Any
+
+from dyad.indexing.embeddings.embedding_provider import (
+    EmbeddingProvider,
+    register_embedding_models,
+    register_embedding_provider,
+)
+from dyad.logging.logging import logger
+from dyad.settings.user_settings import (
+    EmbeddingModelConfig,
+    get_readonly_user_settings,
+)
+from dyad.utils.user_data_dir_utils import get_user_data_dir
+
+LOCAL_PROVIDER_ID = "local"
+# Overrides the directory the model is loaded from.
+MODEL_PATH_ENV_VAR = "DYAD_LOCAL_EMBEDDING_MODEL_PATH"
+MODEL_FILENAME = "model.onnx"
+TOKENIZER_FILENAME = "tokenizer.json"
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeds texts on the CPU with an ONNX export of a sentence-transformers
+    model (e.g. all-MiniLM-L6-v2), so semantic search works offline.
+
+    The model directory holds `model.onnx` and its `tokenizer.json`; it is
+    `<user data dir>/embedding_models/<model name>` unless
+    `DYAD_LOCAL_EMBEDDING_MODEL_PATH` is set. Needs the optional
+    `onnxruntime` and `tokenizers` packages (the `local-embeddings` extra).
+    """
+
+    provider_id = LOCAL_PROVIDER_ID
+    display_name = "Local (CPU)"
+
+    BATCH_SIZE = 32
+    # Longer texts are truncated, these models are trained on up to 256.
+    MAX_TOKENS = 256
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._model_path: str | None = None
+        self._session: Any = None
+        self._tokenizer: Any = None
+
+    def is_available(self) -> bool:
+        """Whether the model and the packages to run it are installed."""
+        model_path = get_local_model_path(self._get_model_name())
+        return all(
+            importlib.util.find_spec(module) is not None
+            for module in ("onnxruntime", "tokenizers")
+        ) and all(
+            os.path.isfile(os.path.join(model_path, filename))
+            for filename in (MODEL_FILENAME, TOKENIZER_FILENAME)
+        )
+
+    def generate_single_embedding(self, text: str) -> list[float]:
+        if not text:
+            raise ValueError("Input text is empty.")
+        return self._embed([text])[0]
+
+    def generate_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds the texts in batches of similar length, so little padding is
+        computed. onnxruntime runs each batch on all CPU cores.
+        """
+        if not texts:
+            raise ValueError("Input list of texts is empty.")
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        all_embeddings: list[list[float]] = [[] for _ in texts]
+        for start in range(0, len(order), self.BATCH_SIZE):
+            indices = order[start : start + self.BATCH_SIZE]
+            try:
+                embeddings = self._embed([texts[i] for i in indices])
+            except Exception as e:
+                logger().error(f"Error embedding {len(indices)} texts: {e}")
+                continue
+            for i, embedding in zip(indices, embeddings, strict=True):
+                all_embeddings[i] = embedding
+        return all_embeddings
+
+    def _get_model_name(self) -> str:
+        model_config = get_readonly_user_settings().embedding_model_config
+        if model_config is not None and model_config.provider_id == (
+            self.provider_id
+        ):
+            return model_config.embedding_model_name
+        return LOCAL_EMBEDDING_MODELS[0].embedding_model_name
+
+    def _load(self) -> tuple[Any, Any]:
+        """Loads the model on first use, and again if its path changed."""
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_path = get_local_model_path(self._get_model_name())
+        with self._lock:
+            if self._model_path != model_path:
+                logger().info(
+                    f"Loading local embedding model from {model_path}"
+                )
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = os.cpu_count() or 1
+                self._session = onnxruntime.InferenceSession(
+                    os.path.join(model_path, MODEL_FILENAME),
+                    sess_options=options,
+                    providers=["CPUExecutionProvider"],
+                )
+                self._tokenizer = Tokenizer.from_file(
+                    os.path.join(model_path, TOKENIZER_FILENAME)
+                )
+                self._tokenizer.enable_truncation(self.MAX_TOKENS)
+                self._tokenizer.enable_padding()
+                self._model_path = model_path
+            return self._session, self._tokenizer
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
+        import numpy as np
+
+        session, tokenizer = self._load()
+        encodings = tokenizer.encode_batch(texts)
+        attention_mask = np.array(
+            [encoding.attention_mask for encoding in encodings], dtype=np.int64
+        )
+        inputs = {
+            "input_ids": np.array(
+                [encoding.ids for encoding in encodings], dtype=np.int64
+            ),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.array(
+                [encoding.type_ids for encoding in encodings], dtype=np.int64
+            ),
+        }
+        input_names = {model_input.name for model_input in session.get_inputs()}
+        token_embeddings = session.run(
+            None, {k: v for k, v in inputs.items() if k in input_names}
+        )[0]
+        return mean_pool(token_embeddings, attention_mask).tolist()
+
+
+def mean_pool(token_embeddings: Any, attention_mask: Any) -> Any:
+    """
+    Averages the embeddings of the (non-padding) tokens of each text and
+    normalizes them to unit length, as sentence-transformers does.
+    """
+    import numpy as np
+
+    mask = attention_mask[:, :, np.newaxis].astype(token_embeddings.dtype)
+    summed = (token_embeddings * mask).sum(axis=1)
+    embeddings = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+
+def get_local_model_path(model_name: str) -> str:
+    return os.environ.get(MODEL_PATH_ENV_VAR) or os.path.join(
+        get_user_data_dir(), "embedding_models", model_name
+    )
+
+
+LOCAL_EMBEDDING_MODELS = [
+    EmbeddingModelConfig(
+        embedding_model_name="all-MiniLM-L6-v2",
+        embedding_dim=384,
+        provider_id=LOCAL_PROVIDER_ID,
+    ),
+]
+
+local_embedding_provider = LocalEmbeddingProvider()
+
+register_embedding_models(LOCAL_EMBEDDING_MODELS)
+register_embedding_provider(provider=local_embedding_provider)
@@ -1,22 +1,36 @@
+import contextlib
+import functools
 import json
 import os
+import struct
+import tempfile
 import threading
 import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from pathspec import PathSpec
 
 from dyad import logger
-from dyad.indexing.file_update import FileUpdate
+from dyad.indexing.file_update import FileStat, FileUpdate
+from dyad.indexing.ignore_matcher import IgnoreMatcher
+from dyad.indexing.indexing_queue import IndexingQueue
+from dyad.indexing.lexical_index import get_lexical_index
 from dyad.indexing.semantic_search_store import (
     maybe_get_semantic_search_store,
 )
-from dyad.settings.workspace_settings import get_workspace_settings
+from dyad.settings.workspace_settings import get_readonly_workspace_settings
 from dyad.status.status import Status
 from dyad.status.status_tracker import status_tracker
 from dyad.storage.checkpoint.file_checkpoint import cleanup_old_checkpoints
 from dyad.storage.models.pad import clean_up_orphaned_pads, sync_file_as_pad
-from dyad.suggestions import add_suggestion, remove_suggestion
+from dyad.suggestions import (
+    add_suggestion,
+    add_suggestions,
+    remove_suggestion,
+    remove_suggestions,
+)
 from dyad.workspace_util import (
     get_workspace_root_path,
     get_workspace_storage_dir,
@@ -24,110 +38,194 @@ from dyad.workspace_util import (
 
 PREFIX = "./"
 
-CACHE_FILENAME = "file_index_cache.json"
+CACHE_FILENAME = "file_index_cache.bin"
+# Written by older versions, read if there's no cache in the current format.
+LEGACY_CACHE_FILENAME = "file_index_cache.json"
+
+# Cache file layout: a header with the magic bytes, format version and entry
+# count, followed by each entry's path length, mtime_ns, size and inode and
+# then its UTF-8 path relative to the workspace root.
+_CACHE_MAGIC = b"DYFI"
+_CACHE_VERSION = 1
+_CACHE_HEADER = struct.Struct("<4sII")
+_CACHE_ENTRY = struct.Struct("<IqqQ")
 
 
 class GitAwareFileHandler:
-    def __init__(self, index: "FileIndex"):
+    def __init__(
+        self,
+        index: "FileIndex",
+        on_ignore_files_changed: Callable[[], None] | None = None,
+    ):
         self.index = index
         self.workspace_root = get_workspace_root_path()
-        self.spec = get_ignore_specs(self.workspace_root)
+        self.ignore_matcher = get_ignore_matcher(self.workspace_root)
         self.semantic_store = maybe_get_semantic_search_store()
+        self.on_ignore_files_changed = on_ignore_files_changed
+        self.queue = IndexingQueue(self.process_paths)
 
     def process_changes(self, changes):
-        from watchfiles import Change
-
-        updates = []
-        for change_type, filepath in changes:
-            relative_path = os.path.relpath(filepath, self.workspace_root)
+        """
+        Queues the changed files to be indexed, this runs on the thread
+        watching for changes so it does as little as possible.
+        """
+        relative_changes = [
+            (
+                change_type,
+                filepath,
+                os.path.relpath(filepath, self.workspace_root),
+            )
+            for change_type, filepath in changes
+        ]
+        if any(
+            self.ignore_matcher.is_ignore_file(relative_path)
+            for _, _, relative_path in relative_changes
+        ):
+            logger().info("Ignore files changed, re-reading them")
+            self.ignore_matcher.invalidate()
+            if self.on_ignore_files_changed:
+                self.on_ignore_files_changed()
 
+        paths = []
+        for _, _, relative_path in relative_changes:
             # Check if the file or any parent directory starts with a dot
             path_parts = relative_path.split(os.sep)
             if any(part.startswith(".") for part in path_parts):
                 continue
+            if not self.ignore_matcher.is_ignored(relative_path):
+                paths.append(relative_path)
+        self.queue.enqueue(paths)
 
-            if not self.spec.match_file(relative_path):
-                # Note: we may receive an added and deleted event for the same file
-                # out of order, so we need to check the file existence to be sure.
-                if change_type in [
-                    Change.added,
-                    Change.modified,
-                ] and os.path.isfile(filepath):
-                    mtime = os.path.getmtime(filepath)
-                    self.index.add_file(filepath)
-                    updates.append(
-                        FileUpdate(
-                            file_path=relative_path,
-                            type="edit",
-                            modified_timestamp=mtime,
-                        )
+    def process_paths(self, relative_paths: list[str]):
+        """Indexes changed files, called by the indexing queue."""
+        updates = []
+        for relative_path in relative_paths:
+            filepath = os.path.join(self.workspace_root, relative_path)
+            # Changes are coalesced, so the file's current state is used
+            # instead of the type of the last change.
+            if os.path.isfile(filepath):
+                stat = self.index.add_file(filepath)
+                updates.append(
+                    FileUpdate(
+                        file_path=relative_path,
+                        type="edit",
+                        modified_timestamp=stat.mtime,
+                        stat=stat,
                     )
-                    # Add pad processing here
-                    process_file_for_pads(relative_path)
-                elif change_type == Change.deleted and not os.path.isfile(
-                    filepath
-                ):
-                    self.index.remove_file(filepath)
-                    updates.append(
-                        FileUpdate(
-                            file_path=relative_path,
-                            type="delete",
-                            modified_timestamp=time.time(),
-                        )
+                )
+                # Add pad processing here
+                process_file_for_pads(relative_path)
+            elif not os.path.exists(filepath):
+                self.index.remove_file(filepath)
+                updates.append(
+                    FileUpdate(
+                        file_path=relative_path,
+                        type="delete",
+                        modified_timestamp=time.time(),
                     )
+                )
 
+        if updates:
+            get_lexical_index().process_updates(updates)
         if updates and self.semantic_store:
             self.semantic_store.process_updates(updates)
 
 
 class FileIndex:
+    # Changes are written to the cache at most this often.
+    SAVE_DELAY_SECONDS = 2.0
+
     def __init__(self, cache_path: str):
-        self.files: dict[str, float] = {}  # {filepath: modification_time}
+        self.files: dict[str, FileStat] = {}
         self.cache_path = cache_path
         self.lock = threading.Lock()
+        # Held while the cache is written, by the save timer or full indexing,
+        # so an older copy of the files is never written over a newer one.
+        self._save_lock = threading.Lock()
+        self._save_timer: threading.Timer | None = None
 
     def load_cache(self):
-        if not os.path.exists(self.cache_path):
-            logger().info("No cache file found. Starting fresh indexing.")
-            return
-
+        legacy_cache_path = os.path.join(
+            os.path.dirname(self.cache_path), LEGACY_CACHE_FILENAME
+        )
         try:
-            with open(self.cache_path) as f:
-                data = json.load(f)
-                with self.lock:
-                    for k, v in data.get("files", {}).items():
-                        self.files[k] = v
-                        add_suggestion("file", _relative_filepath(k))
-            status_tracker().enqueue(
-                Status("Loaded file index from cache", type="indexing")
-            )
-            logger().info(f"Loaded {len(self.files)} files from cache.")
+            if os.path.exists(self.cache_path):
+                files = _read_cache_file(self.cache_path)
+            elif os.path.exists(legacy_cache_path):
+                files = _read_legacy_cache_file(legacy_cache_path)
+            else:
+                logger().info("No cache file found. Starting fresh indexing.")
+                return
         except Exception as e:
             logger().error(f"Failed to load cache: {e}")
-            self.files = {}
+            return
+
+        with self.lock:
+            self.files.update(files)
+        add_suggestions(
+            "file",
+            {
+                _relative_filepath(filepath): stat.mtime
+                for filepath, stat in files.items()
+            },
+        )
+        status_tracker().enqueue(
+            Status("Loaded file index from cache", type="indexing")
+        )
+        logger().info(f"Loaded {len(files)} files from cache.")
 
     def save_cache(self):
-        try:
+        """Writes the cache now, replacing the cache file atomically."""
+        with self._save_lock:
             with self.lock:
-                data = {"files": self.files}
-            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
-            with open(self.cache_path, "w") as f:
-                json.dump(data, f)
-            logger().info(f"Saved {len(self.files)} files to cache.")
-        except Exception as e:
-            logger().error(f"Failed to save cache: {e}")
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                files = self.files.copy()
+            try:
+                _write_cache_file(self.cache_path, files)
+                legacy_cache_path = os.path.join(
+                    os.path.dirname(self.cache_path), LEGACY_CACHE_FILENAME
+                )
+                if os.path.exists(legacy_cache_path):
+                    os.remove(legacy_cache_path)
+                logger().info(f"Saved {len(files)} files to cache.")
+            except Exception as e:
+                logger().error(f"Failed to save cache: {e}")
+
+    def schedule_save_cache(self):
+        """
+        Writes the cache after SAVE_DELAY_SECONDS, so a burst of changes
+        (e.g. from a git checkout) is written once.
+        """
+        with self.lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(
+                self.SAVE_DELAY_SECONDS, self.save_cache
+            )
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def cancel_scheduled_save(self):
+        with self.lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
 
-    def add_file(self, filepath: str):
-        mtime = os.path.getmtime(filepath)
-        self.files[filepath] = mtime
-        add_suggestion("file", _relative_filepath(filepath), mtime)
-        self.save_cache()
+    def add_file(self, filepath: str) -> FileStat:
+        stat = FileStat.from_path(filepath)
+        with self.lock:
+            self.files[filepath] = stat
+        add_suggestion("file", _relative_filepath(filepath), stat.mtime)
+        self.schedule_save_cache()
+        return stat
 
     def remove_file(self, filepath: str):
-        if filepath in self.files:
-            del self.files[filepath]
+        with self.lock:
+            self.files.pop(filepath, None)
         remove_suggestion("file", _relative_filepath(filepath))
-        self.save_cache()
+        self.schedule_save_cache()
 
     @staticmethod
     def _should_include_file(file_path: Path) -> bool:
@@ -185,35 +283,17 @@ class FileIndex:
           * Excludes files in dot-directories
           * Excludes lock files
           * Excludes json files (except package.json)
-          * Respects .gitignore rules
+          * Respects .gitignore rules, including nested .gitignore files
         """
-        spec = get_ignore_specs(path)
-        temp_files = {}
-
-        for root, dirs, files in os.walk(path):
-            root_path = Path(root)
-            dirs[:] = [
-                d for d in dirs if self._should_include_directory(root_path / d)
-            ]
-
-            for file in files:
-                file_path = root_path / file
-
-                if not self._should_include_file(file_path):
-                    continue
-
-                filepath_str = str(file_path)
-                relative_path = os.path.relpath(filepath_str, path)
-
-                if not spec.match_file(relative_path):
-                    try:
-                        mtime = os.path.getmtime(filepath_str)
-                        temp_files[filepath_str] = mtime
-                        # Add pad processing here
-                        process_file_for_pads(relative_path)
-                    except FileNotFoundError:
-                        # The file might have been deleted between os.walk and os.path.getmtime
-                        continue
+        temp_files = scan_directory(
+            path,
+            get_ignore_matcher(path),
+            include_file=self._should_include_file,
+            include_directory=self._should_include_directory,
+        )
+        for filepath_str in temp_files:
+            # Add pad processing here
+            process_file_for_pads(os.path.relpath(filepath_str, path))
 
         with self.lock:
             current_files = set(self.files.keys())
@@ -223,39 +303,238 @@ class FileIndex:
             removed_files = current_files - new_files
             for filepath in removed_files:
                 del self.files[filepath]
-                remove_suggestion("file", _relative_filepath(filepath))
+            remove_suggestions(
+                "file",
+                [_relative_filepath(filepath) for filepath in removed_files],
+            )
 
             # Add or update existing files
-            for filepath, mtime in temp_files.items():
-                add_suggestion("file", _relative_filepath(filepath), mtime)
-                self.files[filepath] = mtime
+            self.files.update(temp_files)
+            add_suggestions(
+                "file",
+                {
+                    _relative_filepath(filepath): stat.mtime
+                    for filepath, stat in temp_files.items()
+                },
+            )
 
         clean_up_orphaned_pads()
 
 
+SCAN_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+def scan_directory(
+    root: str,
+    ignore_matcher: IgnoreMatcher,
+    *,
+    include_file: Callable[[Path], bool],
+    include_directory: Callable[[Path], bool],
+) -> dict[str, FileStat]:
+    """
+    Find the files under `root` which aren't ignored, with their stat data.
+
+    Ignored directories (e.g. `node_modules/`) are pruned before they're
+    walked, and each top-level directory is walked on its own thread.
+    """
+    files: dict[str, FileStat] = {}
+    subdirs = _scan_entries(
+        root, "", ignore_matcher, include_file, include_directory, files
+    )
+    if not subdirs:
+        return files
+    with ThreadPoolExecutor(
+        max_workers=SCAN_MAX_WORKERS, thread_name_prefix="scan"
+    ) as executor:
+        futures = [
+            executor.submit(
+                _scan_tree,
+                root,
+                subdir,
+                ignore_matcher,
+                include_file,
+                include_directory,
+            )
+            for subdir in subdirs
+        ]
+        for future in futures:
+            files.update(future.result())
+    return files
+
+
+def _scan_tree(
+    root: str,
+    relative_dir: str,
+    ignore_matcher: IgnoreMatcher,
+    include_file: Callable[[Path], bool],
+    include_directory: Callable[[Path], bool],
+) -> dict[str, FileStat]:
+    files: dict[str, FileStat] = {}
+    pending = [relative_dir]
+    while pending:
+        pending.extend(
+            _scan_entries(
+                root,
+                pending.pop(),
+                ignore_matcher,
+                include_file,
+                include_directory,
+                files,
+            )
+        )
+    return files
+
+
+def _scan_entries(
+    root: str,
+    relative_dir: str,
+    ignore_matcher: IgnoreMatcher,
+    include_file: Callable[[Path], bool],
+    include_directory: Callable[[Path], bool],
+    files: dict[str, FileStat],
+) -> list[str]:
+    """
+    Add the files directly in `relative_dir` to `files` and return its
+    subdirectories which should be walked.
+    """
+    subdirs = []
+    try:
+        with os.scandir(os.path.join(root, relative_dir)) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name)
+                try:
+                    if entry.is_dir():
+                        # Like os.walk, symlinked directories aren't followed.
+                        if (
+                            not entry.is_symlink()
+                            and include_directory(Path(entry.path))
+                            and not ignore_matcher.is_ignored(
+                                relative_path, is_dir=True
+                            )
+                        ):
+                            subdirs.append(relative_path)
+                    elif (
+                        entry.is_file()
+                        and include_file(Path(entry.path))
+                        and not ignore_matcher.is_ignored(relative_path)
+                    ):
+                        stat = entry.stat()
+                        # DirEntry.stat() doesn't fill in st_ino on Windows.
+                        files[entry.path] = FileStat(
+                            stat.st_mtime_ns,
+                            stat.st_size,
+                            stat.st_ino or entry.inode(),
+                        )
+                except FileNotFoundError:
+                    # The file might have been deleted since it was listed
+                    continue
+    except OSError as e:
+        logger().warning(f"Could not scan directory {relative_dir}: {e}")
+    return subdirs
+
+
+def _write_cache_file(cache_path: str, files: dict[str, FileStat]) -> None:
+    root_path = get_workspace_root_path()
+    parts = [_CACHE_HEADER.pack(_CACHE_MAGIC, _CACHE_VERSION, len(files))]
+    for filepath, stat in files.items():
+        path = os.path.relpath(filepath, root_path).encode(
+            "utf-8", "surrogateescape"
+        )
+        parts.append(
+            _CACHE_ENTRY.pack(len(path), stat.mtime_ns, stat.size, stat.inode)
+        )
+        parts.append(path)
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # A unique temporary file, synced before it replaces the cache so a
+    # crash can't leave a truncated cache behind.
+    fd, temp_path = tempfile.mkstemp(
+        dir=cache_dir, prefix=f"{os.path.basename(cache_path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"".join(parts))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
+def _read_cache_file(cache_path: str) -> dict[str, FileStat]:
+    with open(cache_path, "rb") as f:
+        data = f.read()
+    magic, version, count = _CACHE_HEADER.unpack_from(data)
+    if magic != _CACHE_MAGIC or version != _CACHE_VERSION:
+        raise ValueError(f"Unsupported file index cache format: {cache_path}")
+    root_path = get_workspace_root_path()
+    files = {}
+    offset = _CACHE_HEADER.size
+    for _ in range(count):
+        path_length, mtime_ns, size, inode = _CACHE_ENTRY.unpack_from(
+            data, offset
+        )
+        offset += _CACHE_ENTRY.size
+        path = data[offset : offset + path_length].decode(
+            "utf-8", "surrogateescape"
+        )
+        offset += path_length
+        files[os.path.join(root_path, path)] = FileStat(mtime_ns, size, inode)
+    return files
+
+
+def _read_legacy_cache_file(cache_path: str) -> dict[str, FileStat]:
+    with open(cache_path) as f:
+        data = json.load(f)
+    return {k: _load_file_stat(v) for k, v in data.get("files", {}).items()}
+
+
+def _load_file_stat(value: list[int] | float) -> FileStat:
+    if isinstance(value, list):
+        return FileStat(*value)
+    # Caches written by older versions only stored the mtime; the unknown
+    # size never matches, so these files are hashed once more.
+    return FileStat(int(value * 1e9), -1, 0)
+
+
 def _relative_filepath(filepath: str) -> str:
     return os.path.relpath(filepath, get_workspace_root_path())
 
 
-def get_ignore_specs(root_path: str) -> PathSpec:
-    """Create a PathSpec object from .gitignore and .dyadignore files."""
-    ignore_patterns = []
+_ignore_matchers: dict[str, IgnoreMatcher] = {}
+_ignore_matchers_lock = threading.Lock()
+
+
+def get_ignore_matcher(root_path: str) -> IgnoreMatcher:
+    """
+    Returns the ignore matcher for the workspace, shared by the indexer and
+    the file watcher so ignore files are only read once.
+    """
+    with _ignore_matchers_lock:
+        matcher = _ignore_matchers.get(root_path)
+        if matcher is None:
+            matcher = IgnoreMatcher(root_path)
+            _ignore_matchers[root_path] = matcher
+        return matcher
+
 
-    # Read .gitignore
-    gitignore_file = os.path.join(root_path, ".gitignore")
-    if os.path.exists(gitignore_file):
-        with open(gitignore_file) as f:
-            ignore_patterns.extend(f.readlines())
+def invalidate_ignore_matchers() -> None:
+    """
+    Makes the ignore matchers read the ignore files and settings again, e.g.
+    when `.dyadignore` is enabled or disabled.
+    """
+    with _ignore_matchers_lock:
+        matchers = list(_ignore_matchers.values())
+    for matcher in matchers:
+        matcher.invalidate()
 
-    # Read .dyadignore if enabled
-    if get_workspace_settings().ignore_files_enabled:
-        dyadignore_file = os.path.join(root_path, ".dyadignore")
-        if os.path.exists(dyadignore_file):
-            with open(dyadignore_file) as f:
-                ignore_patterns.extend(f.readlines())
 
-    # Always ignore .git directory
-    return PathSpec.from_lines("gitignore", ignore_patterns)
+@functools.lru_cache(maxsize=1)
+def _get_pads_spec(pads_glob_path: str) -> PathSpec:
+    # Compiled once and reused for every file until the glob setting changes.
+    return PathSpec.from_lines("gitignore", [pads_glob_path])
 
 
 def process_file_for_pads(file_path: str) -> None:
@@ -267,11 +546,10 @@ def process_file_for_pads(file_path: str) -> None:
     """
 
     try:
-        settings = get_workspace_settings()
-        if not settings.pads_glob_path:
+        pads_glob_path = get_readonly_workspace_settings().pads_glob_path
+        if not pads_glob_path:
             return
-        spec = PathSpec.from_lines("gitignore", [settings.pads_glob_path])
-        is_pad = spec.match_file(file_path)
+        is_pad = _get_pads_spec(pads_glob_path).match_file(file_path)
         if is_pad:
             logger().debug(
                 f"File {file_path} matches pad glob pattern, syncing as pad"
@@ -287,28 +565,47 @@ def start_watching():
 
 _has_activated = False
 _current_watcher_thread = None  # Track the current watcher thread
+_current_index: FileIndex | None = None
+_current_queue: IndexingQueue | None = None
 _stop_watching = False  # Flag to control the watch loop
 
 
 def watch_files():
-    global _stop_watching
+    global _stop_watching, _current_index, _current_queue
     workspace_root = get_workspace_root_path()
     storage_dir = get_workspace_storage_dir()
     cache_path = os.path.join(storage_dir, CACHE_FILENAME)
     index = FileIndex(cache_path)
+    _current_index = index
     semantic_store = maybe_get_semantic_search_store()
 
     # Load cache if available
     index.load_cache()
 
-    handler = GitAwareFileHandler(index)
+    # Full indexing runs again when ignore files change, one run at a time.
+    full_indexing_lock = threading.Lock()
 
     def full_indexing():
+        with full_indexing_lock:
+            _full_indexing()
+
+    def start_full_indexing():
+        indexing_thread = threading.Thread(target=full_indexing)
+        indexing_thread.daemon = True
+        indexing_thread.start()
+
+    handler = GitAwareFileHandler(
+        index, on_ignore_files_changed=start_full_indexing
+    )
+    ignore_matcher = handler.ignore_matcher
+    _current_queue = handler.queue
+
+    def _full_indexing():
         logger().info("Starting full indexing...")
         start_time = time.time()
 
         # Store the previous state with modification times
-        previous_files = index.files.copy()  # Now a dict of filepath: mtime
+        previous_files = index.files.copy()
 
         # Perform the indexing
         index.index_directory(workspace_root)
@@ -321,13 +618,17 @@ def watch_files():
         # Create updates list
         updates = []
 
+        # Files whose stat data is unchanged are skipped by the semantic
+        # store without being read.
         for filepath in current_files:
             relative_path = _relative_filepath(filepath)
+            stat = index.files[filepath]
             updates.append(
                 FileUpdate(
                     file_path=relative_path,
                     type="edit",
-                    modified_timestamp=index.files[filepath],
+                    modified_timestamp=stat.mtime,
+                    stat=stat,
                 )
             )
 
@@ -342,9 +643,17 @@ def watch_files():
                 )
             )
 
+        # The lexical index is in memory, so the first run reads every file.
+        # That's done in the background, so the semantic store doesn't wait.
+        lexical_indexing_thread = threading.Thread(
+            target=get_lexical_index().process_updates, args=(updates,)
+        )
+        lexical_indexing_thread.daemon = True
+        lexical_indexing_thread.start()
         # Process updates through semantic store
         if updates and semantic_store:
             semantic_store.process_updates(updates)
+        lexical_indexing_thread.join()
 
         end_time = time.time()
         elapsed_time = end_time - start_time
@@ -358,9 +667,7 @@ def watch_files():
         cleanup_old_checkpoints()
 
     # Start full indexing in a separate thread
-    indexing_thread = threading.Thread(target=full_indexing)
-    indexing_thread.daemon = True
-    indexing_thread.start()
+    start_full_indexing()
 
     from watchfiles import Change, watch
 
@@ -368,8 +675,13 @@ def watch_files():
         """
         Returns True if the path should be watched, False otherwise.
         """
+        relative_path = os.path.relpath(path, workspace_root)
+        if ignore_matcher.is_ignore_file(relative_path):
+            return True
         p = Path(path)
-        return FileIndex._should_include_file(p)
+        return FileIndex._should_include_file(
+            p
+        ) and not ignore_matcher.is_ignored(relative_path)
 
     try:
         for changes in watch(
@@ -383,9 +695,22 @@ def watch_files():
     except Exception as e:
         logger().error(f"Watch process stopped due to error: {e}")
     finally:
+        handler.queue.stop()
         logger().info("Watch process terminated")
 
 
+def prioritize_indexing(file_paths: Iterable[str]) -> None:
+    """
+    Indexes these files (relative to the workspace root) before other changed
+    files, e.g. because they were opened or mentioned.
+
+    Only files which are waiting to be indexed, or change later, are
+    affected; this doesn't index files which haven't changed.
+    """
+    if _current_queue is not None:
+        _current_queue.prioritize(file_paths)
+
+
 def activate():
     global _has_activated, _current_watcher_thread, _stop_watching
     if _has_activated:
@@ -406,15 +731,24 @@ def clear_cache_and_restart():
     """
     Clears the file index cache and restarts the indexing process.
     This function will:
-    1. Stop the current file watcher thread
+    1. Stop the current file watcher thread and its indexing queue
     2. Delete the cache file
-    3. Clear the semantic search store
+    3. Clear the lexical and semantic search indexes
     4. Restart the file watching and indexing process
     """
     global _has_activated, _current_watcher_thread, _stop_watching
+    global _current_queue
 
     logger().info("Clearing cache and restarting indexing...")
 
+    # The watcher only stops once the next change arrives, so stop its queue
+    # here. A batch still being processed would write to the cleared indexes.
+    if _current_queue is not None:
+        _current_queue.stop()
+        if not _current_queue.join(timeout=5):
+            logger().warning("Indexing queue did not stop gracefully")
+        _current_queue = None
+
     # Stop the current watcher thread if it exists
     if _current_watcher_thread and _current_watcher_thread.is_alive():
         logger().info("Stopping current file watcher...")
@@ -433,15 +767,25 @@ def clear_cache_and_restart():
     storage_dir = get_workspace_storage_dir()
     cache_path = os.path.join(storage_dir, CACHE_FILENAME)
 
-    # Delete the cache file if it exists
-    if os.path.exists(cache_path):
-        try:
-            os.remove(cache_path)
-            logger().info("Cache file deleted successfully")
-        except Exception as e:
-            logger().error(f"Error deleting cache file: {e}")
-
-    # Clear the semantic search store
+    # Don't let a pending save write the old index back
+    if _current_index is not None:
+        _current_index.cancel_scheduled_save()
+
+    # Delete the cache files if they exist
+    for path in [
+        cache_path,
+        os.path.join(storage_dir, LEGACY_CACHE_FILENAME),
+    ]:
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+                logger().info("Cache file deleted successfully")
+            except Exception as e:
+                logger().error(f"Error deleting cache file: {e}")
+
+    # Clear the search indexes
+    invalidate_ignore_matchers()
+    get_lexical_index().clear()
     semantic_store = maybe_get_semantic_search_store()
     if semantic_store:
         semantic_store.clear()
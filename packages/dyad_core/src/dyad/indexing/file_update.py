@@ -1,9 +1,32 @@
-from typing import Literal
+import os
+from typing import Literal, NamedTuple
 
 from pydantic import BaseModel
 
 
+class FileStat(NamedTuple):
+    """The stat data used to tell whether a file changed without reading it."""
+
+    mtime_ns: int
+    size: int
+    inode: int
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+    @classmethod
+    def from_path(cls, path: str) -> "FileStat":
+        return cls.from_stat_result(os.stat(path))
+
+    @classmethod
+    def from_stat_result(cls, result: os.stat_result) -> "FileStat":
+        return cls(result.st_mtime_ns, result.st_size, result.st_ino)
+
+
 class FileUpdate(BaseModel):
     type: Literal["edit", "delete"]
     file_path: str
     modified_timestamp: float
+    # Stat data of the edited file, taken before it's read.
+    stat: FileStat | None = None
@@ -0,0 +1,180 @@
+import os
+import subprocess
+import threading
+
+from pathspec import PathSpec
+
+from dyad.logging.logging import logger
+from dyad.settings.workspace_settings import get_readonly_workspace_settings
+
+GITIGNORE_FILENAME = ".gitignore"
+DYADIGNORE_FILENAME = ".dyadignore"
+GIT_INFO_EXCLUDE_PATH = os.path.join(".git", "info", "exclude")
+
+
+class IgnoreMatcher:
+    """
+    Decides whether workspace paths are ignored, following git's rules:
+
+    * patterns come from the global excludes file, `.git/info/exclude`, the
+      root `.gitignore` (plus `.dyadignore` if enabled) and the `.gitignore`
+      of every directory, each relative to the directory it's in;
+    * patterns in deeper directories take precedence, and within a file the
+      last matching pattern wins;
+    * nothing inside an ignored directory can be re-included.
+
+    The `.gitignore` files and the results for directories are cached until
+    `invalidate` is called, e.g. when an ignore file changes. Unless
+    `use_dyadignore` is given, whether `.dyadignore` is used follows the
+    workspace's `ignore_files_enabled` setting, which is read again by
+    `invalidate`.
+    """
+
+    def __init__(self, root_path: str, *, use_dyadignore: bool | None = None):
+        self.root_path = root_path
+        self._use_dyadignore_override = use_dyadignore
+        self.use_dyadignore = bool(use_dyadignore)
+        self._lock = threading.Lock()
+        self._root_spec = PathSpec([])
+        self._dir_specs: dict[str, PathSpec | None] = {}
+        self._ignored_dirs: dict[str, bool] = {}
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Forget the cached ignore files and settings, so they're read again.
+        """
+        use_dyadignore = self._use_dyadignore_override
+        if use_dyadignore is None:
+            use_dyadignore = (
+                get_readonly_workspace_settings().ignore_files_enabled
+            )
+        root_spec = self._load_root_spec(use_dyadignore)
+        with self._lock:
+            self.use_dyadignore = use_dyadignore
+            self._root_spec = root_spec
+            self._dir_specs = {}
+            self._ignored_dirs = {}
+
+    def is_ignore_file(self, relative_path: str) -> bool:
+        """Whether a change to this file changes which paths are ignored."""
+        relative_path = _normalize(relative_path)
+        return (
+            os.path.basename(relative_path) == GITIGNORE_FILENAME
+            or relative_path == _normalize(GIT_INFO_EXCLUDE_PATH)
+            or (self.use_dyadignore and relative_path == DYADIGNORE_FILENAME)
+        )
+
+    def is_ignored(self, relative_path: str, *, is_dir: bool = False) -> bool:
+        """
+        Args:
+            relative_path: Path relative to the workspace root
+            is_dir: Whether the path is a directory, which directory-only
+                patterns (e.g. `build/`) apply to
+        """
+        relative_path = _normalize(relative_path)
+        parent = _parent(relative_path)
+        if parent and self._is_dir_ignored(parent):
+            return True
+        if is_dir:
+            return self._is_dir_ignored(relative_path)
+        return bool(self._check(relative_path, is_dir=False))
+
+    def _is_dir_ignored(self, relative_dir: str) -> bool:
+        ignored = self._ignored_dirs.get(relative_dir)
+        if ignored is None:
+            parent = _parent(relative_dir)
+            ignored = bool(parent and self._is_dir_ignored(parent)) or bool(
+                self._check(relative_dir, is_dir=True)
+            )
+            self._ignored_dirs[relative_dir] = ignored
+        return ignored
+
+    def _check(self, relative_path: str, *, is_dir: bool) -> bool | None:
+        """
+        Returns True if the deepest matching pattern ignores the path, False
+        if it re-includes it (`!pattern`), or None if no pattern matches.
+        """
+        path = relative_path + "/" if is_dir else relative_path
+        directory = _parent(relative_path)
+        while True:
+            spec = self._get_dir_spec(directory)
+            if spec is not None:
+                result = spec.check_file(
+                    path[len(directory) + 1 :] if directory else path
+                )
+                if result.include is not None:
+                    return result.include
+            if not directory:
+                return None
+            directory = _parent(directory)
+
+    def _get_dir_spec(self, relative_dir: str) -> PathSpec | None:
+        if not relative_dir:
+            return self._root_spec
+        if relative_dir in self._dir_specs:
+            return self._dir_specs[relative_dir]
+        lines = _read_lines(
+            os.path.join(self.root_path, relative_dir, GITIGNORE_FILENAME)
+        )
+        spec = PathSpec.from_lines("gitwildmatch", lines) if lines else None
+        with self._lock:
+            self._dir_specs[relative_dir] = spec
+        return spec
+
+    def _load_root_spec(self, use_dyadignore: bool) -> PathSpec:
+        # From lowest to highest precedence, as the last match wins.
+        lines: list[str] = []
+        global_excludes_file = _get_global_excludes_file(self.root_path)
+        if global_excludes_file:
+            lines.extend(_read_lines(global_excludes_file))
+        lines.extend(
+            _read_lines(os.path.join(self.root_path, GIT_INFO_EXCLUDE_PATH))
+        )
+        lines.extend(
+            _read_lines(os.path.join(self.root_path, GITIGNORE_FILENAME))
+        )
+        if use_dyadignore:
+            lines.extend(
+                _read_lines(os.path.join(self.root_path, DYADIGNORE_FILENAME))
+            )
+        return PathSpec.from_lines("gitwildmatch", lines)
+
+
+def _normalize(relative_path: str) -> str:
+    return relative_path.replace(os.sep, "/").strip("/")
+
+
+def _parent(relative_path: str) -> str:
+    return relative_path.rpartition("/")[0]
+
+
+def _read_lines(path: str) -> list[str]:
+    try:
+        with open(path) as f:
+            return f.readlines()
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    except OSError as e:
+        logger().warning(f"Could not read ignore file {path}: {e}")
+        return []
+
+
+def _get_global_excludes_file(root_path: str) -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "config", "--path", "--get", "core.excludesFile"],
+            cwd=root_path,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return os.path.expanduser(result.stdout.strip())
+    except (OSError, subprocess.SubprocessError):
+        # git isn't installed, fall back to its default location.
+        pass
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+        os.path.expanduser("~"), ".config"
+    )
+    return os.path.join(config_home, "git", "ignore")
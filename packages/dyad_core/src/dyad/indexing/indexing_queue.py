@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+
+from dyad.logging.logging import logger
+from dyad.status.status import Status
+from dyad.status.status_tracker import status_tracker
+
+
+class IndexingQueue:
+    """
+    Processes changed files on background threads, so the thread watching
+    for changes is never blocked by indexing them.
+
+    * Changes to the same path are coalesced. The file is only looked at when
+      it's processed, so the last change wins.
+    * Paths are processed once no change has arrived for `DEBOUNCE_SECONDS`,
+      or `MAX_DELAY_SECONDS` after the first pending change if changes keep
+      arriving, so e.g. a git checkout is processed in a few large batches.
+    * Pending paths passed to `prioritize` (e.g. opened or mentioned files)
+      are processed first and without waiting for the debounce.
+    * Up to `MAX_WORKERS` batches of at most `MAX_BATCH_SIZE` paths are
+      processed at a time, and a path is never in two batches at once.
+
+    Progress is reported through the status tracker.
+    """
+
+    DEBOUNCE_SECONDS = 0.5
+    MAX_DELAY_SECONDS = 5.0
+    MAX_BATCH_SIZE = 100
+    MAX_WORKERS = 2
+    # Number of recently prioritized paths which are remembered.
+    MAX_PRIORITY_PATHS = 100
+
+    def __init__(self, process_batch: Callable[[list[str]], None]):
+        self._process_batch = process_batch
+        self._condition = threading.Condition()
+        # Insertion-ordered, so paths are processed in the order they changed.
+        self._pending: dict[str, None] = {}
+        self._in_progress: set[str] = set()
+        # The most recently prioritized path is last.
+        self._priority: OrderedDict[str, None] = OrderedDict()
+        self._first_pending_time: float | None = None
+        self._last_enqueue_time = 0.0
+        # Paths processed since the queue was last idle, for progress.
+        self._processed_count = 0
+        self._stopped = False
+        self._workers = [
+            threading.Thread(
+                target=self._run, name=f"indexing-queue-{i}", daemon=True
+            )
+            for i in range(self.MAX_WORKERS)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def enqueue(self, paths: Iterable[str]) -> None:
+        now = time.monotonic()
+        with self._condition:
+            if self._stopped:
+                return
+            for path in paths:
+                self._pending.pop(path, None)
+                self._pending[path] = None
+            if not self._pending:
+                return
+            if self._first_pending_time is None:
+                self._first_pending_time = now
+            self._last_enqueue_time = now
+            self._condition.notify_all()
+        self._report_progress()
+
+    def prioritize(self, paths: Iterable[str]) -> None:
+        """
+        Processes these paths before others, if they're pending or once they
+        change. This only reorders the queue, unchanged paths aren't indexed.
+        """
+        with self._condition:
+            for path in paths:
+                self._priority.pop(path, None)
+                self._priority[path] = None
+            while len(self._priority) > self.MAX_PRIORITY_PATHS:
+                self._priority.popitem(last=False)
+            self._condition.notify_all()
+
+    def wait_until_idle(self, timeout: float | None = None) -> bool:
+        """Returns whether all paths were processed within the timeout."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._in_progress, timeout
+            )
+
+    def stop(self) -> None:
+        """
+        Stops the workers once their current batches are processed. Paths
+        enqueued afterwards are ignored.
+        """
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def join(self, timeout: float | None = None) -> bool:
+        """
+        Waits for the workers to exit after `stop`. Returns whether they did
+        within the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(
+                None
+                if deadline is None
+                else max(deadline - time.monotonic(), 0)
+            )
+        return not any(worker.is_alive() for worker in self._workers)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+                while not batch:
+                    if self._stopped:
+                        return
+                    self._condition.wait(self._get_wait_timeout())
+                    batch = self._take_batch()
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                logger().error(f"Error indexing {len(batch)} files: {e}")
+            finally:
+                with self._condition:
+                    self._in_progress.difference_update(batch)
+                    self._processed_count += len(batch)
+                    self._condition.notify_all()
+                self._report_progress()
+
+    def _take_batch(self) -> list[str]:
+        # Must be called with `_condition` held.
+        if self._stopped:
+            return []
+        prioritized = [
+            path
+            for path in reversed(self._priority)
+            if path in self._pending and path not in self._in_progress
+        ]
+        now = time.monotonic()
+        debounced = self._first_pending_time is not None and (
+            now - self._last_enqueue_time >= self.DEBOUNCE_SECONDS
+            or now - self._first_pending_time >= self.MAX_DELAY_SECONDS
+        )
+        batch = prioritized[: self.MAX_BATCH_SIZE]
+        if debounced:
+            batch_paths = set(batch)
+            for path in self._pending:
+                if len(batch) >= self.MAX_BATCH_SIZE:
+                    break
+                if path not in self._in_progress and path not in batch_paths:
+                    batch.append(path)
+        for path in batch:
+            del self._pending[path]
+        self._in_progress.update(batch)
+        if not self._pending:
+            self._first_pending_time = None
+        return batch
+
+    def _get_wait_timeout(self) -> float | None:
+        # Must be called with `_condition` held.
+        if all(path in self._in_progress for path in self._pending):
+            # Woken up once the batches with these paths are processed.
+            return None
+        ready_time = min(
+            self._last_enqueue_time + self.DEBOUNCE_SECONDS,
+            self._first_pending_time + self.MAX_DELAY_SECONDS,
+        )
+        return max(ready_time - time.monotonic(), 0.01)
+
+    def _report_progress(self) -> None:
+        with self._condition:
+            if self._stopped:
+                return
+            remaining = len(self._pending) + len(self._in_progress)
+            processed = self._processed_count
+            if not remaining:
+                self._processed_count = 0
+        if remaining:
+            status_tracker().enqueue(
+                Status(
+                    f"Indexing changed files ({processed}/{processed + remaining})",
+                    in_progress=True,
+                    type="indexing",
+                )
+            )
+        elif processed:
+            status_tracker().enqueue(Status("✓", type="indexing"))
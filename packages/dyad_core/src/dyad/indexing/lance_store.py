@@ -1,16 +1,30 @@
+import contextlib
 import logging
+import math
 import os
+import threading
+import time
 import uuid
-from typing import Any
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Literal
 
 from pydantic import Field
 
-from dyad.settings.user_settings import EmbeddingModelConfig
+from dyad.settings.user_settings import (
+    EmbeddingModelConfig,
+    get_readonly_user_settings,
+)
 
 logger = logging.getLogger(__name__)
 
 EmbeddingRecord = Any
 
+# Training the PQ codebooks needs at least this many rows, whatever the
+# number of partitions and sub-vectors.
+_PQ_TRAINING_ROWS = 256
+
 
 def get_embedding_record_type(dim: int):
     from lancedb.pydantic import LanceModel, Vector
@@ -21,17 +35,25 @@ def get_embedding_record_type(dim: int):
 
         Attributes:
             id: Unique identifier for each record
-            file_path: Path to the file
+            file_path: Chunk ID of the form "<source_path>#chunk_<chunk_index>"
+            source_path: Path of the file the chunk belongs to
+            chunk_index: Position of the chunk within the file
             file_hash: Hash of file contents
             embedding: Vector embedding as a list of floats
             code: Full code/text content
+            start_line: 1-based line the chunk starts at in the file
+            end_line: 1-based line the chunk ends at in the file (inclusive)
         """
 
         id: str = Field(default_factory=lambda: str(uuid.uuid4()))
         file_path: str
+        source_path: str
+        chunk_index: int
         file_hash: str
         embedding: Vector(dim)  # type: ignore
         code: str
+        start_line: int
+        end_line: int
 
         class Config:
             frozen = True
@@ -39,11 +61,48 @@ def get_embedding_record_type(dim: int):
     return EmbeddingRecord
 
 
+@dataclass
+class VectorIndexStatus:
+    """
+    State of the ANN index over the embedding vectors.
+
+    Attributes:
+        state: "flat" while the table is below `min_rows` and searched
+            exhaustively, "building" while the index is trained and "ready"
+            once queries use it
+        total_rows: Number of chunks in the table
+        indexed_rows: Number of chunks covered by the index
+        min_rows: Row count at which the index is built
+    """
+
+    state: Literal["flat", "building", "ready"]
+    total_rows: int
+    indexed_rows: int
+    min_rows: int
+
+
 class LanceEmbeddingStore:
     """
     A simple wrapper around LanceDB for storing file embeddings with ANN search support.
+
+    Rebuilding the full-text index covers the whole table, so writes only mark
+    it dirty and it is rebuilt once per burst of writes, after
+    `FTS_REBUILD_DELAY_SECONDS` without further writes. Until then searches
+    use the previous index. At most every `COMPACTION_INTERVAL_SECONDS` this
+    maintenance also compacts the table and removes versions older than
+    `OLD_VERSION_RETENTION`, so the table does not grow with every edit.
+
+    Once the table reaches `VectorIndexSettings.min_rows` chunks, the same
+    maintenance builds an IVF-PQ index over the vectors. Compaction then adds
+    new chunks to it incrementally; chunks not yet covered are scanned
+    exhaustively. Once the table has grown by `retrain_growth` since the
+    index was trained, it's retrained.
     """
 
+    FTS_REBUILD_DELAY_SECONDS = 5.0
+    COMPACTION_INTERVAL_SECONDS = 10 * 60
+    OLD_VERSION_RETENTION = timedelta(hours=1)
+
     def __init__(
         self, db_path: str, embedding_model_config: EmbeddingModelConfig
     ):
@@ -77,16 +136,43 @@ class LanceEmbeddingStore:
         embedding_record_type = get_embedding_record_type(
             embedding_model_config.embedding_dim
         )
+        self.embedding_dim = embedding_model_config.embedding_dim
+        # Whether the table was (re)created empty, so callers know that any
+        # bookkeeping about previously embedded files is stale.
+        self.created_table = False
+        if table_name in self.db.table_names():
+            self.table = self.db.open_table(table_name)
+            logger.info(f"Opened existing table: {table_name}")
+            missing_fields = set(embedding_record_type.model_fields) - set(
+                self.table.schema.names
+            )
+            if missing_fields:
+                # Tables from before e.g. chunks were mapped to their file and
+                # lines are re-embedded from scratch.
+                logger.info(
+                    f"Dropping table without {sorted(missing_fields)}: {table_name}"
+                )
+                self.db.drop_table(table_name)
         if table_name not in self.db.table_names():
             self.table = self.db.create_table(
                 table_name, schema=embedding_record_type
             )
-
+            self.created_table = True
             logger.info(f"Created new table: {table_name}")
-        else:
-            # The table already exists
-            self.table = self.db.open_table(table_name)
-            logger.info(f"Opened existing table: {table_name}")
+
+        self._index_state_lock = threading.Lock()
+        # Serializes index maintenance, which runs on timer threads.
+        self._maintenance_lock = threading.Lock()
+        self._fts_dirty = False
+        self._maintenance_timer: threading.Timer | None = None
+        self._index_maintenance_deferrals = 0
+        self._last_compaction_time = time.monotonic()
+        self._vector_index_building = False
+        # Row count the vector index was trained on, None if unknown.
+        self._vector_index_trained_rows: int | None = None
+        # Incremented whenever search results may change, i.e. on writes and
+        # once the indexes have been rebuilt.
+        self.generation = 0
 
     def add_embeddings(self, records: list[EmbeddingRecord]) -> None:
         """
@@ -97,22 +183,167 @@ class LanceEmbeddingStore:
 
         logger.info(f"Adding {len(records)} embeddings")
         self.table.add([record.model_dump() for record in records])
-        self.table.create_fts_index(
-            "code", tokenizer_name="en_stem", replace=True
-        )
-        logger.info(
-            f"Successfully added {len(records)} embeddings with FTS index"
+        self.mark_fts_index_dirty()
+        logger.info(f"Successfully added {len(records)} embeddings")
+
+    def remove_embeddings(self, source_paths: list[str]) -> None:
+        """
+        Remove all chunk embeddings of the given files.
+        """
+        if not source_paths:
+            return
+        logger.info(f"Removing embeddings for {len(source_paths)} files")
+        self.table.delete(
+            f"source_path IN ({', '.join(_quote(path) for path in source_paths)})"
         )
+        self.mark_fts_index_dirty()
+        logger.info("Successfully removed embeddings")
 
-    def remove_embedding(self, file_path: str) -> None:
+    def replace_embeddings(
+        self, source_paths: list[str], records: list[EmbeddingRecord]
+    ) -> None:
+        """
+        Replace the chunk embeddings of `source_paths` with `records`.
+        """
+        self.remove_embeddings(source_paths)
+        self.add_embeddings(records)
+
+    def mark_fts_index_dirty(self) -> None:
+        """Schedules a (debounced) rebuild of the full-text index."""
+        with self._index_state_lock:
+            self.generation += 1
+            self._fts_dirty = True
+            if not self._index_maintenance_deferrals:
+                self._schedule_index_maintenance()
+
+    @contextlib.contextmanager
+    def defer_index_maintenance(self) -> Iterator[None]:
+        """
+        Holds back index rebuilds while a batch of writes is in progress; the
+        rebuild is scheduled once the outermost block exits.
+        """
+        with self._index_state_lock:
+            self._index_maintenance_deferrals += 1
+        try:
+            yield
+        finally:
+            with self._index_state_lock:
+                self._index_maintenance_deferrals -= 1
+                if not self._index_maintenance_deferrals and self._fts_dirty:
+                    self._schedule_index_maintenance()
+
+    def compact(self) -> None:
         """
-        Remove the embedding(s) matching a specific file_path.
-        This uses LanceDB's delete with a filter expression.
+        Merge small data files, purge deleted rows and remove old versions.
         """
-        logger.info(f"Removing embedding for file: {file_path}")
-        filter_expr = f"file_path == '{file_path}'"
-        self.table.delete(filter_expr)
-        logger.info("Successfully removed embedding")
+        logger.info("Compacting Lance embedding table")
+        self.table.optimize(cleanup_older_than=self.OLD_VERSION_RETENTION)
+        self._last_compaction_time = time.monotonic()
+        logger.info("Successfully compacted Lance embedding table")
+
+    def run_index_maintenance(self) -> None:
+        with self._maintenance_lock:
+            with self._index_state_lock:
+                if not self._fts_dirty:
+                    return
+                self._fts_dirty = False
+            if (
+                time.monotonic() - self._last_compaction_time
+                >= self.COMPACTION_INTERVAL_SECONDS
+            ):
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Error compacting Lance embedding table: {e}")
+            logger.info("Rebuilding full-text index")
+            try:
+                self.table.create_fts_index(
+                    "code", tokenizer_name="en_stem", replace=True
+                )
+            except Exception as e:
+                logger.error(f"Error rebuilding full-text index: {e}")
+            else:
+                logger.info("Successfully rebuilt full-text index")
+            try:
+                self._maybe_build_vector_index()
+            except Exception as e:
+                logger.error(f"Error building vector index: {e}")
+            with self._index_state_lock:
+                self.generation += 1
+
+    def build_vector_index(self) -> None:
+        """
+        (Re)train the IVF-PQ index over the embedding vectors.
+        """
+        row_count = self.table.count_rows()
+        if row_count < _PQ_TRAINING_ROWS:
+            logger.info(
+                f"Not building vector index over only {row_count} embeddings"
+            )
+            return
+        logger.info(f"Building vector index over {row_count} embeddings")
+        self._vector_index_building = True
+        try:
+            self.table.create_index(
+                metric="l2",
+                vector_column_name="embedding",
+                index_type="IVF_PQ",
+                # ~sqrt(n) partitions balances partition count and size.
+                num_partitions=max(1, round(math.sqrt(row_count))),
+                num_sub_vectors=_get_num_sub_vectors(self.embedding_dim),
+                replace=True,
+            )
+        finally:
+            self._vector_index_building = False
+        self._vector_index_trained_rows = row_count
+        logger.info("Successfully built vector index")
+
+    def get_vector_index_status(self) -> VectorIndexStatus:
+        total_rows = self.table.count_rows()
+        min_rows = _get_vector_index_min_rows()
+        if self._vector_index_building:
+            return VectorIndexStatus("building", total_rows, 0, min_rows)
+        stats = self._get_vector_index_stats()
+        if stats is None:
+            return VectorIndexStatus("flat", total_rows, 0, min_rows)
+        return VectorIndexStatus(
+            "ready", total_rows, stats.num_indexed_rows, min_rows
+        )
+
+    def _maybe_build_vector_index(self) -> None:
+        row_count = self.table.count_rows()
+        stats = self._get_vector_index_stats()
+        if stats is None:
+            if row_count >= _get_vector_index_min_rows():
+                self.build_vector_index()
+            return
+        # Compaction adds new chunks to the index, but its partitions and PQ
+        # codebooks stay those trained on the rows it was built with.
+        if self._vector_index_trained_rows is None:
+            # Built by a previous session. Compaction may have added rows
+            # since, so this only delays the retraining.
+            self._vector_index_trained_rows = stats.num_indexed_rows
+        retrain_growth = (
+            get_readonly_user_settings().vector_index.retrain_growth
+        )
+        if row_count >= self._vector_index_trained_rows * (1 + retrain_growth):
+            self.build_vector_index()
+
+    def _get_vector_index_stats(self) -> Any:
+        for index in self.table.list_indices():
+            if list(index.columns) == ["embedding"]:
+                return self.table.index_stats(index.name)
+        return None
+
+    def _schedule_index_maintenance(self) -> None:
+        # Must be called with `_index_state_lock` held.
+        if self._maintenance_timer is not None:
+            self._maintenance_timer.cancel()
+        self._maintenance_timer = threading.Timer(
+            self.FTS_REBUILD_DELAY_SECONDS, self.run_index_maintenance
+        )
+        self._maintenance_timer.daemon = True
+        self._maintenance_timer.start()
 
     def search_similar_embeddings(
         self,
@@ -129,7 +360,10 @@ class LanceEmbeddingStore:
         Args:
             query_embedding: List of floats representing the query vector
             top_k: Number of similar embeddings to return
-            nprobes: Number of clusters to search in IVF index (higher = more accurate but slower)
+
+        `VectorIndexSettings.nprobes` (IVF partitions to search, higher is more
+        accurate but slower) and `refine_factor` (candidates re-ranked with
+        exact distances) tune the search once the vector index exists.
 
         Returns:
             DataFrame containing the top_k most similar embeddings
@@ -138,17 +372,33 @@ class LanceEmbeddingStore:
 
         logger.info(f"Searching for {top_k} most similar embeddings using ANN")
 
-        results = (
-            self.table.search(
-                query_type="hybrid",
-                vector_column_name="embedding",
+        # Convert the query embedding to a numpy array to ensure proper vector format
+        query_vector = np.array(query_embedding, dtype=np.float32)
+        record_type = get_embedding_record_type(dim)
+        # Only used once the vector index has been built.
+        settings = get_readonly_user_settings().vector_index
+        try:
+            query = (
+                self.table.search(
+                    query_type="hybrid",
+                    vector_column_name="embedding",
+                )
+                .text(query_text)
+                .vector(query_vector)
+                .nprobes(settings.nprobes)
             )
-            .text(query_text)
-            # Convert the query embedding to a numpy array to ensure proper vector format
-            .vector(np.array(query_embedding, dtype=np.float32))
-            .limit(top_k)
-            .to_pydantic(get_embedding_record_type(dim))
-        )
+            if settings.refine_factor:
+                query = query.refine_factor(settings.refine_factor)
+            results = query.limit(top_k).to_pydantic(record_type)
+        except Exception as e:
+            # The full-text index has not been built yet or is being rebuilt.
+            logger.warning(f"Hybrid search failed, using vector search: {e}")
+            query = self.table.search(
+                query_vector, vector_column_name="embedding"
+            ).nprobes(settings.nprobes)
+            if settings.refine_factor:
+                query = query.refine_factor(settings.refine_factor)
+            results = query.limit(top_k).to_pydantic(record_type)
         logger.info(f"Found {len(results)} results")
         return results  # type: ignore
 
@@ -157,6 +407,10 @@ class LanceEmbeddingStore:
         Clears all data by removing the entire database directory.
         """
         logger.info("Clearing Lance embedding store")
+        with self._index_state_lock:
+            if self._maintenance_timer is not None:
+                self._maintenance_timer.cancel()
+            self._fts_dirty = False
         try:
             # Get database path and table name before closing connection
             db_path = self.db.uri
@@ -172,3 +426,22 @@ class LanceEmbeddingStore:
         except Exception as e:
             logger.error(f"Error clearing Lance embedding store: {e}")
             raise
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _get_vector_index_min_rows() -> int:
+    return max(
+        get_readonly_user_settings().vector_index.min_rows, _PQ_TRAINING_ROWS
+    )
+
+
+def _get_num_sub_vectors(dim: int) -> int:
+    # PQ sub-vectors must divide the dimension; ~16 dims per sub-vector keeps
+    # recall high while shrinking vectors 32x.
+    for dims_per_sub_vector in (16, 8, 32, 4, 2):
+        if dim % dims_per_sub_vector == 0 and dim >= dims_per_sub_vector:
+            return dim // dims_per_sub_vector
+    return 1
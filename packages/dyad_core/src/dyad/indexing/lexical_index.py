@@ -0,0 +1,493 @@
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from dyad.indexing.chunking import get_parser
+from dyad.indexing.file_extensions import SUPPORTED_TEXT_EXTENSIONS
+from dyad.indexing.file_update import FileStat, FileUpdate
+from dyad.logging.logging import logger
+from dyad.workspace_util import get_workspace_root_path
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Splits camelCase, PascalCase and acronyms, snake_case is split by `_`.
+_SUBWORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+# Text between quotes or backticks in a query is searched for verbatim.
+_QUOTED = re.compile(r"\"([^\"]{3,})\"|`([^`]{3,})`")
+_STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how in is it of on or that "
+    "the this to what where which with".split()
+)
+# Syntax node types ending with one of these, which have a "name" field, are
+# recorded as definitions, e.g. function_definition, class_declaration,
+# method_definition, struct_item and type_spec.
+_DEFINITION_SUFFIXES = (
+    "_definition",
+    "_declaration",
+    "_item",
+    "_spec",
+    "_specifier",
+)
+
+
+class SymbolDefinition(NamedTuple):
+    name: str
+    # Type of the syntax node, e.g. "function_definition".
+    kind: str
+    file_path: str
+    line: int
+
+
+class TextMatch(NamedTuple):
+    file_path: str
+    line: int
+    text: str
+
+
+class LexicalSearchResult(NamedTuple):
+    file_path: str
+    score: float
+
+
+class _IndexedFile(NamedTuple):
+    stat: FileStat | None
+    # Encoded by `_get_trigrams`, kept to remove the file from the postings.
+    trigrams: array
+    term_counts: Counter[str]
+    length: int
+    definitions: list[SymbolDefinition]
+
+
+class LexicalIndex:
+    """
+    An in-memory index of the workspace's text files, which works without an
+    embedding provider:
+
+    * a trigram index, which narrows `grep` down to the files containing all
+      trigrams of the pattern before they are read and searched;
+    * BM25 over the identifiers in each file (split into their camelCase and
+      snake_case words) and its path, which ranks files for `search`;
+    * a table of the symbols defined in each file, found with tree-sitter,
+      which `search` boosts and `find_definitions` looks up. References are
+      found through the identifiers. `symbol_search` uses both for the
+      `search_codebase` tool.
+
+    It's kept up to date by `process_updates`, with the same updates as the
+    semantic search store. Files whose stat data is unchanged are skipped.
+    The text of the files isn't kept in memory, `grep` reads the candidate
+    files from the workspace root (by default the current workspace's).
+    """
+
+    MAX_FILE_SIZE = 1024 * 1024
+    # BM25 parameters.
+    K1 = 1.2
+    B = 0.75
+    # Added to the score of a file defining a symbol named in the query, or
+    # containing a quoted part of the query.
+    DEFINITION_BOOST = 5.0
+    QUOTED_TEXT_BOOST = 5.0
+
+    def __init__(self, workspace_root: Path | None = None):
+        self._workspace_root = workspace_root
+        self._lock = threading.RLock()
+        self._files: dict[str, _IndexedFile] = {}
+        self._trigram_postings: dict[int, set[str]] = defaultdict(set)
+        self._term_postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self._definitions: dict[str, list[SymbolDefinition]] = defaultdict(list)
+        self._total_length = 0
+
+    def process_updates(self, updates: Iterable[FileUpdate]) -> None:
+        workspace_root = self._get_workspace_root()
+        for update in updates:
+            if update.type == "delete":
+                self.remove_file(update.file_path)
+                continue
+            indexed = self._files.get(update.file_path)
+            if (
+                indexed is not None
+                and update.stat is not None
+                and indexed.stat == update.stat
+            ):
+                continue
+            text = _read_text(workspace_root / update.file_path)
+            if text is None:
+                self.remove_file(update.file_path)
+            else:
+                self.add_file(update.file_path, text, stat=update.stat)
+
+    def _get_workspace_root(self) -> Path:
+        if self._workspace_root is not None:
+            return self._workspace_root
+        return Path(get_workspace_root_path())
+
+    def add_file(
+        self, file_path: str, text: str, *, stat: FileStat | None = None
+    ) -> None:
+        # Tokenized and parsed without holding the lock, so searches aren't
+        # blocked.
+        trigrams = array("I", _get_trigrams(text))
+        term_counts = Counter(_tokenize(text))
+        term_counts.update(set(_tokenize(file_path)))
+        indexed = _IndexedFile(
+            stat=stat,
+            trigrams=trigrams,
+            term_counts=term_counts,
+            length=sum(term_counts.values()),
+            definitions=_find_definitions(file_path, text),
+        )
+        with self._lock:
+            self.remove_file(file_path)
+            self._files[file_path] = indexed
+            for trigram in trigrams:
+                self._trigram_postings[trigram].add(file_path)
+            for term, count in term_counts.items():
+                self._term_postings[term][file_path] = count
+            for definition in indexed.definitions:
+                self._definitions[definition.name.lower()].append(definition)
+            self._total_length += indexed.length
+
+    def remove_file(self, file_path: str) -> None:
+        with self._lock:
+            indexed = self._files.pop(file_path, None)
+            if indexed is None:
+                return
+            for trigram in indexed.trigrams:
+                postings = self._trigram_postings[trigram]
+                postings.discard(file_path)
+                if not postings:
+                    del self._trigram_postings[trigram]
+            for term in indexed.term_counts:
+                term_postings = self._term_postings[term]
+                term_postings.pop(file_path, None)
+                if not term_postings:
+                    del self._term_postings[term]
+            for definition in indexed.definitions:
+                key = definition.name.lower()
+                self._definitions[key] = [
+                    d
+                    for d in self._definitions[key]
+                    if d.file_path != file_path
+                ]
+                if not self._definitions[key]:
+                    del self._definitions[key]
+            self._total_length -= indexed.length
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._trigram_postings.clear()
+            self._term_postings.clear()
+            self._definitions.clear()
+            self._total_length = 0
+
+    def search(self, query: str, limit: int = 10) -> list[LexicalSearchResult]:
+        """
+        Ranks files by the BM25 score of the query's words, boosting files
+        which define a symbol named in the query or contain quoted text.
+        """
+        terms = {term for term in _tokenize(query) if term not in _STOPWORDS}
+        scores: dict[str, float] = defaultdict(float)
+        # Files are read to find the quoted text, so not with the lock held.
+        for match in _QUOTED.finditer(query):
+            quoted_text = match.group(1) or match.group(2)
+            for file_path in self._find_files_containing(quoted_text):
+                scores[file_path] += self.QUOTED_TEXT_BOOST
+        with self._lock:
+            file_count = len(self._files)
+            if not file_count:
+                return []
+            average_length = max(self._total_length / file_count, 1)
+            for term in terms:
+                postings = self._term_postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1
+                    + (file_count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for file_path, count in postings.items():
+                    length_norm = (
+                        1
+                        - self.B
+                        + self.B
+                        * (self._files[file_path].length / average_length)
+                    )
+                    scores[file_path] += (
+                        idf
+                        * count
+                        * (self.K1 + 1)
+                        / (count + self.K1 * length_norm)
+                    )
+            for identifier in set(_IDENTIFIER.findall(query)):
+                for definition in self._definitions.get(identifier.lower(), []):
+                    scores[definition.file_path] += self.DEFINITION_BOOST
+        return [
+            LexicalSearchResult(file_path, score)
+            for file_path, score in heapq.nlargest(
+                limit, scores.items(), key=lambda item: item[1]
+            )
+        ]
+
+    def grep(
+        self,
+        pattern: str,
+        *,
+        regex: bool = False,
+        ignore_case: bool = False,
+        limit: int = 200,
+    ) -> list[TextMatch]:
+        """
+        Finds the lines matching a literal string or a regular expression.
+
+        Raises:
+            re.error: If `regex` is set and the pattern is invalid
+        """
+        compiled = re.compile(
+            pattern if regex else re.escape(pattern),
+            re.MULTILINE | (re.IGNORECASE if ignore_case else 0),
+        )
+        literals = _get_required_literals(pattern) if regex else [pattern]
+        with self._lock:
+            candidates = sorted(self._get_candidates(literals))
+        matches: list[TextMatch] = []
+        for file_path, text in self._read_files(candidates):
+            for match in compiled.finditer(text):
+                line_start = text.rfind("\n", 0, match.start()) + 1
+                line_end = text.find("\n", match.start())
+                matches.append(
+                    TextMatch(
+                        file_path=file_path,
+                        line=text.count("\n", 0, match.start()) + 1,
+                        text=text[
+                            line_start : None if line_end == -1 else line_end
+                        ],
+                    )
+                )
+                if len(matches) >= limit:
+                    return matches
+        return matches
+
+    def _find_files_containing(self, text: str) -> list[str]:
+        with self._lock:
+            candidates = self._get_candidates([text])
+        return [
+            file_path
+            for file_path, file_text in self._read_files(candidates)
+            if text in file_text
+        ]
+
+    def _read_files(
+        self, file_paths: Iterable[str]
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Yields the current text of the files, skipping those which can't be
+        read anymore. A file changed since it was indexed is searched as it
+        is now, but only found through the trigrams it had then.
+        """
+        workspace_root = self._get_workspace_root()
+        for file_path in file_paths:
+            try:
+                text = (workspace_root / file_path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            yield file_path, text
+
+    def _get_candidates(self, literals: list[str]) -> set[str]:
+        """
+        Returns the files containing all trigrams of the literals, which any
+        file containing the literals is among. Must be called with `_lock`
+        held.
+        """
+        trigrams = {
+            trigram
+            for literal in literals
+            for trigram in _get_trigrams(literal)
+        }
+        if not trigrams:
+            return set(self._files)
+        postings = sorted(
+            (
+                self._trigram_postings.get(trigram, set())
+                for trigram in trigrams
+            ),
+            key=len,
+        )
+        return set(postings[0]).intersection(*postings[1:])
+
+    def find_definitions(self, name: str) -> list[SymbolDefinition]:
+        with self._lock:
+            return [
+                definition
+                for definition in self._definitions.get(name.lower(), [])
+                if definition.name == name
+            ]
+
+    def find_references(self, name: str, limit: int = 200) -> list[TextMatch]:
+        """Finds the lines where the identifier occurs, definitions included."""
+        if not _IDENTIFIER.fullmatch(name):
+            return []
+        return self.grep(rf"\b{name}\b", regex=True, limit=limit)
+
+
+def _get_trigrams(text: str) -> set[int]:
+    """
+    Returns the trigrams of the lowercased text's UTF-8 bytes, each encoded as
+    an int, which take much less memory than strings. Text contained in
+    another text has a subset of its trigrams.
+    """
+    data = text.lower().encode("utf-8")
+    return {
+        (first << 16) | (second << 8) | third
+        for first, second, third in zip(data, data[1:], data[2:], strict=False)
+    }
+
+
+def _tokenize(text: str) -> list[str]:
+    """
+    Returns the lowercased identifiers in the text, each followed by its
+    words if it has more than one, e.g. "getUserName" gives "getusername",
+    "get", "user" and "name".
+    """
+    terms = []
+    for identifier in _IDENTIFIER.findall(text):
+        terms.append(identifier.lower())
+        words = _SUBWORD.findall(identifier)
+        if len(words) > 1:
+            terms.extend(word.lower() for word in words)
+    return terms
+
+
+def _get_required_literals(pattern: str) -> list[str]:
+    """
+    Returns strings which any match of the regular expression contains, so
+    their trigrams can narrow down the files to search. Only literal text
+    outside of groups is used, and none if the pattern has alternatives.
+    """
+    if "|" in pattern:
+        return []
+    literals = []
+    current = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        top_level = depth == 0
+        if char.isalnum() or char in " _-:/'\"<>=,;#@!%&~`":
+            current += char
+            i += 1
+            continue
+        if char in "*?{":
+            # The preceding character is optional.
+            current = current[:-1]
+            if char == "{":
+                end = pattern.find("}", i)
+                i = len(pattern) if end == -1 else end
+        elif char == "\\":
+            # Skip the escaped character.
+            i += 1
+        elif char == "[":
+            # Skip the character class, a `]` right after `[` or `[^` is
+            # part of it.
+            start = i + (3 if pattern[i + 1 : i + 2] == "^" else 2)
+            end = pattern.find("]", start)
+            i = len(pattern) if end == -1 else end
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if top_level:
+            literals.append(current)
+        current = ""
+        i += 1
+    literals.append(current)
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+def _find_definitions(file_path: str, text: str) -> list[SymbolDefinition]:
+    parser = get_parser(file_path)
+    if parser is None:
+        return []
+    try:
+        tree = parser.parse(text.encode("utf-8"))
+    except Exception as e:
+        logger().warning(f"Could not parse {file_path}: {e}")
+        return []
+    definitions = []
+    stack = [tree.root_node]
+    while stack:
+        node = stack.pop()
+        if node.type.endswith(_DEFINITION_SUFFIXES):
+            name = node.child_by_field_name("name")
+            if name is not None and name.child_count == 0:
+                definitions.append(
+                    SymbolDefinition(
+                        name=name.text.decode("utf-8", errors="replace"),
+                        kind=node.type,
+                        file_path=file_path,
+                        line=name.start_point[0] + 1,
+                    )
+                )
+        stack.extend(reversed(node.children))
+    return definitions
+
+
+def _read_text(path: Path) -> str | None:
+    try:
+        if path.suffix.lower() not in SUPPORTED_TEXT_EXTENSIONS:
+            return None
+        if path.stat().st_size > LexicalIndex.MAX_FILE_SIZE:
+            return None
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+_lexical_index = LexicalIndex()
+
+
+def get_lexical_index() -> LexicalIndex:
+    return _lexical_index
+
+
+def lexical_search(*, query: str, limit: int = 10) -> list[str]:
+    return [
+        result.file_path
+        for result in get_lexical_index().search(query, limit=limit)
+    ]
+
+
+def symbol_search(*, query: str, limit: int = 10) -> list[str]:
+    """
+    Returns the files defining the symbols named in the query, followed by
+    the files referencing them. Words which aren't defined anywhere are
+    ignored, so plain words in the query don't match every file.
+    """
+    index = get_lexical_index()
+    definitions: list[str] = []
+    references: list[str] = []
+    for identifier in dict.fromkeys(_IDENTIFIER.findall(query)):
+        found = index.find_definitions(identifier)
+        if not found:
+            continue
+        definitions.extend(definition.file_path for definition in found)
+        references.extend(
+            match.file_path for match in index.find_references(identifier)
+        )
+    return list(dict.fromkeys(definitions + references))[:limit]
+
+
+def fuse_rankings(rankings: list[list[str]], k: int = 60) -> list[str]:
+    """
+    Merges ranked lists of file paths with reciprocal rank fusion, so files
+    ranked highly by any of them come first.
+    """
+    scores: dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, file_path in enumerate(dict.fromkeys(ranking)):
+            scores[file_path] += 1 / (k + rank + 1)
+    return sorted(scores, key=lambda file_path: -scores[file_path])
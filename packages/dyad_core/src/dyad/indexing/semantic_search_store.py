@@ -1,16 +1,25 @@
 import hashlib
 import logging
-from collections.abc import Iterable
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
 from datetime import datetime
 from pathlib import Path
-from typing import NamedTuple
+from typing import Any, NamedTuple
 
+from dyad.indexing.chunking import CodeChunk, chunk_file
+from dyad.indexing.embedding_cache import hash_chunk, open_embedding_cache
 from dyad.indexing.embeddings.embedding_provider import (
     get_embedding_models,
     get_embedding_provider,
 )
+from dyad.indexing.embeddings.local_embedding_provider import (
+    LOCAL_PROVIDER_ID,
+    local_embedding_provider,
+)
 from dyad.indexing.file_extensions import SUPPORTED_TEXT_EXTENSIONS
-from dyad.indexing.file_update import FileUpdate
+from dyad.indexing.file_update import FileStat, FileUpdate
 from dyad.indexing.lance_store import (
     LanceEmbeddingStore,
     get_embedding_record_type,
@@ -19,10 +28,12 @@ from dyad.language_model.language_model_clients import is_provider_setup
 from dyad.logging.logging import logger
 from dyad.settings.user_settings import get_user_settings
 from dyad.storage.models.embedding_metadata import (
+    EmbeddingMetadataUpdate,
+    bulk_upsert_embedding_metadata,
+    delete_embedding_metadata_for_model,
     drop_and_recreate_embedding_metadata_table,
-    get_embedding_metadata,
-    mark_file_removed,
-    upsert_embedding_metadata,
+    get_embedding_metadata_for_files,
+    mark_files_removed,
 )
 from dyad.workspace_util import (
     get_workspace_root_path,
@@ -30,51 +41,35 @@ from dyad.workspace_util import (
 )
 
 
-class TextChunk(NamedTuple):
-    content: str
-    start_pos: int
-    end_pos: int
-
-
-class SimpleSplitterFile:
-    def __init__(self, chunk_size: int = 1024, overlap_size: int = 200):
-        self.chunk_size = chunk_size
-        self.overlap_size = overlap_size
-
-    def split_text(self, text: str) -> list[TextChunk]:
-        """
-        Split text into chunks with overlap.
-        Returns a list of TextChunk objects containing the content and position information.
-        """
-        if not text:
-            return []
-
-        chunks = []
-        position = 0
-        text_length = len(text)
+class SemanticSearchResult(NamedTuple):
+    file_path: str
+    # 1-based, inclusive line range of the chunk in the file.
+    start_line: int
+    end_line: int
+    code: str
 
-        while position < text_length:
-            # Calculate the end position for this chunk
-            chunk_end = min(position + self.chunk_size, text_length)
 
-            # Extract the chunk
-            chunk_content = text[position:chunk_end]
+class _LRUCache:
+    """A thread-safe mapping which keeps its most recently used entries."""
 
-            # Create a TextChunk with position information
-            chunks.append(
-                TextChunk(
-                    content=chunk_content, start_pos=position, end_pos=chunk_end
-                )
-            )
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
 
-            # Move position for next chunk, accounting for overlap
-            position = (
-                chunk_end - self.overlap_size
-                if chunk_end < text_length
-                else text_length
-            )
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
 
-        return chunks
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
 
 
 class SemanticSearchStore:
@@ -82,8 +77,16 @@ class SemanticSearchStore:
 
     # Configuration for different file types
     MAX_FILE_SIZE = 1024 * 1024 * 10  # 10MB limit for files
-    CHUNK_SIZE = 2000  # Size of each chunk in characters
-    OVERLAP_SIZE = 200  # Number of characters to overlap between chunks
+    # A file modified this recently may be modified again without its mtime
+    # changing, so its stat data isn't trusted to skip reading it later.
+    RACY_STAT_SECONDS = 2.0
+    # Large enough for the provider to embed many requests concurrently.
+    EMBEDDING_BATCH_SIZE = 2000
+    # Repeated queries (e.g. when a response is regenerated) are answered
+    # without embedding the query again, or searching again while the store
+    # is unchanged.
+    QUERY_EMBEDDING_CACHE_SIZE = 256
+    SEARCH_RESULT_CACHE_SIZE = 128
 
     def __new__(cls):
         if cls._instance is None:
@@ -105,6 +108,10 @@ class SemanticSearchStore:
                 embedding_model_config = get_embedding_models("google-genai")[0]
             elif is_provider_setup("openai"):
                 embedding_model_config = get_embedding_models("openai")[0]
+            elif local_embedding_provider.is_available():
+                embedding_model_config = get_embedding_models(
+                    LOCAL_PROVIDER_ID
+                )[0]
             else:
                 raise ValueError(
                     "No embedding model configured, please set one in settings"
@@ -123,17 +130,27 @@ class SemanticSearchStore:
             db_path=get_workspace_storage_path("embeddings_lance"),
             embedding_model_config=self.embedding_model_config,
         )
+        if self.store.created_table:
+            # Nothing has been embedded into the new table yet.
+            delete_embedding_metadata_for_model(self.embedding_model_config)
+        self.embedding_cache = open_embedding_cache(self.embedding_model_config)
+        self._query_embedding_cache = _LRUCache(self.QUERY_EMBEDDING_CACHE_SIZE)
+        self._search_result_cache = _LRUCache(self.SEARCH_RESULT_CACHE_SIZE)
         self.workspace_root = Path(get_workspace_root_path())
         self._initialized = True
 
-    def _read_file_content(self, file_path: str) -> list[TextChunk] | None:
+    def _read_file_content(self, file_path: str) -> list[CodeChunk] | None:
         """
         Read and process file content with proper error handling and size checks.
-        Returns a list of TextChunks or None if the file cannot be processed.
+        Returns a list of CodeChunks or None if the file cannot be processed.
         """
         full_path = self.workspace_root / file_path
 
         try:
+            if full_path.suffix.lower() not in SUPPORTED_TEXT_EXTENSIONS:
+                self.logger.warning(f"Unsupported file type: {file_path}")
+                return None
+
             if not full_path.exists():
                 self.logger.warning(f"File not found: {file_path}")
                 return None
@@ -142,10 +159,6 @@ class SemanticSearchStore:
                 self.logger.warning(f"Not a regular file: {file_path}")
                 return None
 
-            if full_path.suffix.lower() not in SUPPORTED_TEXT_EXTENSIONS:
-                self.logger.warning(f"Unsupported file type: {file_path}")
-                return None
-
             if full_path.stat().st_size > self.MAX_FILE_SIZE:
                 self.logger.warning(f"File too large (>10MB): {file_path}")
                 return None
@@ -153,11 +166,7 @@ class SemanticSearchStore:
             with full_path.open("r", encoding="utf-8") as f:
                 content = f.read()
 
-            # Create a splitter and split the content into chunks
-            splitter = SimpleSplitterFile(
-                chunk_size=self.CHUNK_SIZE, overlap_size=self.OVERLAP_SIZE
-            )
-            return splitter.split_text(content)
+            return chunk_file(file_path, content)
 
         except UnicodeDecodeError:
             self.logger.warning(f"Unable to decode file as UTF-8: {file_path}")
@@ -166,12 +175,38 @@ class SemanticSearchStore:
             self.logger.error(f"Error reading file {file_path}: {e!s}")
             return None
 
-    def _compute_file_hash(self, chunks: list[TextChunk]) -> str:
+    def _compute_file_hash(self, chunks: list[CodeChunk]) -> str:
         """Compute a consistent hash of the file content from all chunks."""
         combined_content = "".join(chunk.content for chunk in chunks)
         return hashlib.sha256(combined_content.encode("utf-8")).hexdigest()
 
+    def _get_metadata_update(
+        self, update: FileUpdate, file_hash: str
+    ) -> EmbeddingMetadataUpdate:
+        stat = update.stat
+        if (
+            stat is not None
+            and time.time() - stat.mtime < self.RACY_STAT_SECONDS
+        ):
+            stat = None
+        return EmbeddingMetadataUpdate(
+            file_path=update.file_path,
+            file_hash=file_hash,
+            vector_store_id=update.file_path,
+            file_last_modified=datetime.fromtimestamp(
+                update.modified_timestamp
+            ).astimezone(),
+            file_mtime_ns=stat.mtime_ns if stat else None,
+            file_size=stat.size if stat else None,
+            file_inode=stat.inode if stat else None,
+        )
+
     def process_updates(self, updates: list[FileUpdate]):
+        # Rebuild the full-text index once for the whole batch of updates.
+        with self.store.defer_index_maintenance():
+            self._process_updates(updates)
+
+    def _process_updates(self, updates: list[FileUpdate]):
         self.logger.info(
             f"Processing {len(updates)} file updates for embedding generation"
         )
@@ -183,11 +218,37 @@ class SemanticSearchStore:
             update for update in updates if update.type == "delete"
         ]
 
+        metadata_by_path = get_embedding_metadata_for_files(
+            [update.file_path for update in updates_to_process],
+            branch=self.branch,
+            embedding_model_config=self.embedding_model_config,
+        )
+        emptied_files: list[EmbeddingMetadataUpdate] = []
+        # Files whose content is unchanged but whose stat data changed.
+        restatted_files: list[EmbeddingMetadataUpdate] = []
+
         # Collect all chunks and metadata up front
         all_chunks = []
         chunk_metadata = []  # Store metadata for each chunk
 
+        skipped_count = 0
         for update in updates_to_process:
+            metadata = metadata_by_path.get(update.file_path)
+            if (
+                metadata
+                and metadata.exists_in_branch
+                and update.stat is not None
+                and FileStat(
+                    metadata.file_mtime_ns,
+                    metadata.file_size,
+                    metadata.file_inode,
+                )
+                == update.stat
+            ):
+                # Unchanged since it was last hashed, so it isn't read at all.
+                skipped_count += 1
+                continue
+
             chunks = self._read_file_content(update.file_path)
             if chunks is None:
                 continue
@@ -197,16 +258,27 @@ class SemanticSearchStore:
                 f"Processing file: '{update.file_path}' (hash: {content_hash[:8]}...)"
             )
 
-            metadata = get_embedding_metadata(
-                file_path=update.file_path,
-                branch=self.branch,
-                embedding_model_config=self.embedding_model_config,
-            )
-
-            if metadata and metadata.file_hash == content_hash:
+            # The chunks of removed files are deleted, so a restored file is
+            # embedded again even if its content is unchanged.
+            if (
+                metadata
+                and metadata.exists_in_branch
+                and metadata.file_hash == content_hash
+            ):
                 self.logger.debug(
                     f"Content unchanged for {update.file_path}, skipping embedding"
                 )
+                if update.stat is not None:
+                    restatted_files.append(
+                        self._get_metadata_update(update, content_hash)
+                    )
+                continue
+
+            if not chunks:
+                # The file was emptied, only its previous chunks need removing.
+                emptied_files.append(
+                    self._get_metadata_update(update, content_hash)
+                )
                 continue
 
             # Collect chunks and their metadata
@@ -216,26 +288,38 @@ class SemanticSearchStore:
                 chunk_metadata.append(
                     {
                         "chunk_id": chunk_id,
+                        "chunk_index": i,
                         "file_path": update.file_path,
                         "file_hash": content_hash,
-                        "modified_timestamp": update.modified_timestamp,
+                        "update": update,
                         "code": chunk.content,
+                        "start_line": chunk.start_line,
+                        "end_line": chunk.end_line,
                     }
                 )
+        if skipped_count:
+            self.logger.info(
+                f"Skipped {skipped_count} files with unchanged stat data"
+            )
+        bulk_upsert_embedding_metadata(
+            restatted_files,
+            branch=self.branch,
+            embedding_model_config=self.embedding_model_config,
+        )
 
         # Process all chunks in batches
-        if not all_chunks:
-            return
-
-        batch_size = 500  # Adjust based on your needs and API limits
+        # Files whose previous chunks have already been replaced in this run.
+        replaced_files: set[str] = set()
+        # Files with a chunk which could not be embedded are left without
+        # up-to-date metadata, so they're embedded again on the next run.
+        failed_files: set[str] = set()
+        batch_size = self.EMBEDDING_BATCH_SIZE
         for i in range(0, len(all_chunks), batch_size):
             batch_chunks = all_chunks[i : i + batch_size]
             batch_metadata = chunk_metadata[i : i + batch_size]
 
             # Generate embeddings for the batch
-            chunk_embeddings = self.embedding_provider.generate_embeddings(
-                batch_chunks
-            )
+            chunk_embeddings = self._embed_chunks(batch_chunks)
 
             # Create EmbeddingRecords for the batch
             records = [
@@ -243,50 +327,129 @@ class SemanticSearchStore:
                     self.embedding_model_config.embedding_dim
                 )(
                     file_path=meta["chunk_id"],
+                    source_path=meta["file_path"],
+                    chunk_index=meta["chunk_index"],
                     file_hash=meta["file_hash"],
                     embedding=embedding,
                     code=meta["code"],
+                    start_line=meta["start_line"],
+                    end_line=meta["end_line"],
                 )
                 for embedding, meta in zip(
-                    chunk_embeddings, batch_metadata, strict=False
+                    chunk_embeddings, batch_metadata, strict=True
                 )
+                if embedding
             ]
-
-            # Store embeddings in batch
-            self.store.add_embeddings(records)
+            batch_failed_files = {
+                meta["file_path"]
+                for embedding, meta in zip(
+                    chunk_embeddings, batch_metadata, strict=True
+                )
+                if not embedding
+            }
+            if batch_failed_files:
+                self.logger.warning(
+                    f"Could not embed {len(batch_failed_files)} files, will retry later"
+                )
+                failed_files.update(batch_failed_files)
+
+            # Store embeddings in batch, replacing the previous chunks of each
+            # file. A file's chunks may span batches, so only the batch with
+            # its first chunk removes them.
+            new_files = [
+                file_path
+                for file_path in dict.fromkeys(
+                    meta["file_path"] for meta in batch_metadata
+                )
+                if file_path not in replaced_files
+            ]
+            replaced_files.update(new_files)
+            self.store.replace_embeddings(new_files, records)
             self.logger.info(f"Stored {len(records)} embeddings in batch")
 
-            # Update metadata for each unique file in this batch
-            processed_files = set()
-            for meta in batch_metadata:
-                if meta["file_path"] not in processed_files:
-                    upsert_embedding_metadata(
-                        file_path=meta["file_path"],
-                        branch=self.branch,
-                        embedding_model_config=self.embedding_model_config,
-                        file_hash=meta["file_hash"],
-                        vector_store_id=meta["file_path"],
-                        file_last_modified=datetime.fromtimestamp(
-                            meta["modified_timestamp"]
-                        ).astimezone(),
-                    )
-                    processed_files.add(meta["file_path"])
-                    self.logger.debug(
-                        f"Updated metadata for {meta['file_path']}"
-                    )
-        for update in deletes_to_process:
-            self.store.remove_embedding(file_path=update.file_path)
-            mark_file_removed(file_path=update.file_path, branch=self.branch)
-            self.logger.debug(f"Removed embedding for {update.file_path}")
+        # Written once all batches are stored, as a chunk of a file in a
+        # later batch may fail.
+        bulk_upsert_embedding_metadata(
+            [
+                self._get_metadata_update(meta["update"], meta["file_hash"])
+                for meta in chunk_metadata
+                if meta["chunk_index"] == 0
+                and meta["file_path"] not in failed_files
+            ],
+            branch=self.branch,
+            embedding_model_config=self.embedding_model_config,
+        )
+        self.store.remove_embeddings(
+            [update.file_path for update in emptied_files]
+            + [update.file_path for update in deletes_to_process]
+        )
+        bulk_upsert_embedding_metadata(
+            emptied_files,
+            branch=self.branch,
+            embedding_model_config=self.embedding_model_config,
+        )
+        mark_files_removed(
+            [update.file_path for update in deletes_to_process],
+            branch=self.branch,
+        )
+        self.logger.debug(
+            f"Removed embeddings for {len(deletes_to_process)} files"
+        )
+
+    def _embed_chunks(self, chunks: list[str]) -> list[list[float]]:
+        """
+        Embeds the chunks, only calling the embedding provider for chunks
+        which aren't in the embedding cache (each distinct chunk once).
+        """
+        if self.embedding_cache is None:
+            return self.embedding_provider.generate_embeddings(chunks)
+        hashes = [hash_chunk(chunk) for chunk in chunks]
+        embeddings = self.embedding_cache.get_many(hashes)
+        misses = {
+            content_hash: chunk
+            for content_hash, chunk in zip(hashes, chunks, strict=True)
+            if content_hash not in embeddings
+        }
+        self.logger.info(
+            f"Embedding cache hit for {len(chunks) - len(misses)}/{len(chunks)} chunks"
+        )
+        if misses:
+            new_embeddings = dict(
+                zip(
+                    misses,
+                    self.embedding_provider.generate_embeddings(
+                        list(misses.values())
+                    ),
+                    strict=True,
+                )
+            )
+            self.embedding_cache.put_many(new_embeddings)
+            embeddings.update(new_embeddings)
+        return [embeddings[content_hash] for content_hash in hashes]
 
     def search(self, query_text: str, top_k: int = 10) -> Iterable[str]:
+        return set(
+            result.file_path
+            for result in self.search_chunks(query_text, top_k=top_k)
+        )
+
+    def search_chunks(
+        self, query_text: str, top_k: int = 10
+    ) -> list[SemanticSearchResult]:
+        """Returns the chunks most similar to the query, best match first."""
+        query_text = " ".join(query_text.split())
+        # Read before searching, so results of a search which overlaps with a
+        # write are not cached as up-to-date.
+        result_key = (query_text, top_k, self.store.generation)
+        cached_results = self._search_result_cache.get(result_key)
+        if cached_results is not None:
+            return list(cached_results)
+
         self.logger.info(
             f"Performing semantic search for query: '{query_text}' using: %s",
             self.embedding_provider,
         )
-        query_embedding = self.embedding_provider.generate_single_embedding(
-            query_text
-        )
+        query_embedding = self._get_query_embedding(query_text)
 
         # LanceDB seems to have a bug where + and - trigger a syntax error
         sanitized_query_text = (
@@ -299,8 +462,35 @@ class SemanticSearchStore:
             dim=self.embedding_model_config.embedding_dim,
         )
 
-        # Remove chunk identifiers from paths (everything after #)
-        return set(r.file_path.split("#")[0] for r in results)
+        search_results = tuple(
+            SemanticSearchResult(
+                file_path=r.source_path,
+                start_line=r.start_line,
+                end_line=r.end_line,
+                code=r.code,
+            )
+            for r in results
+        )
+        self._search_result_cache.put(result_key, search_results)
+        return list(search_results)
+
+    def _get_query_embedding(self, query_text: str) -> list[float]:
+        config = self.embedding_model_config
+        key = (
+            config.provider_id,
+            config.embedding_model_name,
+            config.embedding_dim,
+            config.version,
+            query_text,
+        )
+        embedding = self._query_embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embedding_provider.generate_single_embedding(
+                query_text
+            )
+            if embedding:
+                self._query_embedding_cache.put(key, embedding)
+        return embedding
 
     def clear(self):
         """
@@ -331,6 +521,12 @@ def semantic_search(*, query: str, limit: int = 10) -> Iterable[str]:
     return SemanticSearchStore().search(query_text=query, top_k=limit)
 
 
+def semantic_search_chunks(
+    *, query: str, limit: int = 10
+) -> list[SemanticSearchResult]:
+    return SemanticSearchStore().search_chunks(query_text=query, top_k=limit)
+
+
 def is_semantic_search_enabled() -> bool:
     try:
         SemanticSearchStore()
@@ -19,7 +19,7 @@ from dyad.public.chat_message import (
     LanguageModelFinishReason,
     TextChunk,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 
 
 def create_chat_handler(
@@ -235,7 +235,7 @@ def get_language_model_provider(id: str) -> LanguageModelProvider:
 def get_language_model_providers() -> list[LanguageModelProvider]:
     return (
         list(_providers.values())
-        + get_user_settings().custom_language_model_providers
+        + get_readonly_user_settings().custom_language_model_providers
     )
 
 
@@ -265,7 +265,7 @@ def get_provider_api_key(provider_id: str) -> str:
         # This is hardcoded because openai API requires an API key
         # but ollama doesn't need it.
         return "ollama"
-    user_settings = get_user_settings()
+    user_settings = get_readonly_user_settings()
     api_key = user_settings.provider_id_to_api_key.get(provider_id)
     if api_key:
         return api_key
@@ -297,7 +297,7 @@ def is_model_supported_by_proxy(model_id: str) -> bool:
 
 
 def should_use_llm_proxy() -> bool:
-    return not get_user_settings().disable_llm_proxy and bool(
+    return not get_readonly_user_settings().disable_llm_proxy and bool(
         get_provider_api_key("dyad")
     )
 
@@ -499,34 +499,34 @@ def get_language_model_client(model_id: str) -> LanguageModelClient:
 def get_language_models() -> list[LanguageModel]:
     return (
         list(_language_models.values())
-        + get_user_settings().custom_language_models
+        + get_readonly_user_settings().custom_language_models
     )
 
 
 def get_core_language_model() -> LanguageModel:
     return get_language_model(
-        id=get_user_settings().core_language_model_id,
+        id=get_readonly_user_settings().core_language_model_id,
         default=DEFAULT_CORE_LANGUAGE_MODEL,
     )
 
 
 def get_editor_language_model() -> LanguageModel:
     return get_language_model(
-        id=get_user_settings().editor_language_model_id,
+        id=get_readonly_user_settings().editor_language_model_id,
         default=DEFAULT_EDITOR_LANGUAGE_MODEL,
     )
 
 
 def get_router_language_model() -> LanguageModel:
     return get_language_model(
-        id=get_user_settings().language_model_type_to_id["router"],
+        id=get_readonly_user_settings().language_model_type_to_id["router"],
         default=DEFAULT_ROUTER_LANGUAGE_MODEL,
     )
 
 
 def get_reasoner_language_model() -> LanguageModel:
     return get_language_model(
-        id=get_user_settings().language_model_type_to_id["reasoner"],
+        id=get_readonly_user_settings().language_model_type_to_id["reasoner"],
         default=DEFAULT_REASONER_LANGUAGE_MODEL,
     )
 
@@ -24,7 +24,7 @@ from dyad.public.chat_message import (
     LanguageModelChunk,
     TextChunk,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 
 
 class AnthropicLanguageModelHandler:
@@ -56,7 +56,7 @@ class AnthropicLanguageModelHandler:
         if (
             len(history) >= 2
             and history[-2]["role"] == "user"
-            and not get_user_settings().disable_anthropic_cache
+            and not get_readonly_user_settings().disable_anthropic_cache
         ):
             history[-2]["content"][0]["cache_control"] = {"type": "ephemeral"}
 
@@ -70,7 +70,7 @@ class AnthropicLanguageModelHandler:
                         "text": request.input.text,
                         "type": "text",
                         "cache_control": None
-                        if get_user_settings().disable_anthropic_cache
+                        if get_readonly_user_settings().disable_anthropic_cache
                         else {"type": "ephemeral"},
                     }
                 ],
@@ -86,7 +86,7 @@ class AnthropicLanguageModelHandler:
                         "type": "text",
                         "cache_control": (
                             None
-                            if get_user_settings().disable_anthropic_cache
+                            if get_readonly_user_settings().disable_anthropic_cache
                             else {"type": "ephemeral"}
                         ),
                     }
@@ -2,14 +2,17 @@ import uuid
 from typing import Any
 
 from dyad.logging.logging import logger
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import (
+    get_readonly_user_settings,
+    get_user_settings,
+)
 from dyad.utils.app_mode import is_viewer_mode
 
 
 class Analytics:
     def __init__(self):
         self._posthog = None
-        if get_user_settings().analytics.enabled:
+        if get_readonly_user_settings().analytics.enabled:
             logger().info("Analytics enabled")
         else:
             logger().info("Analytics disabled")
@@ -28,7 +31,7 @@ class Analytics:
         return self._posthog
 
     def _get_distinct_id(self) -> str:
-        settings_uuid = get_user_settings().analytics.uuid
+        settings_uuid = get_readonly_user_settings().analytics.uuid
         if settings_uuid is not None:
             return settings_uuid
         else:
@@ -44,7 +47,7 @@ class Analytics:
         if is_viewer_mode():
             # Do not record analytics events in viewer mode, we use umami.
             return
-        if get_user_settings().analytics.enabled:
+        if get_readonly_user_settings().analytics.enabled:
             logger().info(
                 "📊 [analytics] record %s | properties=%s", event, properties
             )
@@ -70,8 +73,8 @@ class Analytics:
         self._record_event(
             "chat_message_send",
             {
-                "editor_language_model_id": get_user_settings().editor_language_model_id,
-                "core_language_model_id": get_user_settings().core_language_model_id,
+                "editor_language_model_id": get_readonly_user_settings().editor_language_model_id,
+                "core_language_model_id": get_readonly_user_settings().core_language_model_id,
             },
         )
 
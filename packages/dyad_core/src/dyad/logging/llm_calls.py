@@ -1,32 +1,85 @@
+import atexit
+import hashlib
+import itertools
+import json
 import logging
+import queue
+import threading
+import zlib
+from collections.abc import Callable
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel
-from sqlalchemy import delete
-from sqlmodel import Field, Session, SQLModel, select
+from pydantic import BaseModel, TypeAdapter, model_validator
+from sqlalchemy import delete, func, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Field, Session, SQLModel, col, select
 
 from dyad.chat import LanguageModelRequest
 from dyad.logging.logs_sql_engine import engine
 from dyad.public.chat_message import CompletionMetadataChunk, LanguageModelChunk
 
+# Marks request/response JSON which references payloads stored in
+# `LanguageModelCallBlob` instead of embedding them. Rows written before
+# blob storage existed hold the full JSON and are still readable.
+_BLOB_REFS_FORMAT = "blob-refs-v1"
+
 
 class LanguageModelResponse(BaseModel):
-    chunks: list[LanguageModelChunk]
+    """
+    A streamed response, accumulated as its full text plus metadata rather
+    than the individual chunks.
+    """
+
+    text: str = ""
+    errors: list[str] = []
+    completion_metadata: CompletionMetadataChunk | None = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_chunks(cls, data: Any) -> Any:
+        # Responses were previously recorded as a list of chunks.
+        if isinstance(data, dict) and "chunks" in data:
+            chunks = TypeAdapter(list[LanguageModelChunk]).validate_python(
+                data["chunks"]
+            )
+            return {
+                "text": "".join(c.text for c in chunks if c.type == "text"),
+                "errors": [c.message for c in chunks if c.type == "error"],
+                "completion_metadata": next(
+                    (
+                        c
+                        for c in reversed(chunks)
+                        if c.type == "completion-metadata"
+                    ),
+                    None,
+                ),
+            }
+        return data
 
     def get_completion_metadata(self) -> CompletionMetadataChunk | None:
-        for chunk in reversed(self.chunks):
-            if chunk.type == "completion-metadata":
-                return chunk
+        return self.completion_metadata
 
 
 class LanguageModelCallsTable(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
-    timestamp: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    timestamp: datetime = Field(
+        default_factory=datetime.utcnow, nullable=False, index=True
+    )
     request_json: str
     response_json: str
 
 
+class LanguageModelCallBlob(SQLModel, table=True):
+    """
+    Content-addressed, zlib-compressed payload (a history message, system
+    prompt, input or response) shared by every call that references it.
+    """
+
+    hash: str = Field(primary_key=True)
+    data: bytes
+
+
 class LanguageModelCallRecord(BaseModel):
     id: int
     timestamp: datetime
@@ -34,40 +87,97 @@ class LanguageModelCallRecord(BaseModel):
     response: LanguageModelResponse
 
 
+class LanguageModelCallSummary(BaseModel):
+    """
+    The fields needed to list LLM calls, read without loading any payloads.
+    """
+
+    id: int
+    timestamp: datetime
+    language_model_id: str
+    message_count: int
+    completion_metadata: CompletionMetadataChunk | None = None
+
+
+# A pending database write, run by the writer thread inside a session.
+_WriteOp = Callable[[Session], None]
+
+
+def _blob_hash(payload: str) -> str:
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 class LLMCallLogger:
     """
     Singleton class for logging LLM requests and responses to a database.
+
+    Payloads are stored once in `LanguageModelCallBlob`, keyed by their
+    SHA-256, so history messages and system prompts repeated across calls
+    are not duplicated. Call rows only hold small JSON documents with blob
+    references and the metadata needed for listing.
     """
 
     _instance: Optional["LLMCallLogger"] = None
+    # Reads wait at most this long for pending writes, e.g. so the calls
+    # list shows a call which just finished, but never block the UI for
+    # long if the database is busy. Whatever is committed by then is read.
+    READ_FLUSH_TIMEOUT_SECONDS = 0.5
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            instance = super().__new__(cls)
+            instance._init_writer()
+            cls._instance = instance
         return cls._instance
 
+    def _init_writer(self):
+        SQLModel.metadata.create_all(
+            engine,
+            tables=[
+                LanguageModelCallsTable.__table__,  # type: ignore
+                LanguageModelCallBlob.__table__,  # type: ignore
+            ],
+        )
+        # Requests are identified by a handle until the writer thread has
+        # inserted them, so recording a request never waits for the database.
+        # The row IDs are assigned by SQLite, as other processes may write to
+        # the same database.
+        self._handles = itertools.count(1)
+        self._handles_lock = threading.Lock()
+        # Maps the handles of written requests to their row IDs. Only used by
+        # the writer thread.
+        self._call_ids: dict[int, int] = {}
+        self._queue: queue.Queue[_WriteOp | threading.Event | None] = (
+            queue.Queue()
+        )
+        self._writer_thread = threading.Thread(
+            target=self._run_writer, name="dyad-llm-call-writer", daemon=True
+        )
+        self._writer_thread.start()
+        atexit.register(self.flush)
+
     def record_request(self, request: LanguageModelRequest) -> int:
         """
         Record an LLM request to the database.
 
+        The request is written by a background thread; it must not be
+        mutated after it is recorded.
+
         Args:
             request: The LanguageModelRequest to record
 
         Returns:
-            The ID of the created record
+            A handle to pass to `record_response`
         """
-
-        # Create a new record with empty response for now
-        with Session(engine) as session:
-            record = LanguageModelCallsTable(
-                timestamp=datetime.utcnow(),
-                request_json=request.model_dump_json(),
-                response_json="{}",
+        with self._handles_lock:
+            handle = next(self._handles)
+        timestamp = datetime.utcnow()
+        self._queue.put(
+            lambda session: self._write_request(
+                session, handle, timestamp, request
             )
-            session.add(record)
-            session.commit()
-            session.refresh(record)
-            return record.id
+        )
+        return handle
 
     def record_response(
         self, request_id: int, response: LanguageModelResponse
@@ -75,70 +185,317 @@ class LLMCallLogger:
         """
         Record an LLM response to the database, updating the existing request record.
 
+        The response is written by a background thread after the request.
+
         Args:
-            request_id: The ID of the request record to update
+            request_id: The handle returned by `record_request`
             response: The LanguageModelResponse to record
         """
+        self._queue.put(
+            lambda session: self._write_response(session, request_id, response)
+        )
 
-        with Session(engine) as session:
-            statement = select(LanguageModelCallsTable).where(
-                LanguageModelCallsTable.id == request_id
-            )
-            results = session.exec(statement)
-            record = results.first()
+    def flush(self, timeout: float = 10) -> bool:
+        """
+        Block until every request and response recorded so far is written,
+        or the timeout expires.
+
+        Returns:
+            Whether everything was written
+        """
+        if not self._writer_thread.is_alive():
+            return True
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        return flushed.wait(timeout=timeout)
 
-            if record:
-                # Update the response
-                record.response_json = response.model_dump_json()
-                session.add(record)
+    def _run_writer(self):
+        while True:
+            item = self._queue.get()
+            ops: list[_WriteOp] = []
+            # Drain whatever else is queued so a burst shares one transaction.
+            while True:
+                if isinstance(item, threading.Event):
+                    self._write(ops)
+                    ops = []
+                    item.set()
+                elif item is None:
+                    self._write(ops)
+                    return
+                else:
+                    ops.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._write(ops)
+
+    def _write(self, ops: list[_WriteOp]):
+        if not ops:
+            return
+        try:
+            with Session(engine) as session:
+                # Takes the write lock before the blobs which already exist
+                # are looked up, so `delete_orphaned_blobs` can't delete them
+                # before the calls referencing them are committed.
+                session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                for op in ops:
+                    # A failing write only rolls back itself, not the burst.
+                    try:
+                        with session.begin_nested():
+                            op(session)
+                    except Exception as e:
+                        logging.error(f"Failed to write LLM call: {e!s}")
                 session.commit()
-            else:
-                raise ValueError(
-                    f"Request ID {request_id} not found in database."
+        except Exception as e:
+            logging.error(f"Failed to write LLM calls: {e!s}")
+
+    def _write_request(
+        self,
+        session: Session,
+        handle: int,
+        timestamp: datetime,
+        request: LanguageModelRequest,
+    ):
+        history_payloads = [
+            message.model_dump_json() for message in request.history
+        ]
+        input_payload = json.dumps(
+            request.model_dump(mode="json", include={"input"})["input"]
+        )
+        request_doc = request.model_dump(
+            mode="json", exclude={"history", "system_prompt", "input"}
+        )
+        request_doc.update(
+            format=_BLOB_REFS_FORMAT,
+            input_hash=_blob_hash(input_payload),
+            system_prompt_hash=_blob_hash(request.system_prompt),
+            history_hashes=[_blob_hash(p) for p in history_payloads],
+            payload_bytes=self._store_blobs(
+                session,
+                [input_payload, request.system_prompt, *history_payloads],
+            ),
+        )
+        # Create a new record with empty response for now
+        record = LanguageModelCallsTable(
+            timestamp=timestamp,
+            request_json=json.dumps(request_doc),
+            response_json="{}",
+        )
+        session.add(record)
+        session.flush()
+        self._call_ids[handle] = record.id
+
+    def _write_response(
+        self,
+        session: Session,
+        request_id: int,
+        response: LanguageModelResponse,
+    ):
+        call_id = self._call_ids.pop(request_id, None)
+        record = (
+            session.get(LanguageModelCallsTable, call_id)
+            if call_id is not None
+            else None
+        )
+        if record is None:
+            logging.error(f"Request ID {request_id} not found in database.")
+            return
+        response_payload = response.model_dump_json()
+        record.response_json = json.dumps(
+            {
+                "format": _BLOB_REFS_FORMAT,
+                "blob_hash": _blob_hash(response_payload),
+                "payload_bytes": self._store_blobs(session, [response_payload]),
+                "completion_metadata": response.completion_metadata.model_dump(
+                    mode="json"
                 )
+                if response.completion_metadata
+                else None,
+            }
+        )
+        session.add(record)
 
-    def get_recent_calls(
+    def get_recent_call_summaries(
         self, limit: int = 20
-    ) -> list[LanguageModelCallRecord]:
+    ) -> list[LanguageModelCallSummary]:
         """
-        Retrieve the most recent LLM calls from the database in reverse chronological order.
+        Retrieve summaries of the most recent LLM calls in reverse
+        chronological order. No request or response payloads are loaded.
         """
+        self.flush(timeout=self.READ_FLUSH_TIMEOUT_SECONDS)
 
         with Session(engine) as session:
             statement = (
                 select(LanguageModelCallsTable)
-                .order_by(LanguageModelCallsTable.timestamp.desc())  # type: ignore
+                .order_by(col(LanguageModelCallsTable.timestamp).desc())
                 .limit(limit)
             )
-            results = session.exec(statement)
-            call_records = []
-
-            for db_record in results:
+            summaries = []
+            for db_record in session.exec(statement):
                 try:
-                    request = LanguageModelRequest.model_validate_json(
-                        db_record.request_json
-                    )
-                    response = LanguageModelResponse.model_validate_json(
-                        db_record.response_json
-                    )
-
-                    call_record = LanguageModelCallRecord(
-                        id=db_record.id,
-                        timestamp=db_record.timestamp,
-                        request=request,
-                        response=response,
-                    )
-                    call_records.append(call_record)
+                    summaries.append(self._to_summary(db_record))
                 except Exception as e:
                     logging.error(f"Error parsing record {db_record.id}: {e!s}")
-                    continue
+            return summaries
 
-            return call_records
+    def get_call(self, call_id: int) -> LanguageModelCallRecord | None:
+        """
+        Retrieve a single LLM call with its request and response hydrated.
+        """
+        self.flush(timeout=self.READ_FLUSH_TIMEOUT_SECONDS)
+
+        with Session(engine) as session:
+            db_record = session.get(LanguageModelCallsTable, call_id)
+            if db_record is None:
+                return None
+            try:
+                return self._to_call_record(session, db_record)
+            except Exception as e:
+                logging.error(f"Error parsing record {db_record.id}: {e!s}")
+                return None
 
     def clear_calls(self) -> None:
+        self.flush()
         with Session(engine) as session:
             session.exec(delete(LanguageModelCallsTable))  # type: ignore
+            session.exec(delete(LanguageModelCallBlob))  # type: ignore
+            session.commit()
+
+    def delete_orphaned_blobs(self) -> int:
+        """
+        Delete blobs which are no longer referenced by any call, e.g. after
+        old calls were pruned.
+
+        Returns:
+            The number of deleted blobs.
+        """
+        calls_table = LanguageModelCallsTable.__tablename__
+        blobs_table = LanguageModelCallBlob.__tablename__
+        with Session(engine) as session:
+            result = session.connection().execute(
+                text(
+                    f"DELETE FROM {blobs_table} WHERE hash NOT IN ("
+                    "SELECT ref FROM ("
+                    "SELECT json_extract(request_json, '$.input_hash') AS ref "
+                    f"FROM {calls_table} "
+                    "UNION SELECT json_extract(request_json, '$.system_prompt_hash') "
+                    f"FROM {calls_table} "
+                    "UNION SELECT refs.value "
+                    f"FROM {calls_table}, json_each(request_json, '$.history_hashes') AS refs "
+                    "UNION SELECT json_extract(response_json, '$.blob_hash') "
+                    f"FROM {calls_table}"
+                    ") WHERE ref IS NOT NULL)"
+                )
+            )
             session.commit()
+            return result.rowcount
+
+    def _store_blobs(self, session: Session, payloads: list[str]) -> int:
+        """
+        Store the payloads which are not stored yet.
+
+        Returns:
+            The compressed size of all the payloads, including the ones
+            which were already stored.
+        """
+        by_hash = {_blob_hash(payload): payload for payload in payloads}
+        existing_sizes = dict(
+            session.exec(
+                select(
+                    LanguageModelCallBlob.hash,
+                    func.length(LanguageModelCallBlob.data),
+                ).where(col(LanguageModelCallBlob.hash).in_(by_hash.keys()))
+            ).all()
+        )
+        rows = [
+            {"hash": blob_hash, "data": zlib.compress(payload.encode())}
+            for blob_hash, payload in by_hash.items()
+            if blob_hash not in existing_sizes
+        ]
+        if rows:
+            session.connection().execute(
+                insert(LanguageModelCallBlob).on_conflict_do_nothing(), rows
+            )
+        return sum(existing_sizes.values()) + sum(
+            len(row["data"]) for row in rows
+        )
+
+    def _load_blobs(
+        self, session: Session, hashes: list[str]
+    ) -> dict[str, str]:
+        blobs = session.exec(
+            select(LanguageModelCallBlob).where(
+                col(LanguageModelCallBlob.hash).in_(set(hashes))
+            )
+        )
+        return {
+            blob.hash: zlib.decompress(blob.data).decode() for blob in blobs
+        }
+
+    def _to_summary(
+        self, db_record: LanguageModelCallsTable
+    ) -> LanguageModelCallSummary:
+        request_doc: dict[str, Any] = json.loads(db_record.request_json)
+        response_doc: dict[str, Any] = json.loads(db_record.response_json)
+        if request_doc.get("format") == _BLOB_REFS_FORMAT:
+            message_count = len(request_doc["history_hashes"])
+        else:
+            message_count = len(request_doc.get("history", []))
+        if not response_doc:
+            # The response has not been recorded yet.
+            completion_metadata = None
+        elif response_doc.get("format") == _BLOB_REFS_FORMAT:
+            completion_metadata = response_doc["completion_metadata"]
+        else:
+            completion_metadata = LanguageModelResponse.model_validate(
+                response_doc
+            ).get_completion_metadata()
+        return LanguageModelCallSummary(
+            id=db_record.id,
+            timestamp=db_record.timestamp,
+            language_model_id=request_doc["language_model_id"],
+            message_count=message_count,
+            completion_metadata=completion_metadata,
+        )
+
+    def _to_call_record(
+        self, session: Session, db_record: LanguageModelCallsTable
+    ) -> LanguageModelCallRecord:
+        request_doc: dict[str, Any] = json.loads(db_record.request_json)
+        response_doc: dict[str, Any] = json.loads(db_record.response_json)
+
+        hashes = []
+        if request_doc.get("format") == _BLOB_REFS_FORMAT:
+            hashes += [
+                request_doc["input_hash"],
+                request_doc["system_prompt_hash"],
+                *request_doc["history_hashes"],
+            ]
+        if response_doc.get("format") == _BLOB_REFS_FORMAT:
+            hashes.append(response_doc["blob_hash"])
+        blobs = self._load_blobs(session, hashes)
+
+        if request_doc.get("format") == _BLOB_REFS_FORMAT:
+            request_doc["input"] = json.loads(blobs[request_doc["input_hash"]])
+            request_doc["system_prompt"] = blobs[
+                request_doc["system_prompt_hash"]
+            ]
+            request_doc["history"] = [
+                json.loads(blobs[blob_hash])
+                for blob_hash in request_doc["history_hashes"]
+            ]
+        if not response_doc:
+            response_doc = {}
+        elif response_doc.get("format") == _BLOB_REFS_FORMAT:
+            response_doc = json.loads(blobs[response_doc["blob_hash"]])
+
+        return LanguageModelCallRecord(
+            id=db_record.id,
+            timestamp=db_record.timestamp,
+            request=LanguageModelRequest.model_validate(request_doc),
+            response=LanguageModelResponse.model_validate(response_doc),
+        )
 
 
 def llm_call_logger() -> LLMCallLogger:
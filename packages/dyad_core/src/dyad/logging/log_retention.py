@@ -0,0 +1,157 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Connection, Table, delete, text
+from sqlmodel import SQLModel
+
+from dyad.logging.llm_calls import (
+    LanguageModelCallBlob,
+    LanguageModelCallsTable,
+    llm_call_logger,
+)
+from dyad.logging.logging import LogEntry, logger
+from dyad.logging.logs_sql_engine import engine
+from dyad.settings.user_settings import (
+    LogRetentionSettings,
+    get_readonly_user_settings,
+)
+
+# Pages released to the OS per `PRAGMA incremental_vacuum` call, so a single
+# pruning pass never holds the write lock for long.
+_VACUUM_PAGES_PER_PASS = 2_000
+
+_retention_thread: threading.Thread | None = None
+
+
+def ensure_log_indexes():
+    """
+    Create the timestamp/level indexes on existing logs databases.
+
+    `create_all` only creates indexes together with their table, so
+    databases created before the indexes were declared need them added.
+    """
+    tables = [
+        LogEntry.__table__,
+        LanguageModelCallsTable.__table__,
+        LanguageModelCallBlob.__table__,
+    ]
+    SQLModel.metadata.create_all(engine, tables=tables)  # type: ignore
+    for table in tables:
+        assert isinstance(table, Table)
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def prune_logs(retention: LogRetentionSettings | None = None) -> int:
+    """
+    Delete log entries and LLM calls which exceed the retention limits.
+
+    Entries are removed oldest first when they are older than
+    `max_age_days`, beyond the newest `max_*` rows, or beyond the newest
+    `max_*_bytes` of payload. Freed pages are then returned to the OS with
+    an incremental vacuum.
+
+    Returns:
+        The total number of deleted rows.
+    """
+    if retention is None:
+        retention = get_readonly_user_settings().log_retention
+    cutoff = datetime.utcnow() - timedelta(days=retention.max_age_days)
+
+    with engine.begin() as conn:
+        deleted_count = _prune_table(
+            conn,
+            LogEntry.__table__,  # type: ignore
+            size_expression="length(message)",
+            cutoff=cutoff,
+            max_rows=retention.max_log_entries,
+            max_bytes=retention.max_log_bytes,
+        )
+        deleted_count += _prune_table(
+            conn,
+            LanguageModelCallsTable.__table__,  # type: ignore
+            # Every call counts the blobs it references, also the ones shared
+            # with other calls, so the limit is never exceeded.
+            size_expression=(
+                "length(request_json) + length(response_json)"
+                " + coalesce(json_extract(request_json, '$.payload_bytes'), 0)"
+                " + coalesce(json_extract(response_json, '$.payload_bytes'), 0)"
+            ),
+            cutoff=cutoff,
+            max_rows=retention.max_llm_calls,
+            max_bytes=retention.max_llm_call_bytes,
+        )
+
+    if deleted_count:
+        llm_call_logger().delete_orphaned_blobs()
+        with engine.connect() as conn:
+            conn.execute(
+                text(f"PRAGMA incremental_vacuum({_VACUUM_PAGES_PER_PASS})")
+            )
+            conn.commit()
+        logger().info(f"Pruned {deleted_count} rows from the logs database")
+    return deleted_count
+
+
+def _prune_table(
+    conn: Connection,
+    table: Table,
+    *,
+    size_expression: str,
+    cutoff: datetime,
+    max_rows: int,
+    max_bytes: int,
+) -> int:
+    # Rows are append-only, so the autoincrement id orders them by age and
+    # every delete is a range scan on the primary key.
+    table_name = table.name
+    deleted_count = conn.execute(
+        delete(table).where(table.c.timestamp < cutoff)
+    ).rowcount
+    deleted_count += conn.execute(
+        text(
+            f"DELETE FROM {table_name} WHERE id <= ("
+            f"SELECT id FROM {table_name} ORDER BY id DESC "
+            "LIMIT 1 OFFSET :max_rows)"
+        ),
+        {"max_rows": max_rows},
+    ).rowcount
+    deleted_count += conn.execute(
+        text(
+            f"DELETE FROM {table_name} WHERE id <= ("
+            "SELECT id FROM ("
+            f"SELECT id, SUM({size_expression}) OVER (ORDER BY id DESC) "
+            f"AS total_bytes FROM {table_name}"
+            ") WHERE total_bytes > :max_bytes ORDER BY id DESC LIMIT 1)"
+        ),
+        {"max_bytes": max_bytes},
+    ).rowcount
+    return deleted_count
+
+
+def start_log_retention_job(interval_seconds: float = 60 * 60):
+    """
+    Prune the logs database now and then every `interval_seconds` on a
+    background thread. Calling this more than once has no effect.
+    """
+    global _retention_thread
+    if _retention_thread is not None:
+        return
+
+    def run():
+        try:
+            ensure_log_indexes()
+        except Exception as e:
+            logger().error(f"Failed to create logs database indexes: {e}")
+        while True:
+            try:
+                prune_logs()
+            except Exception as e:
+                logger().error(f"Failed to prune logs database: {e}")
+            time.sleep(interval_seconds)
+
+    _retention_thread = threading.Thread(
+        target=run, name="dyad-log-retention", daemon=True
+    )
+    _retention_thread.start()
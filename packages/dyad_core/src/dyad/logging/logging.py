@@ -1,9 +1,15 @@
 import logging
 import os
-from datetime import datetime
+import queue
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Any
 
 import colorlog
-from sqlalchemy import delete
+from sqlalchemy import delete, insert
 from sqlmodel import Field, Session, SQLModel
 
 from dyad.logging.logs_sql_engine import engine
@@ -12,61 +18,159 @@ from dyad.logging.logs_sql_engine import engine
 class LogEntry(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
 
-    timestamp: datetime = Field(default_factory=datetime.utcnow, nullable=False)
-    level: str
+    timestamp: datetime = Field(
+        default_factory=datetime.utcnow, nullable=False, index=True
+    )
+    level: str = Field(index=True)
     message: str
     module: str
 
 
+_FLUSH_INTERVAL_ELAPSED = object()
+
+
 class SQLiteHandler(logging.Handler):
     """
-    Custom logging handler that writes log messages to an SQLite database using SQLModel.
+    Logging handler that persists log records to the SQLite logs database.
+
+    `emit` only enqueues the record, so logging never waits on SQLite. A
+    background writer thread drains the queue and inserts records in batches
+    (a single `executemany` per batch) once `batch_size` records are pending
+    or `flush_interval` seconds have passed. When the queue is full, records
+    below WARNING are dropped (and counted) instead of blocking the caller.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10_000,
+    ):
         SQLModel.metadata.create_all(engine)
         logging.Handler.__init__(self)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[dict[str, Any] | threading.Event | None] = (
+            queue.Queue(maxsize=max_queue_size)
+        )
+        self._dropped_count = 0
+        self._writer_thread = threading.Thread(
+            target=self._run_writer, name="dyad-sqlite-log-writer", daemon=True
+        )
+        self._writer_thread.start()
 
     def emit(self, record):
         """
-        Insert a log record into the SQLite database using SQLModel.
+        Enqueue a log record to be written by the background writer thread.
         """
-        # Interpolate the args into the message
-        message = record.msg % record.args if record.args else record.msg
-
-        log_entry = LogEntry(
-            level=record.levelname,
-            message=message,
-            module=record.module,
+        try:
+            row = {
+                "timestamp": datetime.fromtimestamp(
+                    record.created, timezone.utc
+                ).replace(tzinfo=None),
+                "level": record.levelname,
+                "message": record.getMessage(),
+                "module": record.module,
+            }
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            if record.levelno >= logging.WARNING:
+                # Warnings and errors are worth a short wait under backpressure.
+                self._queue.put(row, timeout=0.1)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self._dropped_count += 1
+
+    def flush(self):
+        """
+        Block until every record enqueued so far has been written.
+        """
+        if not self._writer_thread.is_alive():
+            return
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        flushed.wait(timeout=5)
+
+    def close(self):
+        if self._writer_thread.is_alive():
+            self._queue.put(None)
+            self._writer_thread.join(timeout=5)
+        super().close()
+
+    def _run_writer(self):
+        rows: list[dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                # The flush interval elapsed, write whatever is pending.
+                item = _FLUSH_INTERVAL_ELAPSED
+            if isinstance(item, dict):
+                rows.append(item)
+                if len(rows) < self.batch_size:
+                    continue
+            self._write_rows(rows)
+            rows = []
+            deadline = time.monotonic() + self.flush_interval
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def _write_rows(self, rows: list[dict[str, Any]]):
+        if self._dropped_count:
+            dropped_count, self._dropped_count = self._dropped_count, 0
+            rows.append(
+                {
+                    "timestamp": datetime.utcnow(),
+                    "level": "WARNING",
+                    "message": f"Dropped {dropped_count} log records because the log queue was full",
+                    "module": __name__,
+                }
+            )
+        if not rows:
+            return
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(LogEntry), rows)
+        except Exception:
+            # Never log through the dyad logger here, it would re-enter
+            # this handler.
+            traceback.print_exc(file=sys.stderr)
+
+
+_LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+
+def _get_log_level_from_env(env_var: str, default: int) -> int:
+    level_name = os.environ.get(env_var)
+    if not level_name:
+        return default
+    if level_name not in _LOG_LEVELS:
+        raise ValueError(
+            "Invalid log level. Must be one of DEBUG, INFO, WARNING, ERROR, CRITICAL."
         )
-        with Session(engine) as session:
-            session.add(log_entry)
-            session.commit()
+    return _LOG_LEVELS[level_name]
 
 
 def setup_logging():
-    console_level = logging.INFO
-    if os.environ.get("DYAD_LOG_LEVELS"):
-        if os.environ["DYAD_LOG_LEVELS"] not in [
-            "DEBUG",
-            "INFO",
-            "WARNING",
-            "ERROR",
-            "CRITICAL",
-        ]:
-            raise ValueError(
-                "Invalid log level. Must be one of DEBUG, INFO, WARNING, ERROR, CRITICAL."
-            )
-        if os.environ["DYAD_LOG_LEVELS"] == "DEBUG":
-            console_level = logging.DEBUG
-        elif os.environ["DYAD_LOG_LEVELS"] == "INFO":
-            console_level = logging.INFO
-        elif os.environ["DYAD_LOG_LEVELS"] == "WARNING":
-            console_level = logging.WARNING
-        elif os.environ["DYAD_LOG_LEVELS"] == "ERROR":
-            console_level = logging.ERROR
-        elif os.environ["DYAD_LOG_LEVELS"] == "CRITICAL":
-            console_level = logging.CRITICAL
+    console_level = _get_log_level_from_env("DYAD_LOG_LEVELS", logging.INFO)
+    # DEBUG records are only persisted to logs.db when explicitly requested.
+    persisted_level = _get_log_level_from_env(
+        "DYAD_PERSISTED_LOG_LEVEL", logging.INFO
+    )
 
     logger = logging.getLogger("dyad")
     logger.setLevel(logging.DEBUG)
@@ -77,7 +181,7 @@ def setup_logging():
 
     # Create the SQLite handler
     sqlite_handler = SQLiteHandler()
-    sqlite_handler.setLevel(logging.DEBUG)
+    sqlite_handler.setLevel(persisted_level)
 
     # Colorful formatter for console output
     color_formatter = colorlog.ColoredFormatter(
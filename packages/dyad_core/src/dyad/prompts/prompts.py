@@ -1,4 +1,4 @@
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 
 CODE_OUTPUT_REQUIREMENTS = """
 # Code Output Requirements
@@ -396,7 +396,7 @@ After providing code for a feature:
 
 
 def get_default_system_prompt():
-    if get_user_settings().pad_mode == "all":
+    if get_readonly_user_settings().pad_mode == "all":
         return (
             LEARNING_PROMPT
             # + _academy_prompt
@@ -1,9 +1,19 @@
+import itertools
+import threading
 import uuid
+from copy import deepcopy
 from datetime import datetime
 from enum import Enum
 from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, Field, TypeAdapter
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    SerializerFunctionWrapHandler,
+    TypeAdapter,
+    model_serializer,
+)
 from typing_extensions import TypeVar
 
 from dyad.message_cache import message_cache
@@ -93,6 +103,86 @@ class ContentMetadata(BaseModel):
     calls: list[LanguageModelCallMetadata] = Field(default_factory=list)
 
 
+_content_versions = itertools.count()
+
+
+class _TextBuffer:
+    """Append-optimized text state of a `Content`.
+
+    Streamed text extends `tail_part`, the trailing `TextPart`. It's kept as a
+    plain string here and only written to the part when the content is
+    serialized, so streaming doesn't validate a new `TextPart` per chunk.
+
+    A plain slotted object so the streaming hot path mutates it without going
+    through pydantic's `__setattr__`.
+    """
+
+    __slots__ = (
+        "lock",
+        "tail_part",
+        "tail",
+        "fragments",
+        "version",
+        "direct_text",
+        "text_cache",
+    )
+
+    def __init__(self):
+        # Held while changing the tail, which is streamed into on one thread
+        # and read on others.
+        self.lock = threading.Lock()
+        self.tail_part: TextPart | None = None
+        # The text of `tail_part`, followed by the chunks in `fragments`.
+        # Appending to a list keeps `append_chunk` O(1); the fragments are
+        # joined into `tail` when it's read.
+        self.tail = ""
+        self.fragments: list[str] = []
+        # Unique across all instances so a cache key built from the versions
+        # of a whole subtree changes whenever any node in it is mutated or
+        # replaced.
+        self.version = next(_content_versions)
+        self.direct_text: tuple[tuple, str] | None = None
+        self.text_cache: tuple[tuple, str] | None = None
+
+    def get_tail(self) -> str:
+        # Must be called with `lock` held.
+        if self.fragments:
+            self.tail += "".join(self.fragments)
+            self.fragments = []
+        return self.tail
+
+    def reset_tail(self):
+        # Must be called with `lock` held.
+        self.tail_part = None
+        self.tail = ""
+        self.fragments = []
+
+    def invalidate(self):
+        self.version = next(_content_versions)
+
+    def __eq__(self, other: object) -> bool:
+        # Only holds caches and the streamed tail, which `Content.__eq__`
+        # writes to `parts` before comparing.
+        return isinstance(other, _TextBuffer)
+
+    def __deepcopy__(self, memo: dict) -> "_TextBuffer":
+        copy = _TextBuffer()
+        with self.lock:
+            # The copied `parts` are in `memo`, so this finds the copy of the
+            # tail part.
+            copy.tail_part = deepcopy(self.tail_part, memo)
+            copy.tail = self.get_tail()
+        return copy
+
+    def __getstate__(self) -> tuple[TextPart | None, str]:
+        with self.lock:
+            return self.tail_part, self.get_tail()
+
+    def __setstate__(self, state: tuple[TextPart | None, str]):
+        self.__init__()
+        self.tail_part, self.tail = state
+
+
 class Content(BaseModel):
     @staticmethod
     def from_text(text: str) -> "Content":
@@ -118,6 +208,35 @@ class Content(BaseModel):
     internal_checkpoint: Checkpoint | None = None
 
     _is_loading: bool = True
+    _text_buffer: _TextBuffer = PrivateAttr(default_factory=_TextBuffer)
+
+    @property
+    def _buffer(self) -> _TextBuffer:
+        # Reads the private storage directly; pydantic's `__getattr__`
+        # fallback for private attributes is slow on the streaming hot path.
+        return self.__pydantic_private__["_text_buffer"]  # type: ignore
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in ("parts", "internal_children", "internal_data"):
+            buffer = self._buffer
+            if name == "parts":
+                with buffer.lock:
+                    # The old parts may be reused in the new list.
+                    self._write_tail()
+                    buffer.reset_tail()
+            buffer.invalidate()
+        super().__setattr__(name, value)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Content):
+            self.flush_text()
+            other.flush_text()
+        return super().__eq__(other)
+
+    @model_serializer(mode="wrap")
+    def _serialize(self, handler: SerializerFunctionWrapHandler) -> Any:
+        self.flush_text()
+        return handler(self)
 
     @property
     def children(self) -> list["Content"]:
@@ -142,6 +261,7 @@ class Content(BaseModel):
     def add_child(self, child: "Content"):
         """Add a child to the chat content."""
         self.children.append(child)
+        self._buffer.invalidate()
 
     def set_text(self, text: str):
         """Set the text content of the chat."""
@@ -149,33 +269,106 @@ class Content(BaseModel):
 
     def get_direct_text(self) -> str:
         """Get the text content of the chat."""
-        return "".join(
-            [part.text for part in self.parts if isinstance(part, TextPart)]
-        )
+        return self._get_direct_text()[1]
 
     def get_text(self) -> str:
         """Get the text content of the chat."""
-        text = self.get_direct_text() + "".join(
-            [child.get_text() for child in self.children]
-        )
-        if text:
-            return text
-        if self.internal_data:
-            return str(self.internal_data)
-        return ""
+        return self._get_cached_text()[1]
 
     def append_chunk(self, chunk: AgentChunk):
         """Append a chunk to the chat content."""
-        if isinstance(chunk, ErrorChunk):
+        # Checks for the common `TextChunk` first, `isinstance` with pydantic
+        # models is relatively slow.
+        if type(chunk) is TextChunk or isinstance(chunk, TextChunk):
+            buffer = self._buffer
+            parts = self.parts
+            with buffer.lock:
+                if not parts or parts[-1] is not buffer.tail_part:
+                    # Parts were added since the last chunk.
+                    self._write_tail()
+                    if parts and isinstance(parts[-1], TextPart):
+                        buffer.tail_part = parts[-1]
+                        buffer.tail = parts[-1].text
+                    else:
+                        buffer.tail_part = TextPart(text="")
+                        buffer.tail = ""
+                        parts.append(buffer.tail_part)
+                buffer.fragments.append(chunk.text)
+                buffer.version = next(_content_versions)
+        elif isinstance(chunk, ErrorChunk):
             self.errors.append(ContentError(message=chunk.message))
-        elif isinstance(chunk, TextChunk):
-            if self.parts and isinstance(self.parts[-1], TextPart):
-                self.parts[-1] = TextPart(text=self.parts[-1].text + chunk.text)
-            else:
-                self.parts.append(TextPart(text=chunk.text))
         else:
             raise ValueError(f"Unknown chunk type: {chunk}")
 
+    def flush_text(self):
+        """Writes the streamed text to the trailing `TextPart` in `parts`."""
+        with self._buffer.lock:
+            self._write_tail()
+
+    def _write_tail(self):
+        # Must be called with the buffer's lock held.
+        buffer = self._buffer
+        if buffer.tail_part is None:
+            return
+        text = buffer.get_tail()
+        if buffer.tail_part.text == text:
+            return
+        for i, part in enumerate(self.parts):
+            if part is buffer.tail_part:
+                buffer.tail_part = TextPart(text=text)
+                self.parts[i] = buffer.tail_part
+                return
+        # The tail part was removed from `parts`.
+        buffer.reset_tail()
+
+    def _get_direct_text(self) -> tuple[tuple, str]:
+        """
+        Returns the text of this node's parts together with its cache key.
+
+        The key holds the parts themselves, so callers which change `parts`
+        in place invalidate the cache too.
+        """
+        buffer = self._buffer
+        parts = self.parts
+        key = (buffer.version, tuple(parts))
+        if buffer.direct_text is not None and buffer.direct_text[0] == key:
+            return buffer.direct_text
+        with buffer.lock:
+            tail_part = buffer.tail_part
+            tail = buffer.get_tail()
+        text = "".join(
+            [
+                tail if part is tail_part else part.text
+                for part in parts
+                if part is tail_part or isinstance(part, TextPart)
+            ]
+        )
+        buffer.direct_text = (key, text)
+        return buffer.direct_text
+
+    def _get_cached_text(self) -> tuple[tuple, str]:
+        """
+        Returns the text of this subtree together with its cache key.
+
+        The key is built from the keys of every node, so validating the cache
+        costs O(nodes) rather than O(text).
+        """
+        direct_key, direct_text = self._get_direct_text()
+        if not self.internal_children and (
+            direct_text or self.internal_data is None
+        ):
+            return direct_key, direct_text
+        buffer = self._buffer
+        children = [child._get_cached_text() for child in self.children]
+        key = (direct_key, tuple(child_key for child_key, _ in children))
+        if buffer.text_cache is not None and buffer.text_cache[0] == key:
+            return buffer.text_cache
+        text = direct_text + "".join([child_text for _, child_text in children])
+        if not text and self.internal_data:
+            text = str(self.internal_data)
+        buffer.text_cache = (key, text)
+        return buffer.text_cache
+
 
 Role = Literal["user", "assistant"]
 
@@ -0,0 +1,99 @@
+import copy
+import os
+import threading
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from filelock import FileLock
+from pydantic import BaseModel
+
+SettingsT = TypeVar("SettingsT", bound=BaseModel)
+
+# The settings path plus (mtime_ns, inode, size) of the file the cached value
+# was read from. The stat part is None when the settings file does not exist.
+_CacheKey = tuple[str, tuple[int, int, int] | None]
+
+
+def _stat_key(stat: os.stat_result) -> tuple[int, int, int]:
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+
+class SettingsFileCache(Generic[SettingsT]):
+    """Process-wide cache for a settings model persisted as a JSON file.
+
+    The cached instance is validated once and shared by every reader, so it
+    is stored as an instance of `readonly_cls` (a frozen subclass of
+    `model_cls`). A lookup costs a single `os.stat`; the file is only
+    re-read (under its `FileLock`) when its mtime, inode or size changes,
+    e.g. because another process saved it.
+    """
+
+    def __init__(
+        self,
+        model_cls: type[SettingsT],
+        readonly_cls: type[SettingsT],
+        get_settings_path: Callable[[], str],
+    ):
+        self._model_cls = model_cls
+        self._readonly_cls = readonly_cls
+        self._get_settings_path = get_settings_path
+        self._lock = threading.Lock()
+        # A single (key, value) tuple so lock-free readers always see a
+        # consistent pair.
+        self._entry: tuple[_CacheKey, SettingsT] | None = None
+
+    def get_readonly(self) -> SettingsT:
+        settings_path = self._get_settings_path()
+        try:
+            key: _CacheKey = (settings_path, _stat_key(os.stat(settings_path)))
+        except FileNotFoundError:
+            key = (settings_path, None)
+        entry = self._entry
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry[0] == key:
+                return entry[1]
+            return self._reload(settings_path)
+
+    def get_copy(self) -> SettingsT:
+        """Returns a mutable deep copy which callers may change and save."""
+        readonly = self.get_readonly()
+        return self._model_cls.model_construct(
+            _fields_set=set(readonly.model_fields_set),
+            **copy.deepcopy(dict(readonly)),
+        )
+
+    def save(self, settings: SettingsT):
+        settings_path = self._get_settings_path()
+        os.makedirs(os.path.dirname(settings_path), exist_ok=True)
+        with self._lock, FileLock(settings_path + ".lock"):
+            with open(settings_path, "w") as f:
+                f.write(settings.model_dump_json())
+                f.flush()
+                stat = os.fstat(f.fileno())
+            self._entry = (
+                (settings_path, _stat_key(stat)),
+                self._readonly_cls.model_construct(
+                    _fields_set=set(settings.model_fields_set),
+                    **copy.deepcopy(dict(settings)),
+                ),
+            )
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+
+    def _reload(self, settings_path: str) -> SettingsT:
+        with FileLock(settings_path + ".lock"):
+            try:
+                with open(settings_path) as f:
+                    stat = os.fstat(f.fileno())
+                    value = self._readonly_cls.model_validate_json(f.read())
+                key: _CacheKey = (settings_path, _stat_key(stat))
+            except FileNotFoundError:
+                value = self._readonly_cls()
+                key = (settings_path, None)
+        self._entry = (key, value)
+        return value
@@ -9,6 +9,7 @@ from dyad.language_model.language_model import (
     LanguageModelProvider,
     LanguageModelType,
 )
+from dyad.settings.settings_cache import SettingsFileCache
 from dyad.utils.user_data_dir_utils import get_user_data_dir
 from dyad.workspace_util import (
     get_workspace_root_path,
@@ -28,6 +29,31 @@ class AnalyticsSettings(BaseModel):
     uuid: str | None = None
 
 
+class LogRetentionSettings(BaseModel):
+    """Limits for the workspace logs database (application logs and LLM
+    calls). Older entries beyond any limit are pruned in the background."""
+
+    max_age_days: int = 14
+    max_log_entries: int = 100_000
+    max_log_bytes: int = 64 * 1024 * 1024
+    max_llm_calls: int = 1_000
+    max_llm_call_bytes: int = 256 * 1024 * 1024
+
+
+class VectorIndexSettings(BaseModel):
+    """ANN (IVF-PQ) index for semantic search. It is built once the embeddings
+    table has `min_rows` chunks; smaller tables are searched exhaustively."""
+
+    min_rows: int = 20_000
+    # The index is retrained once the table has grown by this fraction since
+    # it was trained, as the partitions fit chunks added later worse.
+    retrain_growth: float = 0.5
+    # IVF partitions probed per query; higher is more accurate but slower.
+    nprobes: int = 20
+    # Candidates re-ranked with exact distances (None to disable).
+    refine_factor: int | None = 5
+
+
 class UserSettings(BaseModel):
     language_model_type_to_id: dict[LanguageModelType, str] = {
         "core": "dyad/auto-core",
@@ -45,6 +71,12 @@ class UserSettings(BaseModel):
     disable_llm_proxy: bool = False
     disable_anthropic_cache: bool = False
     analytics: AnalyticsSettings = Field(default_factory=AnalyticsSettings)
+    log_retention: LogRetentionSettings = Field(
+        default_factory=LogRetentionSettings
+    )
+    vector_index: VectorIndexSettings = Field(
+        default_factory=VectorIndexSettings
+    )
     custom_language_model_providers: list[LanguageModelProvider] = []
     custom_language_models: list[LanguageModel] = []
     recently_used_models: dict[str, list[str]] = {}
@@ -94,12 +126,11 @@ class UserSettings(BaseModel):
         return self
 
     def save(self):
-        settings_path = _get_settings_path()
-        os.makedirs(os.path.dirname(settings_path), exist_ok=True)
-        lock = FileLock(_get_lock_path())
-        with lock:
-            with open(settings_path, "w") as f:
-                f.write(self.model_dump_json())
+        _settings_cache.save(self)
+
+
+class _ReadOnlyUserSettings(UserSettings, frozen=True):
+    """The shared instance handed out by `get_readonly_user_settings`."""
 
 
 def _get_settings_path() -> str:
@@ -110,14 +141,32 @@ def _get_lock_path() -> str:
     return _get_settings_path() + ".lock"
 
 
+_settings_cache = SettingsFileCache(
+    UserSettings, _ReadOnlyUserSettings, _get_settings_path
+)
+
+
 def get_user_settings() -> UserSettings:
-    settings_path = _get_settings_path()
-    lock = FileLock(_get_lock_path())
-    with lock:
-        if os.path.exists(settings_path):
-            with open(settings_path) as f:
-                return UserSettings.model_validate_json(f.read())
-    return UserSettings()
+    """Returns a private copy of the user settings which can be modified
+    and then persisted with `save()`.
+
+    Use `get_readonly_user_settings` when the settings are only read.
+    """
+    return _settings_cache.get_copy()
+
+
+def get_readonly_user_settings() -> UserSettings:
+    """Returns the cached, process-wide user settings.
+
+    This is cheap enough to call on every render or streamed chunk: the
+    settings file is only re-read when it has changed on disk. The returned
+    object is shared and must not be mutated. Assigning a top-level field
+    raises, but nested values (e.g. `analytics`, `provider_id_to_api_key`
+    and `recently_used_models`) can still be changed in place, e.g. by
+    `update_recently_used_model`, so use `get_user_settings` for anything
+    that modifies them.
+    """
+    return _settings_cache.get_readonly()
 
 
 def reset_user_settings():
@@ -135,6 +184,7 @@ def reset_user_settings():
                 os.remove(settings_path)
             except OSError as e:
                 raise OSError("Failed to remove settings file") from e
+    _settings_cache.invalidate()
 
 
 def toggle_sidebar_settings():
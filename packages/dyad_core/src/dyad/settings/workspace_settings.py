@@ -3,6 +3,7 @@ import os
 from filelock import FileLock
 from pydantic import BaseModel
 
+from dyad.settings.settings_cache import SettingsFileCache
 from dyad.workspace_util import get_workspace_storage_path
 
 
@@ -16,12 +17,11 @@ class WorkspaceSettings(BaseModel):
     pads_glob_path: str = "pads/**/*.md"
 
     def save(self):
-        settings_path = _get_settings_path()
-        os.makedirs(os.path.dirname(settings_path), exist_ok=True)
-        lock = FileLock(_get_lock_path())
-        with lock:
-            with open(settings_path, "w") as f:
-                f.write(self.model_dump_json())
+        _settings_cache.save(self)
+
+
+class _ReadOnlyWorkspaceSettings(WorkspaceSettings, frozen=True):
+    """The shared instance handed out by `get_readonly_workspace_settings`."""
 
 
 def _get_settings_path() -> str:
@@ -32,14 +32,27 @@ def _get_lock_path() -> str:
     return _get_settings_path() + ".lock"
 
 
+_settings_cache = SettingsFileCache(
+    WorkspaceSettings, _ReadOnlyWorkspaceSettings, _get_settings_path
+)
+
+
 def get_workspace_settings() -> WorkspaceSettings:
-    settings_path = _get_settings_path()
-    lock = FileLock(_get_lock_path())
-    with lock:
-        if os.path.exists(settings_path):
-            with open(settings_path) as f:
-                return WorkspaceSettings.model_validate_json(f.read())
-    return WorkspaceSettings()
+    """Returns a private copy of the workspace settings which can be
+    modified and then persisted with `save()`.
+
+    Use `get_readonly_workspace_settings` when the settings are only read.
+    """
+    return _settings_cache.get_copy()
+
+
+def get_readonly_workspace_settings() -> WorkspaceSettings:
+    """Returns the cached workspace settings shared by the whole process.
+
+    The settings file is only re-read when it has changed on disk. The
+    returned object must not be mutated; assigning a field raises.
+    """
+    return _settings_cache.get_readonly()
 
 
 def reset_workspace_settings():
@@ -59,3 +72,4 @@ def reset_workspace_settings():
                 raise OSError(
                     "Failed to remove workspace settings file:"
                 ) from e
+    _settings_cache.invalidate()
@@ -7,3 +7,4 @@ from dyad.storage.models import embedding_metadata as embedding_metadata
 from dyad.storage.models import pad as pad
 
 SQLModel.metadata.create_all(db.engine)
+embedding_metadata.migrate_embedding_metadata_table()
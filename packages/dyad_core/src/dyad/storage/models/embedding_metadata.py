@@ -1,14 +1,31 @@
 from datetime import datetime
+from typing import NamedTuple
 
-from sqlmodel import Field, Session, SQLModel, select
+from sqlalchemy import Index
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Field, Session, SQLModel, col, delete, select, text, update
 
 from dyad.settings.user_settings import EmbeddingModelConfig
 from dyad.storage.db import engine
 
+# Columns which identify a file's embedding metadata.
+_KEY_COLUMNS = (
+    "file_path",
+    "branch",
+    "provider",
+    "embedding_model_name",
+    "version",
+)
+_KEY_INDEX_NAME = "ix_embeddingmetadata_key"
+# Keeps the number of SQL variables per statement below SQLite's limit.
+_QUERY_BATCH_SIZE = 500
+
 
 class EmbeddingMetadata(SQLModel, table=True):
     """SQLModel for tracking embedding metadata and caching."""
 
+    __table_args__ = (Index(_KEY_INDEX_NAME, *_KEY_COLUMNS, unique=True),)
+
     id: int | None = Field(default=None, primary_key=True)
     file_path: str = Field(index=True)
     branch: str = Field(index=True)
@@ -23,115 +40,144 @@ class EmbeddingMetadata(SQLModel, table=True):
     file_last_modified: datetime  # Timestamp of the file's last modification
     vector_store_id: str  # Reference to LanceDB record ID
     exists_in_branch: bool = Field(default=True)
+    # Stat data of the file when it was hashed. If it still matches, the file
+    # is unchanged and doesn't need to be read again.
+    file_mtime_ns: int | None = None
+    file_size: int | None = None
+    file_inode: int | None = None
 
 
-def get_embedding_metadata(
-    file_path: str, branch: str, embedding_model_config: EmbeddingModelConfig
-) -> EmbeddingMetadata | None:
+def get_embedding_metadata_for_files(
+    file_paths: list[str],
+    branch: str,
+    embedding_model_config: EmbeddingModelConfig,
+) -> dict[str, EmbeddingMetadata]:
     """
-    Retrieve embedding metadata for a specific file, branch, and embedder.
+    Retrieve the embedding metadata of many files at once.
 
     Args:
-        file_path: Path to the file
+        file_paths: Paths of the files
         branch: Git branch name
-        embedder_id: EmbedderId instance containing provider, model, and dimension
+        embedding_model_config: The embedder the metadata is for
 
     Returns:
-        EmbeddingMetadata if found, None otherwise
+        The EmbeddingMetadata of each file which has any, by file path
     """
+    unique_paths = list(dict.fromkeys(file_paths))
+    metadata_by_path: dict[str, EmbeddingMetadata] = {}
     with Session(engine) as session:
-        statement = select(EmbeddingMetadata).where(
-            EmbeddingMetadata.file_path == file_path,
-            EmbeddingMetadata.branch == branch,
-            EmbeddingMetadata.version == embedding_model_config.version,
-            EmbeddingMetadata.provider == embedding_model_config.provider_id,
-            EmbeddingMetadata.embedding_model_name
-            == embedding_model_config.embedding_model_name,
-        )
-        return session.exec(statement).first()
+        for i in range(0, len(unique_paths), _QUERY_BATCH_SIZE):
+            statement = select(EmbeddingMetadata).where(
+                col(EmbeddingMetadata.file_path).in_(
+                    unique_paths[i : i + _QUERY_BATCH_SIZE]
+                ),
+                EmbeddingMetadata.branch == branch,
+                EmbeddingMetadata.version == embedding_model_config.version,
+                EmbeddingMetadata.provider
+                == embedding_model_config.provider_id,
+                EmbeddingMetadata.embedding_model_name
+                == embedding_model_config.embedding_model_name,
+            )
+            for metadata in session.exec(statement):
+                metadata_by_path[metadata.file_path] = metadata
+    return metadata_by_path
+
 
+class EmbeddingMetadataUpdate(NamedTuple):
+    file_path: str
+    file_hash: str
+    vector_store_id: str
+    file_last_modified: datetime
+    file_mtime_ns: int | None = None
+    file_size: int | None = None
+    file_inode: int | None = None
 
-def upsert_embedding_metadata(
+
+def bulk_upsert_embedding_metadata(
+    updates: list[EmbeddingMetadataUpdate],
     *,
-    file_path: str,
     branch: str,
     embedding_model_config: EmbeddingModelConfig,
-    file_hash: str,
-    vector_store_id: str,
-    file_last_modified: datetime,
-) -> EmbeddingMetadata:
+) -> None:
     """
-    Create or update embedding metadata for a file.
+    Create or update the embedding metadata of many files in one transaction.
 
     Args:
-        file_path: Path to the file
+        updates: The new file hash, vector store ID and modification time of
+            each file
         branch: Git branch name
-        embedder_id: EmbedderId instance containing provider, model, and dimension
-        file_hash: Hash of the file contents
-        vector_store_id: ID reference in the vector store (LanceDB)
-        file_last_modified: Timestamp of the file's last modification
-
-    Returns:
-        The created or updated EmbeddingMetadata instance
+        embedding_model_config: The embedder the metadata is for
     """
-    with Session(engine) as session:
-        # Try to find existing record within the current session
-        statement = select(EmbeddingMetadata).where(
-            EmbeddingMetadata.file_path == file_path,
-            EmbeddingMetadata.branch == branch,
-            EmbeddingMetadata.version == embedding_model_config.version,
-            EmbeddingMetadata.provider == embedding_model_config.provider_id,
-            EmbeddingMetadata.embedding_model_name
-            == embedding_model_config.embedding_model_name,
-        )
-        metadata = session.exec(statement).first()
-
-        if metadata:
-            # Update existing record
-            metadata.file_hash = file_hash
-            metadata.embedding_dim = embedding_model_config.embedding_dim
-            metadata.vector_store_id = vector_store_id
-            metadata.indexed_at = datetime.now().astimezone()
-            metadata.file_last_modified = file_last_modified
-            metadata.exists_in_branch = True
-        else:
-            # Create new record
-            metadata = EmbeddingMetadata(
-                file_path=file_path,
-                branch=branch,
-                version=embedding_model_config.version,
-                provider=embedding_model_config.provider_id,
-                embedding_model_name=embedding_model_config.embedding_model_name,
-                embedding_dim=embedding_model_config.embedding_dim,
-                file_hash=file_hash,
-                vector_store_id=vector_store_id,
-                file_last_modified=file_last_modified,
+    if not updates:
+        return
+    indexed_at = datetime.now().astimezone()
+    rows = [
+        {
+            "file_path": update.file_path,
+            "branch": branch,
+            "provider": embedding_model_config.provider_id,
+            "embedding_model_name": embedding_model_config.embedding_model_name,
+            "version": embedding_model_config.version,
+            "embedding_dim": embedding_model_config.embedding_dim,
+            "file_hash": update.file_hash,
+            "indexed_at": indexed_at,
+            "file_last_modified": update.file_last_modified,
+            "vector_store_id": update.vector_store_id,
+            "exists_in_branch": True,
+            "file_mtime_ns": update.file_mtime_ns,
+            "file_size": update.file_size,
+            "file_inode": update.file_inode,
+        }
+        # Only the last update of a file is kept.
+        for update in {update.file_path: update for update in updates}.values()
+    ]
+    statement = insert(EmbeddingMetadata)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(_KEY_COLUMNS),
+        set_={
+            column: statement.excluded[column]
+            for column in (
+                "embedding_dim",
+                "file_hash",
+                "indexed_at",
+                "file_last_modified",
+                "vector_store_id",
+                "exists_in_branch",
+                "file_mtime_ns",
+                "file_size",
+                "file_inode",
             )
-            session.add(metadata)
-
+        },
+    )
+    with Session(engine) as session:
+        session.connection().execute(statement, rows)
         session.commit()
-        session.refresh(metadata)
-        return metadata
 
 
-def mark_file_removed(file_path: str, branch: str) -> None:
+def mark_files_removed(file_paths: list[str], branch: str) -> None:
     """
-    Mark a file as removed from a branch.
+    Mark many files as removed from a branch in one transaction.
 
     Args:
-        file_path: Path to the file
+        file_paths: Paths of the files
         branch: Git branch name
     """
+    unique_paths = list(dict.fromkeys(file_paths))
+    if not unique_paths:
+        return
     with Session(engine) as session:
-        statement = select(EmbeddingMetadata).where(
-            EmbeddingMetadata.file_path == file_path,
-            EmbeddingMetadata.branch == branch,
-        )
-        metadata = session.exec(statement).all()
-
-        for record in metadata:
-            record.exists_in_branch = False
-
+        for i in range(0, len(unique_paths), _QUERY_BATCH_SIZE):
+            statement = (
+                update(EmbeddingMetadata)
+                .where(
+                    col(EmbeddingMetadata.file_path).in_(
+                        unique_paths[i : i + _QUERY_BATCH_SIZE]
+                    ),
+                    col(EmbeddingMetadata.branch) == branch,
+                )
+                .values(exists_in_branch=False)
+            )
+            session.exec(statement)  # type: ignore
         session.commit()
 
 
@@ -167,6 +213,26 @@ def delete_embedding_metadata(metadata_id: int) -> None:
             session.commit()
 
 
+def delete_embedding_metadata_for_model(
+    embedding_model_config: EmbeddingModelConfig,
+) -> None:
+    """
+    Permanently delete the embedding metadata of every file for an embedder.
+
+    Args:
+        embedding_model_config: The embedder whose metadata is deleted
+    """
+    with Session(engine) as session:
+        statement = delete(EmbeddingMetadata).where(
+            EmbeddingMetadata.version == embedding_model_config.version,  # type: ignore
+            EmbeddingMetadata.provider == embedding_model_config.provider_id,  # type: ignore
+            EmbeddingMetadata.embedding_model_name  # type: ignore
+            == embedding_model_config.embedding_model_name,
+        )
+        session.exec(statement)  # type: ignore
+        session.commit()
+
+
 def drop_and_recreate_embedding_metadata_table() -> None:
     """
     Drop the embedding metadata table and recreate it.
@@ -178,3 +244,47 @@ def drop_and_recreate_embedding_metadata_table() -> None:
         # Recreate only the EmbeddingMetadata table
         table.create(engine)
         session.commit()
+
+
+def migrate_embedding_metadata_table() -> None:
+    """
+    Bring tables created by older versions up to date: add the stat columns
+    and the unique index over the key columns, dropping duplicate rows
+    (keeping the newest) which would violate it.
+    """
+    table_name = EmbeddingMetadata.__tablename__
+    key_columns = ", ".join(_KEY_COLUMNS)
+    with Session(engine) as session:
+        connection = session.connection()
+        existing_columns = {
+            row[1]
+            for row in connection.execute(
+                text(f"PRAGMA table_info({table_name})")
+            )
+        }
+        for column in ("file_mtime_ns", "file_size", "file_inode"):
+            if column not in existing_columns:
+                connection.execute(
+                    text(
+                        f"ALTER TABLE {table_name} ADD COLUMN {column} INTEGER"
+                    )
+                )
+        if not connection.execute(
+            text(
+                "SELECT 1 FROM sqlite_master WHERE type='index' AND name=:name"
+            ),
+            {"name": _KEY_INDEX_NAME},
+        ).first():
+            connection.execute(
+                text(
+                    f"DELETE FROM {table_name} WHERE id NOT IN ("
+                    f"SELECT MAX(id) FROM {table_name} GROUP BY {key_columns})"
+                )
+            )
+            connection.execute(
+                text(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {_KEY_INDEX_NAME} "
+                    f"ON {table_name} ({key_columns})"
+                )
+            )
+        session.commit()
@@ -34,6 +34,17 @@ def add_suggestion(category: str, suggestion: str, mtime: float | None = None):
             _directory_dict[dir_path].add(suggestion)
 
 
+def add_suggestions(category: str, suggestions: dict[str, float]):
+    """Adds many suggestions at once, e.g. when loading the file index."""
+    _suggestion_dict.setdefault(category, {}).update(suggestions)
+
+    if category == "file":
+        for suggestion in suggestions:
+            dir_path = os.path.dirname(suggestion)
+            if dir_path:
+                _directory_dict[dir_path].add(suggestion)
+
+
 def remove_suggestion(category: str, suggestion: str):
     if (
         category in _suggestion_dict
@@ -49,6 +60,11 @@ def remove_suggestion(category: str, suggestion: str):
                     del _directory_dict[dir_path]
 
 
+def remove_suggestions(category: str, suggestions: list[str]):
+    for suggestion in suggestions:
+        remove_suggestion(category, suggestion)
+
+
 @dataclass
 class Suggestion:
     type: str
@@ -0,0 +1,166 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from unittest.mock import MagicMock
+
+from dyad.apply_code import CodeEdit
+from dyad.code_edit.search_replace_handler import (
+    SearchReplaceBlockParser,
+    apply_search_replace,
+    search_replace_apply_code_handler,
+)
+from dyad.public.chat_message import TextChunk
+
+ORIGINAL_CODE = """def greet(name):
+    print("Hello", name)
+
+
+def farewell(name):
+    print("Bye", name)
+"""
+
+
+def test_search_replace_block_parser():
+    text = (
+        "```\n"
+        "<<<<<<< SEARCH\n"
+        "a\n"
+        "=======\n"
+        "b\n"
+        "c\n"
+        ">>>>>>> REPLACE\n"
+        "<<<<<<< SEARCH\n"
+        "d\n"
+        "=======\n"
+        ">>>>>>> REPLACE"
+    )
+    parser = SearchReplaceBlockParser()
+    blocks = []
+    for i in range(0, len(text), 5):
+        blocks.extend(parser.feed(text[i : i + 5]))
+    assert blocks == [("a", "b\nc")]
+    assert parser.finish() == [("d", "")]
+
+
+def test_apply_search_replace_exact():
+    assert apply_search_replace(
+        ORIGINAL_CODE, '    print("Bye", name)', '    print("Goodbye", name)'
+    ) == ORIGINAL_CODE.replace('"Bye"', '"Goodbye"')
+
+
+def test_apply_search_replace_only_matches_whole_lines():
+    # "TIMEOUT = 1" is a prefix of the line, it must not become "TIMEOUT = 50".
+    assert (
+        apply_search_replace("TIMEOUT = 10\n", "TIMEOUT = 1", "TIMEOUT = 5")
+        == "TIMEOUT = 5\n"
+    )
+    assert (
+        apply_search_replace(
+            "TIMEOUT = 10\nTIMEOUT = 1\n", "TIMEOUT = 1", "TIMEOUT = 5"
+        )
+        == "TIMEOUT = 10\nTIMEOUT = 5\n"
+    )
+    assert (
+        apply_search_replace("x = 1\r\ny = 2\r\n", "x = 1", "x = 3")
+        == "x = 3\r\ny = 2\r\n"
+    )
+
+
+def test_apply_search_replace_reindents():
+    # The search block lost its indentation, the replacement is re-indented.
+    updated = apply_search_replace(
+        ORIGINAL_CODE,
+        'print("Hello", name)',
+        'name = name.title()\nprint("Hello", name)',
+    )
+    assert updated == ORIGINAL_CODE.replace(
+        '    print("Hello", name)',
+        '    name = name.title()\n    print("Hello", name)',
+    )
+
+
+def test_apply_search_replace_fuzzy():
+    updated = apply_search_replace(
+        ORIGINAL_CODE,
+        'def farewell(name):\n    print("Bye",  name)',
+        'def farewell(name):\n    print("Bye!", name)',
+    )
+    assert updated == ORIGINAL_CODE.replace('"Bye"', '"Bye!"')
+
+
+def test_apply_search_replace_not_found():
+    assert apply_search_replace(ORIGINAL_CODE, "missing()", "found()") is None
+
+
+@pytest.fixture
+def mock_workspace():
+    with (
+        patch(
+            "dyad.code_edit.search_replace_handler.does_workspace_file_exist"
+        ) as mock_exists,
+        patch(
+            "dyad.code_edit.search_replace_handler.read_workspace_file"
+        ) as mock_read,
+        patch(
+            "dyad.code_edit.search_replace_handler.get_editor_language_model"
+        ) as mock_model,
+        patch(
+            "dyad.code_edit.search_replace_handler.get_language_model_client"
+        ) as mock_client,
+        patch(
+            "dyad.code_edit.search_replace_handler.simple_apply_code_handler"
+        ) as mock_simple_handler,
+    ):
+        mock_exists.return_value = True
+        mock_read.return_value = ORIGINAL_CODE
+
+        mock_model_instance = MagicMock()
+        mock_model_instance.id = "test-model-id"
+        mock_model.return_value = mock_model_instance
+
+        mock_client_instance = MagicMock()
+        mock_client.return_value = mock_client_instance
+
+        yield {
+            "client": mock_client_instance,
+            "simple_handler": mock_simple_handler,
+        }
+
+
+def test_search_replace_apply_code_handler_success(mock_workspace):
+    code_edit = CodeEdit(
+        file_path="test.py", code_edit="new code", edit_context="edit_context"
+    )
+    mock_workspace["client"].stream_chunks.return_value = [
+        TextChunk(text='<<<<<<< SEARCH\n    print("Bye"'),
+        TextChunk(text=', name)\n=======\n    print("See you", name)\n'),
+        TextChunk(text=">>>>>>> REPLACE\n"),
+    ]
+
+    result = list(search_replace_apply_code_handler(code_edit))
+    assert result == [
+        ORIGINAL_CODE,
+        ORIGINAL_CODE.replace('"Bye"', '"See you"'),
+    ]
+    mock_workspace["simple_handler"].assert_not_called()
+
+
+def test_search_replace_apply_code_handler_falls_back(mock_workspace):
+    code_edit = CodeEdit(
+        file_path="test.py", code_edit="new code", edit_context="edit_context"
+    )
+    mock_workspace["client"].stream_chunks.return_value = [
+        TextChunk(text="<<<<<<< SEARCH\nmissing()\n=======\nfound()\n"),
+        TextChunk(text=">>>>>>> REPLACE\n"),
+    ]
+    mock_workspace["simple_handler"].return_value = iter(["whole file"])
+
+    result = list(search_replace_apply_code_handler(code_edit))
+    assert result == [ORIGINAL_CODE, "whole file"]
+    mock_workspace["simple_handler"].assert_called_once_with(code_edit)
@@ -1,4 +1,5 @@
 import os
+import time
 from unittest.mock import patch
 
 import pytest
@@ -11,6 +12,7 @@ from unittest.mock import MagicMock
 
 from dyad.apply_code import CodeEdit
 from dyad.code_edit.simple_handler import (
+    CodeFenceStripper,
     remove_code_fence,
     simple_apply_code_handler,
 )
@@ -83,6 +85,47 @@ from typing import TypedDict"""
     assert remove_code_fence(code_with_backticks) == expected_with_backticks
 
 
+def _feed_chunks(chunks: list[str]) -> list[str]:
+    stripper = CodeFenceStripper()
+    texts = []
+    for chunk in chunks:
+        stripper.feed(chunk)
+        texts.append(stripper.text)
+    return texts
+
+
+def test_code_fence_stripper_fence_split_across_chunks():
+    assert _feed_chunks(["``", "`py", "thon\nx = 1\n", "``", "`\n"]) == [
+        "``",
+        "",
+        "x = 1",
+        # Not a fence (yet), so it's part of the block.
+        "x = 1\n``",
+        "x = 1",
+    ]
+    assert _feed_chunks(["```python\r", "\nx = 1\r\n", "```"]) == [
+        "",
+        "x = 1",
+        "x = 1",
+    ]
+
+
+def test_code_fence_stripper_unterminated_fence():
+    assert _feed_chunks(["```\nx = 1\n", "y = 2"]) == ["x = 1", "x = 1\ny = 2"]
+
+
+def test_code_fence_stripper_language_tag():
+    assert _feed_chunks(["```typescript\n", "const a = 1;\n", "```"]) == [
+        "",
+        "const a = 1;",
+        "const a = 1;",
+    ]
+    # Only the lines inside the fences are kept.
+    assert _feed_chunks(
+        ["Here:\n```js\nlet a;\n```\n", "text\n```js\nlet b;\n```"]
+    ) == ["let a;", "let a;\nlet b;"]
+
+
 @pytest.fixture
 def mock_workspace():
     with (
@@ -142,6 +185,29 @@ def test_simple_apply_code_handler_success(mock_workspace):
     assert result == ["updated ", "updated code"]
 
 
+def test_simple_apply_code_handler_yields_long_streams_linearly(
+    mock_workspace,
+):
+    code_edit = CodeEdit(
+        file_path="test.py", code_edit="new code", edit_context="edit_context"
+    )
+    lines = [f"line_{i} = {i}\n" for i in range(32_000)]
+    text = "".join(lines)
+    mock_workspace["client"].stream_chunks.return_value = [
+        TextChunk(text="```python\n"),
+        *(TextChunk(text=text[i : i + 20]) for i in range(0, len(text), 20)),
+        TextChunk(text="```"),
+    ]
+
+    start_time = time.monotonic()
+    result = list(simple_apply_code_handler(code_edit))
+
+    # Not every chunk's text is yielded, but the last one always is.
+    assert len(result) < 1000
+    assert result[-1] == text[:-1]
+    assert time.monotonic() - start_time < 5
+
+
 def test_simple_apply_code_handler_error(mock_workspace):
     code_edit = CodeEdit(
         file_path="test.py", code_edit="new code", edit_context="edit_context"
@@ -0,0 +1,55 @@
+import os
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.chunking import chunk_file
+
+
+def _function(name: str, body_lines: int) -> str:
+    body = "".join(f"    {name}_{i} = {i}\n" for i in range(body_lines))
+    return f"def {name}():\n{body}    return None\n"
+
+
+def test_chunk_file_splits_along_definitions():
+    source = "import os\n\n\n" + "\n\n".join(
+        _function(name, 10) for name in ("first", "second", "third")
+    )
+    chunks = chunk_file("module.py", source, max_chunk_size=300)
+
+    assert "".join(chunk.content for chunk in chunks) == source
+    # The import is merged into the first function instead of on its own.
+    assert [chunk.content.strip().split("\n")[0] for chunk in chunks] == [
+        "import os",
+        "def second():",
+        "def third():",
+    ]
+    lines = source.split("\n")
+    for chunk in chunks:
+        assert source[chunk.start_pos : chunk.end_pos] == chunk.content
+        assert lines[chunk.start_line - 1].strip() in chunk.content.lstrip()
+        assert lines[chunk.end_line - 1] == "    return None"
+
+
+def test_chunk_file_splits_oversized_nodes():
+    source = "class Big:\n" + "".join(
+        "    " + line + "\n"
+        for name in ("a", "b", "c", "d")
+        for line in _function(name, 5).splitlines()
+    )
+    chunks = chunk_file("big.py", source, max_chunk_size=200)
+
+    assert "".join(chunk.content for chunk in chunks) == source
+    assert all(len(chunk.content) <= 200 for chunk in chunks)
+    # The class header is kept with its first method.
+    assert chunks[0].content.startswith("class Big:\n    def a():")
+
+
+def test_chunk_file_falls_back_to_lines():
+    source = "".join(f"line {i}\n" for i in range(100))
+    chunks = chunk_file("notes.txt", source, max_chunk_size=100)
+
+    assert "".join(chunk.content for chunk in chunks) == source
+    assert all(chunk.content.endswith("\n") for chunk in chunks)
+    assert chunks[1].start_line == chunks[0].end_line + 1
@@ -0,0 +1,30 @@
+import os
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.embedding_cache import EmbeddingCache, hash_chunk
+from dyad.settings.user_settings import EmbeddingModelConfig
+
+
+def _model(name: str) -> EmbeddingModelConfig:
+    return EmbeddingModelConfig(
+        provider_id="openai", embedding_model_name=name, embedding_dim=2
+    )
+
+
+def test_embedding_cache_round_trip(tmp_path):
+    db_path = str(tmp_path / "embedding_cache.db")
+    cache = EmbeddingCache(db_path, _model("small"))
+    a, b = hash_chunk("a"), hash_chunk("b")
+    cache.put_many({a: [0.5, 1.0], b: []})
+
+    assert cache.get_many([a, b, a]) == {a: [0.5, 1.0]}
+    # Embeddings are only shared by the same model.
+    assert EmbeddingCache(db_path, _model("large")).get_many([a]) == {}
+    # and persist across instances.
+    cache.close()
+    assert EmbeddingCache(db_path, _model("small")).get_many([a]) == {
+        a: [0.5, 1.0]
+    }
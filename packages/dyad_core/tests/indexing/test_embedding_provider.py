@@ -0,0 +1,98 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.embeddings.embedding_provider import (
+    OpenAIEmbeddingProvider,
+)
+from openai import BadRequestError, RateLimitError
+
+
+def _error(error_type, status_code: int, headers: dict[str, str] | None = None):
+    request = httpx.Request("POST", "https://example.com/embeddings")
+    response = httpx.Response(status_code, request=request, headers=headers)
+    return error_type("error", response=response, body=None)
+
+
+def _response(texts: list[str]):
+    return MagicMock(
+        data=[MagicMock(embedding=[float(len(text))]) for text in texts]
+    )
+
+
+@pytest.fixture
+def provider():
+    provider = OpenAIEmbeddingProvider(provider_id="openai")
+    provider.batch_size = 2
+    provider.INITIAL_BACKOFF_SECONDS = 0
+    with (
+        patch.object(
+            OpenAIEmbeddingProvider, "_get_model_name", return_value="model"
+        ),
+        patch.object(OpenAIEmbeddingProvider, "client") as mock_client,
+        patch(
+            "dyad.indexing.embeddings.embedding_provider.time.sleep"
+        ) as mock_sleep,
+    ):
+        yield provider, mock_client.embeddings.create, mock_sleep
+
+
+def test_generate_embeddings_batches_in_order(provider):
+    provider, create, _ = provider
+    create.side_effect = lambda input, **kwargs: _response(input)
+
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    assert provider.generate_embeddings(texts) == [
+        [1.0],
+        [2.0],
+        [3.0],
+        [4.0],
+        [5.0],
+    ]
+    assert create.call_count == 3
+
+
+def test_generate_embeddings_retries_rate_limited_batch(provider):
+    provider, create, mock_sleep = provider
+    create.side_effect = [
+        _error(RateLimitError, 429, {"retry-after": "3"}),
+        _response(["a", "bb"]),
+    ]
+
+    assert provider.generate_embeddings(["a", "bb"]) == [[1.0], [2.0]]
+    assert create.call_count == 2
+    mock_sleep.assert_any_call(3.0)
+
+
+def test_generate_embeddings_keeps_successful_batches(provider):
+    provider, create, _ = provider
+
+    def create_embeddings(input, **kwargs):
+        if "bad" in input:
+            raise _error(BadRequestError, 400)
+        return _response(input)
+
+    create.side_effect = create_embeddings
+
+    assert provider.generate_embeddings(["a", "bb", "bad", "d"]) == [
+        [1.0],
+        [2.0],
+        [],
+        [],
+    ]
+
+
+def test_batch_texts_respects_token_limit(provider):
+    provider, _, _ = provider
+    provider.batch_size = 100
+    max_chars = provider.MAX_BATCH_TOKENS * provider.CHARS_PER_TOKEN
+    texts = ["x" * (max_chars // 2)] * 3
+    assert [
+        (start, len(batch)) for start, batch in provider._batch_texts(texts)
+    ] == [(0, 2), (2, 1)]
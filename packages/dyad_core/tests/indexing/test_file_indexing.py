@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing import file_indexing
+from dyad.indexing.file_indexing import (
+    CACHE_FILENAME,
+    LEGACY_CACHE_FILENAME,
+    FileIndex,
+    clear_cache_and_restart,
+)
+from dyad.indexing.file_update import FileStat
+from dyad.workspace_util import (
+    get_workspace_root_path,
+    get_workspace_storage_dir,
+)
+
+
+class _TestFileIndex(FileIndex):
+    SAVE_DELAY_SECONDS = 0.1
+
+
+def _path(relative_path: str) -> str:
+    return os.path.join(get_workspace_root_path(), relative_path)
+
+
+def test_cache_round_trip(tmp_path):
+    cache_path = str(tmp_path / CACHE_FILENAME)
+    index = FileIndex(cache_path)
+    index.files = {
+        _path("src/app.py"): FileStat(1_700_000_000_123_456_789, 42, 7),
+        # Not valid UTF-8.
+        _path("caf\udce9.py"): FileStat(1, 0, 2**63),
+    }
+    index.save_cache()
+
+    loaded = FileIndex(cache_path)
+    loaded.load_cache()
+    assert loaded.files == index.files
+
+
+def test_concurrent_saves_write_a_complete_cache(tmp_path):
+    cache_path = str(tmp_path / CACHE_FILENAME)
+    index = FileIndex(cache_path)
+    index.files = {
+        _path(f"src/file_{i}.py"): FileStat(i, i, i) for i in range(1000)
+    }
+
+    # E.g. the save timer and full indexing.
+    threads = [threading.Thread(target=index.save_cache) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert os.listdir(tmp_path) == [CACHE_FILENAME]
+    loaded = FileIndex(cache_path)
+    loaded.load_cache()
+    assert loaded.files == index.files
+
+
+def test_legacy_cache_is_migrated(tmp_path):
+    cache_path = str(tmp_path / CACHE_FILENAME)
+    legacy_cache_path = tmp_path / LEGACY_CACHE_FILENAME
+    legacy_cache_path.write_text(
+        json.dumps(
+            {
+                "files": {
+                    _path("a.py"): [1_000, 10, 3],
+                    # Older versions only stored the mtime.
+                    _path("b.py"): 1.5,
+                }
+            }
+        )
+    )
+
+    index = FileIndex(cache_path)
+    index.load_cache()
+    expected = {
+        _path("a.py"): FileStat(1_000, 10, 3),
+        _path("b.py"): FileStat(1_500_000_000, -1, 0),
+    }
+    assert index.files == expected
+
+    index.save_cache()
+    assert not legacy_cache_path.exists()
+    loaded = FileIndex(cache_path)
+    loaded.load_cache()
+    assert loaded.files == expected
+
+
+def test_saves_are_debounced(tmp_path):
+    cache_path = str(tmp_path / CACHE_FILENAME)
+    index = _TestFileIndex(cache_path)
+    os.makedirs(_path("file_index_test"), exist_ok=True)
+    paths = [_path("file_index_test/a.py"), _path("file_index_test/b.py")]
+    for path in paths:
+        with open(path, "w") as f:
+            f.write(path)
+        index.add_file(path)
+    assert not os.path.exists(cache_path)
+
+    time.sleep(0.3)
+    loaded = FileIndex(cache_path)
+    loaded.load_cache()
+    assert sorted(loaded.files) == paths
+
+
+def test_clear_cache_and_restart_cancels_the_scheduled_save():
+    cache_path = os.path.join(get_workspace_storage_dir(), CACHE_FILENAME)
+    index = _TestFileIndex(cache_path)
+    index.save_cache()
+    os.makedirs(_path("file_index_test"), exist_ok=True)
+    with open(_path("file_index_test/a.py"), "w") as f:
+        f.write("a")
+    index.add_file(_path("file_index_test/a.py"))
+
+    with (
+        patch.object(file_indexing, "_current_index", index),
+        patch.object(file_indexing, "activate") as activate,
+        patch.object(
+            file_indexing, "maybe_get_semantic_search_store", return_value=None
+        ),
+    ):
+        clear_cache_and_restart()
+        activate.assert_called_once()
+
+    time.sleep(0.3)
+    # The old index isn't written back.
+    assert not os.path.exists(cache_path)
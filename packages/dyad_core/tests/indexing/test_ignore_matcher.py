@@ -0,0 +1,61 @@
+import os
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.ignore_matcher import IgnoreMatcher
+from dyad.settings.workspace_settings import get_workspace_settings
+
+
+def _write(path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_ignore_matcher_nested_gitignores(tmp_path):
+    _write(tmp_path / ".gitignore", "*.log\nbuild/\n")
+    _write(tmp_path / "pkg" / ".gitignore", "!keep.log\n/dist\n")
+    _write(tmp_path / ".git" / "info" / "exclude", "secret.txt\n")
+    matcher = IgnoreMatcher(str(tmp_path), use_dyadignore=False)
+
+    assert matcher.is_ignored("a.log")
+    assert not matcher.is_ignored("pkg/keep.log")
+    assert matcher.is_ignored("pkg/other.log")
+    assert matcher.is_ignored("pkg/dist", is_dir=True)
+    assert not matcher.is_ignored("pkg/src/dist", is_dir=True)
+    assert matcher.is_ignored("pkg/build/keep.log")
+    assert matcher.is_ignored("lib/secret.txt")
+    assert not matcher.is_ignored("pkg/main.py")
+
+
+def test_ignore_matcher_invalidate(tmp_path):
+    matcher = IgnoreMatcher(str(tmp_path), use_dyadignore=True)
+    assert not matcher.is_ignored("sub/out.txt")
+
+    _write(tmp_path / "sub" / ".gitignore", "out.txt\n")
+    _write(tmp_path / ".dyadignore", "notes/\n")
+    assert matcher.is_ignore_file("sub/.gitignore")
+    matcher.invalidate()
+    assert matcher.is_ignored("sub/out.txt")
+    assert matcher.is_ignored("notes/todo.md")
+
+
+def test_ignore_matcher_follows_ignore_files_setting(tmp_path):
+    _write(tmp_path / ".dyadignore", "notes/\n")
+    settings = get_workspace_settings()
+    enabled = settings.ignore_files_enabled
+    try:
+        settings.ignore_files_enabled = True
+        settings.save()
+        matcher = IgnoreMatcher(str(tmp_path))
+        assert matcher.is_ignored("notes/todo.md")
+
+        settings.ignore_files_enabled = False
+        settings.save()
+        matcher.invalidate()
+        assert not matcher.is_ignored("notes/todo.md")
+        assert not matcher.is_ignore_file(".dyadignore")
+    finally:
+        settings.ignore_files_enabled = enabled
+        settings.save()
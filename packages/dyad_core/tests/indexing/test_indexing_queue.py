@@ -0,0 +1,68 @@
+import os
+import threading
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.indexing_queue import IndexingQueue
+
+
+class _TestQueue(IndexingQueue):
+    DEBOUNCE_SECONDS = 0.05
+    MAX_BATCH_SIZE = 2
+    MAX_WORKERS = 1
+
+
+def test_indexing_queue_coalesces_and_prioritizes():
+    batches = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def process_batch(paths):
+        batches.append(paths)
+        started.set()
+        release.wait(5)
+
+    queue = _TestQueue(process_batch)
+    # Held in progress while the following changes arrive.
+    queue.enqueue(["first.py"])
+    assert started.wait(5)
+    queue.enqueue(["a.py", "b.py", "a.py", "c.py"])
+    queue.prioritize(["c.py"])
+    release.set()
+
+    assert queue.wait_until_idle(5)
+    queue.stop()
+    # Each path once, prioritized ones first.
+    assert batches[0] == ["first.py"]
+    assert batches[1][0] == "c.py"
+    assert sorted(path for batch in batches[1:] for path in batch) == [
+        "a.py",
+        "b.py",
+        "c.py",
+    ]
+
+
+def test_indexing_queue_ignores_paths_after_stop():
+    batches = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def process_batch(paths):
+        batches.append(paths)
+        started.set()
+        release.wait(5)
+
+    queue = _TestQueue(process_batch)
+    queue.enqueue(["first.py"])
+    assert started.wait(5)
+    queue.stop()
+    queue.enqueue(["late.py"])
+    # The batch in progress is finished before the workers exit.
+    assert not queue.join(timeout=0.05)
+    release.set()
+
+    assert queue.join(timeout=5)
+    assert queue.wait_until_idle(0)
+    assert batches == [["first.py"]]
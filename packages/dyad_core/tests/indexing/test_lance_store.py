@@ -0,0 +1,196 @@
+import os
+import random
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.lance_store import (
+    LanceEmbeddingStore,
+    get_embedding_record_type,
+)
+from dyad.settings.user_settings import (
+    EmbeddingModelConfig,
+    VectorIndexSettings,
+)
+
+DIM = 16
+EmbeddingRecord = get_embedding_record_type(DIM)
+
+
+class _TestStore(LanceEmbeddingStore):
+    # Index maintenance is run explicitly.
+    FTS_REBUILD_DELAY_SECONDS = 3600
+
+
+def _store(tmp_path) -> LanceEmbeddingStore:
+    return _TestStore(
+        str(tmp_path / "embeddings.lance"),
+        EmbeddingModelConfig(
+            provider_id="test", embedding_model_name="test", embedding_dim=DIM
+        ),
+    )
+
+
+def _record(source_path: str, chunk_index: int, rng: random.Random):
+    return EmbeddingRecord(
+        file_path=f"{source_path}#chunk_{chunk_index}",
+        source_path=source_path,
+        chunk_index=chunk_index,
+        file_hash=source_path,
+        embedding=[rng.random() for _ in range(DIM)],
+        code=f"chunk {chunk_index} of {source_path}",
+        start_line=chunk_index + 1,
+        end_line=chunk_index + 1,
+    )
+
+
+def _add_rows(store: LanceEmbeddingStore, count: int, rng: random.Random):
+    start = store.table.count_rows()
+    store.add_embeddings(
+        [_record(f"{i}.py", 0, rng) for i in range(start, start + count)]
+    )
+
+
+def _wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_fts_index_rebuild_is_debounced(tmp_path):
+    class DebouncedStore(_TestStore):
+        FTS_REBUILD_DELAY_SECONDS = 0.2
+
+    rng = random.Random(0)
+    store = DebouncedStore(
+        str(tmp_path / "embeddings.lance"),
+        EmbeddingModelConfig(
+            provider_id="test", embedding_model_name="test", embedding_dim=DIM
+        ),
+    )
+    with patch.object(
+        store, "run_index_maintenance", wraps=store.run_index_maintenance
+    ) as maintenance:
+        try:
+            for _ in range(3):
+                _add_rows(store, 1, rng)
+                time.sleep(0.05)
+            # Rebuilt once for the burst of writes.
+            assert _wait_for(lambda: store.generation == 4)
+            time.sleep(0.3)
+            assert maintenance.call_count == 1
+            fts_results = (
+                store.table.search("chunk", query_type="fts")
+                .limit(10)
+                .to_list()
+            )
+            assert len(fts_results) == 3
+
+            with store.defer_index_maintenance():
+                with store.defer_index_maintenance():
+                    _add_rows(store, 1, rng)
+                _add_rows(store, 1, rng)
+                time.sleep(0.3)
+                assert maintenance.call_count == 1
+            # Scheduled once the outermost block exits.
+            assert _wait_for(lambda: maintenance.call_count == 2)
+            assert _wait_for(lambda: store.generation == 7)
+        finally:
+            store.clear()
+
+
+def test_vector_index_is_built_and_retrained(tmp_path):
+    settings = SimpleNamespace(
+        vector_index=VectorIndexSettings(min_rows=100, retrain_growth=0.5)
+    )
+    rng = random.Random(0)
+    store = _store(tmp_path)
+    with patch(
+        "dyad.indexing.lance_store.get_readonly_user_settings",
+        return_value=settings,
+    ):
+        try:
+            # PQ training needs 256 rows, even though `min_rows` is lower.
+            _add_rows(store, 200, rng)
+            store.run_index_maintenance()
+            status = store.get_vector_index_status()
+            assert (status.state, status.min_rows) == ("flat", 256)
+
+            _add_rows(store, 100, rng)
+            store.run_index_maintenance()
+            status = store.get_vector_index_status()
+            assert (status.state, status.indexed_rows) == ("ready", 300)
+
+            # Not grown enough to retrain.
+            _add_rows(store, 100, rng)
+            with patch.object(
+                store, "build_vector_index", wraps=store.build_vector_index
+            ) as build:
+                store.run_index_maintenance()
+                build.assert_not_called()
+
+                _add_rows(store, 100, rng)
+                store.run_index_maintenance()
+                build.assert_called_once()
+            status = store.get_vector_index_status()
+            assert (status.state, status.indexed_rows) == ("ready", 500)
+        finally:
+            store.clear()
+
+
+def _chunks_by_file(store: LanceEmbeddingStore) -> dict[str, list[str]]:
+    chunks: dict[str, list[str]] = {}
+    for row in sorted(
+        store.table.to_arrow().to_pylist(),
+        key=lambda row: (row["source_path"], row["chunk_index"]),
+    ):
+        chunks.setdefault(row["source_path"], []).append(row["code"])
+    return chunks
+
+
+def test_replace_embeddings_and_compact(tmp_path):
+    class CompactedStore(_TestStore):
+        OLD_VERSION_RETENTION = timedelta(0)
+
+    rng = random.Random(0)
+    store = CompactedStore(
+        str(tmp_path / "embeddings.lance"),
+        EmbeddingModelConfig(
+            provider_id="test", embedding_model_name="test", embedding_dim=DIM
+        ),
+    )
+    try:
+        store.add_embeddings(
+            [
+                _record("a.py", 0, rng),
+                _record("a.py", 1, rng),
+                _record("it's.py", 0, rng),
+            ]
+        )
+        # The previous chunks of the file are all replaced.
+        new_chunk = _record("a.py", 0, rng).model_copy(
+            update={"code": "new chunk"}
+        )
+        store.replace_embeddings(["a.py"], [new_chunk])
+        assert _chunks_by_file(store) == {
+            "a.py": ["new chunk"],
+            "it's.py": ["chunk 0 of it's.py"],
+        }
+        store.remove_embeddings(["it's.py"])
+        assert _chunks_by_file(store) == {"a.py": ["new chunk"]}
+
+        assert len(store.table.list_versions()) > 1
+        store.compact()
+        assert len(store.table.list_versions()) == 1
+        assert len(store.table.to_lance().get_fragments()) == 1
+        assert _chunks_by_file(store) == {"a.py": ["new chunk"]}
+    finally:
+        store.clear()
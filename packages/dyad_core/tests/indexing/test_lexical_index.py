@@ -0,0 +1,132 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.lexical_index import (
+    LexicalIndex,
+    SymbolDefinition,
+    TextMatch,
+    _get_required_literals,
+    fuse_rankings,
+    symbol_search,
+)
+
+USERS_PY = """class UserRepository:
+    def get_user_name(self, user_id):
+        return self.names[user_id]
+"""
+BILLING_TS = """export function createInvoice(userId: string) {
+  return repository.getUserName(userId);
+}
+"""
+
+
+def _add_file(index: LexicalIndex, root: Path, file_path: str, text: str):
+    # `grep` reads the files from disk, the rest of the index doesn't.
+    (root / file_path).parent.mkdir(parents=True, exist_ok=True)
+    (root / file_path).write_text(text)
+    index.add_file(file_path, text)
+
+
+def _index(root: Path) -> LexicalIndex:
+    index = LexicalIndex(root)
+    _add_file(index, root, "src/users.py", USERS_PY)
+    _add_file(index, root, "web/billing.ts", BILLING_TS)
+    _add_file(
+        index, root, "README.md", "How to create an invoice for a user.\n"
+    )
+    return index
+
+
+def test_search_ranks_by_terms_and_definitions(tmp_path):
+    index = _index(tmp_path)
+
+    results = index.search("where is the UserRepository defined")
+    assert results[0].file_path == "src/users.py"
+    # camelCase and snake_case identifiers match the same words.
+    assert {r.file_path for r in index.search("create invoice")} == {
+        "web/billing.ts",
+        "README.md",
+    }
+    # A file defining a symbol named in the query is ranked first.
+    assert index.search("createInvoice")[0].file_path == "web/billing.ts"
+    assert index.find_definitions("get_user_name") == [
+        SymbolDefinition(
+            "get_user_name", "function_definition", "src/users.py", 2
+        )
+    ]
+
+    index.remove_file("web/billing.ts")
+    assert [r.file_path for r in index.search("create invoice")] == [
+        "README.md"
+    ]
+
+
+def test_grep_uses_trigrams_and_verifies_matches(tmp_path):
+    index = _index(tmp_path)
+
+    assert index.grep("getUserName") == [
+        TextMatch(
+            "web/billing.ts", 2, "  return repository.getUserName(userId);"
+        )
+    ]
+    assert [
+        (m.file_path, m.line) for m in index.grep(r"user_?id\)", regex=True)
+    ] == [("src/users.py", 2)]
+    assert index.grep("getusername") == []
+    assert len(index.grep("getusername", ignore_case=True)) == 1
+    assert _get_required_literals(r"abc(def)?ghi\.x") == ["abc", "ghi"]
+    assert _get_required_literals("foo|bar") == []
+
+    # Deleted files are skipped until the update removing them.
+    (tmp_path / "web/billing.ts").unlink()
+    assert index.grep("getUserName") == []
+
+
+def test_remove_file_removes_trigram_postings(tmp_path):
+    index = _index(tmp_path)
+    postings = {
+        key: set(value) for key, value in index._trigram_postings.items()
+    }
+
+    _add_file(index, tmp_path, "notes.txt", "Ünïcode notes\n")
+    index.remove_file("notes.txt")
+
+    assert index._trigram_postings == postings
+
+
+def test_search_boosts_every_file_with_quoted_text(tmp_path):
+    index = LexicalIndex(tmp_path)
+    # More matching lines than `grep` returns by default.
+    _add_file(index, tmp_path, "a.log", "retry failed\n" * 300)
+    _add_file(index, tmp_path, "b.log", "retry failed\n")
+    _add_file(index, tmp_path, "c.log", "nothing here\n")
+
+    results = index.search('"retry failed"')
+    assert {r.file_path for r in results} == {"a.log", "b.log"}
+    assert all(r.score >= index.QUOTED_TEXT_BOOST for r in results)
+
+
+def test_symbol_search_finds_definitions_then_references(tmp_path):
+    index = LexicalIndex(tmp_path)
+    _add_file(index, tmp_path, "src/users.py", USERS_PY)
+    _add_file(
+        index, tmp_path, "src/main.py", "from users import UserRepository\n"
+    )
+    _add_file(index, tmp_path, "README.md", "The repository of users.\n")
+
+    with patch("dyad.indexing.lexical_index._lexical_index", index):
+        assert symbol_search(query="How is UserRepository used?") == [
+            "src/users.py",
+            "src/main.py",
+        ]
+        # Words which aren't defined anywhere don't match.
+        assert symbol_search(query="users repository") == []
+
+
+def test_fuse_rankings():
+    assert fuse_rankings([["a", "b", "c"], ["c", "d"]]) == ["c", "a", "b", "d"]
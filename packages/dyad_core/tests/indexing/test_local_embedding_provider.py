@@ -0,0 +1,45 @@
+import os
+from unittest.mock import patch
+
+import numpy as np
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.embeddings.local_embedding_provider import (
+    MODEL_PATH_ENV_VAR,
+    LocalEmbeddingProvider,
+    mean_pool,
+)
+
+
+def test_mean_pool_ignores_padding():
+    token_embeddings = np.array(
+        [[[3.0, 0.0], [0.0, 4.0]], [[1.0, 1.0], [100.0, 100.0]]]
+    )
+    attention_mask = np.array([[1, 1], [1, 0]])
+
+    embeddings = mean_pool(token_embeddings, attention_mask)
+    np.testing.assert_allclose(
+        embeddings, [[0.6, 0.8], [2**-0.5, 2**-0.5]], rtol=1e-6
+    )
+
+
+def test_generate_embeddings_keeps_order(tmp_path):
+    provider = LocalEmbeddingProvider()
+    with patch.dict(os.environ, {MODEL_PATH_ENV_VAR: str(tmp_path)}):
+        assert not provider.is_available()
+
+    def embed(texts):
+        if "bad" in texts:
+            raise RuntimeError("bad batch")
+        return [[float(len(text))] for text in texts]
+
+    provider.BATCH_SIZE = 2
+    with patch.object(provider, "_embed", side_effect=embed):
+        embeddings = provider.generate_embeddings(
+            ["ccc", "a", "bad", "bb", "dddd"]
+        )
+    # Texts are batched by length, a failed batch only fails its own texts.
+    assert embeddings == [[], [1.0], [], [2.0], [4.0]]
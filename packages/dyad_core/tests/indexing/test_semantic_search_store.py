@@ -0,0 +1,205 @@
+import logging
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.indexing.file_update import FileStat, FileUpdate
+from dyad.indexing.semantic_search_store import (
+    SemanticSearchResult,
+    SemanticSearchStore,
+    _LRUCache,
+)
+from dyad.settings.user_settings import EmbeddingModelConfig
+from dyad.storage.models.embedding_metadata import (
+    delete_embedding_metadata_for_model,
+)
+
+
+def _store() -> SemanticSearchStore:
+    # Bypasses __init__, which sets up the embedding provider and tables.
+    store = object.__new__(SemanticSearchStore)
+    store.logger = logging.getLogger(__name__)
+    store.embedding_model_config = EmbeddingModelConfig(
+        provider_id="openai", embedding_model_name="small", embedding_dim=2
+    )
+    store.embedding_provider = MagicMock()
+    store.embedding_provider.generate_single_embedding.return_value = [1, 0]
+    store.store = MagicMock(generation=0)
+    store.store.search_similar_embeddings.return_value = [
+        SimpleNamespace(source_path="a.py", start_line=1, end_line=3, code="a")
+    ]
+    store._query_embedding_cache = _LRUCache(2)
+    store._search_result_cache = _LRUCache(2)
+    return store
+
+
+def test_search_caches_embeddings_and_results():
+    store = _store()
+    expected = [SemanticSearchResult("a.py", 1, 3, "a")]
+
+    assert store.search_chunks("find  users") == expected
+    assert store.search_chunks(" find users\n") == expected
+    assert store.embedding_provider.generate_single_embedding.call_count == 1
+    assert store.store.search_similar_embeddings.call_count == 1
+
+    # A write to the store invalidates the results but not the embedding.
+    store.store.generation = 1
+    assert store.search_chunks("find users") == expected
+    assert store.embedding_provider.generate_single_embedding.call_count == 1
+    assert store.store.search_similar_embeddings.call_count == 2
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = _LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def _write_file(path, content: str, *, age: float):
+    path.write_text(content)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def _processing_store(tmp_path) -> SemanticSearchStore:
+    store = _store()
+    store.branch = "main"
+    store.embedding_model_config = EmbeddingModelConfig(
+        provider_id="test", embedding_model_name="test-stat", embedding_dim=2
+    )
+    delete_embedding_metadata_for_model(store.embedding_model_config)
+    store.embedding_cache = None
+    store.embedding_provider.generate_embeddings.side_effect = lambda chunks: [
+        [1.0, 0.0] for _ in chunks
+    ]
+    store.workspace_root = tmp_path
+    return store
+
+
+def _process(
+    store: SemanticSearchStore, *file_paths: str, deleted: bool = False
+) -> list[str]:
+    """Processes edits (or deletes) of the files, returns the files read."""
+    with patch.object(
+        store, "_read_file_content", wraps=store._read_file_content
+    ) as read:
+        store.process_updates(
+            [
+                FileUpdate(
+                    type="delete" if deleted else "edit",
+                    file_path=file_path,
+                    modified_timestamp=time.time(),
+                    stat=None
+                    if deleted
+                    else FileStat.from_path(
+                        str(store.workspace_root / file_path)
+                    ),
+                )
+                for file_path in file_paths
+            ]
+        )
+    return [call.args[0] for call in read.call_args_list]
+
+
+def test_process_updates_skips_files_with_unchanged_stat(tmp_path):
+    store = _processing_store(tmp_path)
+    _write_file(tmp_path / "old.py", "x = 1\n", age=60)
+    # Modified within `RACY_STAT_SECONDS`.
+    _write_file(tmp_path / "new.py", "y = 1\n", age=0)
+
+    try:
+        assert _process(store, "old.py", "new.py") == ["old.py", "new.py"]
+        assert store.store.replace_embeddings.call_count == 1
+
+        # The recently modified file may change again without its stat
+        # changing, so it's read again (but not embedded, it's unchanged).
+        assert _process(store, "old.py", "new.py") == ["new.py"]
+
+        # Touched without changing the content: read once to store its stat.
+        _write_file(tmp_path / "old.py", "x = 1\n", age=30)
+        assert _process(store, "old.py") == ["old.py"]
+        assert _process(store, "old.py") == []
+        assert store.store.replace_embeddings.call_count == 1
+
+        _write_file(tmp_path / "old.py", "x = 2\n", age=20)
+        assert _process(store, "old.py") == ["old.py"]
+        assert store.store.replace_embeddings.call_count == 2
+    finally:
+        delete_embedding_metadata_for_model(store.embedding_model_config)
+
+
+def test_process_updates_embeds_restored_files(tmp_path):
+    store = _processing_store(tmp_path)
+    _write_file(tmp_path / "a.py", "x = 1\n", age=60)
+
+    try:
+        _process(store, "a.py")
+        assert store.store.replace_embeddings.call_count == 1
+
+        # Its chunks are removed, so restoring it with the same content must
+        # embed it again.
+        (tmp_path / "a.py").unlink()
+        _process(store, "a.py", deleted=True)
+        store.store.remove_embeddings.assert_called_with(["a.py"])
+        _write_file(tmp_path / "a.py", "x = 1\n", age=30)
+        assert _process(store, "a.py") == ["a.py"]
+        assert store.store.replace_embeddings.call_count == 2
+        assert store.store.replace_embeddings.call_args.args[0] == ["a.py"]
+    finally:
+        delete_embedding_metadata_for_model(store.embedding_model_config)
+
+
+def test_process_updates_embeds_restored_files_with_unchanged_stat(tmp_path):
+    store = _processing_store(tmp_path)
+    _write_file(tmp_path / "a.py", "x = 1\n", age=60)
+
+    try:
+        _process(store, "a.py")
+        # Moved away and back, so its mtime, size and inode are unchanged.
+        os.rename(tmp_path / "a.py", tmp_path / "a.py.bak")
+        _process(store, "a.py", deleted=True)
+        os.rename(tmp_path / "a.py.bak", tmp_path / "a.py")
+        assert _process(store, "a.py") == ["a.py"]
+        assert store.store.replace_embeddings.call_count == 2
+    finally:
+        delete_embedding_metadata_for_model(store.embedding_model_config)
+
+
+def test_process_updates_retries_files_with_a_failed_chunk_in_a_later_batch(
+    tmp_path,
+):
+    store = _processing_store(tmp_path)
+    store.EMBEDDING_BATCH_SIZE = 1
+    _write_file(
+        tmp_path / "a.py",
+        "".join(f"def f{i}():\n    return {i}\n\n\n" for i in range(200)),
+        age=60,
+    )
+    # The first chunk of the file is embedded, the next ones fail.
+    store.embedding_provider.generate_embeddings.side_effect = [
+        [[1.0, 0.0]],
+        [[]],
+        [[]],
+    ]
+
+    try:
+        _process(store, "a.py")
+        assert store.embedding_provider.generate_embeddings.call_count == 3
+
+        store.embedding_provider.generate_embeddings.side_effect = (
+            lambda chunks: [[1.0, 0.0] for _ in chunks]
+        )
+        assert _process(store, "a.py") == ["a.py"]
+        assert store.embedding_provider.generate_embeddings.call_count == 6
+        assert _process(store, "a.py") == []
+    finally:
+        delete_embedding_metadata_for_model(store.embedding_model_config)
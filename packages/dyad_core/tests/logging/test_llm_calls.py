@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.chat import LanguageModelRequest
+from dyad.logging.llm_calls import (
+    LanguageModelCallBlob,
+    LanguageModelCallsTable,
+    LanguageModelResponse,
+    llm_call_logger,
+)
+from dyad.logging.logs_sql_engine import engine
+from dyad.public.chat_message import ChatMessage, Content
+from dyad.public.input import Input
+from sqlmodel import Session, delete, select
+
+SYSTEM_PROMPT = "You are a helpful assistant. " * 50
+HISTORY = [ChatMessage(content=Content.from_text("Earlier message"))]
+
+
+def _request(text: str) -> LanguageModelRequest:
+    return LanguageModelRequest(
+        input=Input.from_text(text),
+        language_model_id="test-model",
+        system_prompt=SYSTEM_PROMPT,
+        history=HISTORY,
+    )
+
+
+def _call_ids() -> list[int]:
+    with Session(engine) as session:
+        return list(
+            session.exec(
+                select(LanguageModelCallsTable.id).order_by(
+                    LanguageModelCallsTable.id  # type: ignore
+                )
+            )
+        )
+
+
+def _payload_bytes(call_id: int) -> int:
+    with Session(engine) as session:
+        record = session.get(LanguageModelCallsTable, call_id)
+        assert record is not None
+        return json.loads(record.request_json)["payload_bytes"]
+
+
+def test_calls_share_blobs_and_count_referenced_bytes():
+    call_logger = llm_call_logger()
+    call_logger.clear_calls()
+
+    first_id = call_logger.record_request(_request("First"))
+    second_id = call_logger.record_request(_request("Second"))
+    call_logger.record_response(second_id, LanguageModelResponse(text="Answer"))
+    call_logger.flush()
+
+    with Session(engine) as session:
+        blob_count = len(session.exec(select(LanguageModelCallBlob)).all())
+    # Two inputs, one system prompt, one history message and one response.
+    assert blob_count == 5
+    # The second call reuses the system prompt and history, which still
+    # count towards its size.
+    assert _payload_bytes(second_id) > len(
+        zlib.compress(SYSTEM_PROMPT.encode())
+    )
+
+    with Session(engine) as session:
+        session.exec(  # type: ignore
+            delete(LanguageModelCallsTable).where(
+                LanguageModelCallsTable.id == first_id  # type: ignore
+            )
+        )
+        session.commit()
+    assert call_logger.delete_orphaned_blobs() == 1
+
+    record = call_logger.get_call(second_id)
+    assert record is not None
+    assert record.request.system_prompt == SYSTEM_PROMPT
+    assert record.request.input.text == "Second"
+    assert record.response.text == "Answer"
+
+
+def test_write_behind_with_another_writer():
+    call_logger = llm_call_logger()
+    call_logger.clear_calls()
+
+    first = call_logger.record_request(_request("First"))
+    call_logger.flush()
+    # A row written by another process sharing the database.
+    with Session(engine) as session:
+        session.add(
+            LanguageModelCallsTable(request_json="{}", response_json="{}")
+        )
+        session.commit()
+    second = call_logger.record_request(_request("Second"))
+    call_logger.record_response(second, LanguageModelResponse(text="Two"))
+    call_logger.record_response(first, LanguageModelResponse(text="One"))
+    call_logger.flush()
+
+    first_id, other_id, second_id = _call_ids()
+    first_record = call_logger.get_call(first_id)
+    second_record = call_logger.get_call(second_id)
+    assert first_record is not None and second_record is not None
+    assert first_record.request.input.text == "First"
+    assert first_record.response.text == "One"
+    assert second_record.request.input.text == "Second"
+    assert second_record.response.text == "Two"
+
+
+def test_failed_write_does_not_drop_the_batch():
+    call_logger = llm_call_logger()
+    call_logger.clear_calls()
+
+    def failing_write(session: Session):
+        raise ValueError("failed")
+
+    handle = 1_000_000
+    call_logger._write(
+        [
+            failing_write,
+            lambda session: call_logger._write_request(
+                session, handle, datetime.utcnow(), _request("Kept")
+            ),
+        ]
+    )
+
+    (call_id,) = _call_ids()
+    record = call_logger.get_call(call_id)
+    assert record is not None
+    assert record.request.input.text == "Kept"
+
+
+def test_reads_dont_wait_long_for_a_busy_writer():
+    call_logger = llm_call_logger()
+    call_logger.clear_calls()
+    call_logger.record_request(_request("Committed"))
+    call_logger.flush()
+
+    writer_released = threading.Event()
+    call_logger._queue.put(lambda session: writer_released.wait(timeout=30))
+    try:
+        start_time = time.monotonic()
+        summaries = call_logger.get_recent_call_summaries()
+        # What's committed is read without waiting for the writer.
+        assert [summary.id for summary in summaries] == _call_ids()
+        assert call_logger.get_call(_call_ids()[0]) is not None
+        assert (
+            time.monotonic() - start_time
+            < 4 * call_logger.READ_FLUSH_TIMEOUT_SECONDS
+        )
+    finally:
+        writer_released.set()
+    assert call_logger.flush()
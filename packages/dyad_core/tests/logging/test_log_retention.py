@@ -0,0 +1,104 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.logging.llm_calls import LanguageModelCallsTable, llm_call_logger
+from dyad.logging.log_retention import prune_logs
+from dyad.logging.logging import LogEntry, clear_logs, logger
+from dyad.logging.logs_sql_engine import engine
+from dyad.settings.user_settings import LogRetentionSettings
+from sqlmodel import Session, select
+
+# Large enough that only the limit under test applies.
+UNLIMITED = LogRetentionSettings(
+    max_age_days=10_000,
+    max_log_entries=1_000_000,
+    max_log_bytes=1 << 40,
+    max_llm_calls=1_000_000,
+    max_llm_call_bytes=1 << 40,
+)
+
+
+def _reset():
+    # Records logged by earlier tests would otherwise arrive mid-test.
+    for handler in logger().handlers:
+        handler.flush()
+    clear_logs()
+    llm_call_logger().clear_calls()
+
+
+def _add_logs(messages: list[str], *, age: timedelta = timedelta()):
+    with Session(engine) as session:
+        for message in messages:
+            session.add(
+                LogEntry(
+                    timestamp=datetime.utcnow() - age,
+                    level="INFO",
+                    message=message,
+                    module=__name__,
+                )
+            )
+        session.commit()
+
+
+def _log_messages() -> list[str]:
+    with Session(engine) as session:
+        return [
+            entry.message
+            for entry in session.exec(
+                select(LogEntry)
+                .where(LogEntry.module == __name__)
+                .order_by(LogEntry.id)  # type: ignore
+            )
+        ]
+
+
+def test_prune_logs_by_age():
+    _reset()
+    _add_logs(["old 1", "old 2"], age=timedelta(days=3))
+    _add_logs(["new 1", "new 2"])
+
+    assert prune_logs(UNLIMITED.model_copy(update={"max_age_days": 2})) == 2
+    assert _log_messages() == ["new 1", "new 2"]
+
+
+def test_prune_logs_by_row_count():
+    _reset()
+    _add_logs(["1", "2", "3"])
+
+    assert prune_logs(UNLIMITED.model_copy(update={"max_log_entries": 2})) == 1
+    assert _log_messages() == ["2", "3"]
+
+
+def test_prune_logs_by_bytes():
+    _reset()
+    _add_logs(["a" * 100, "b" * 100, "c" * 100])
+
+    assert prune_logs(UNLIMITED.model_copy(update={"max_log_bytes": 250})) == 1
+    assert _log_messages() == ["b" * 100, "c" * 100]
+
+    # The blobs a call references count towards its size.
+    with Session(engine) as session:
+        for _ in range(3):
+            session.add(
+                LanguageModelCallsTable(
+                    request_json=json.dumps({"payload_bytes": 1000}),
+                    response_json="{}",
+                )
+            )
+        session.commit()
+        call_ids = list(session.exec(select(LanguageModelCallsTable.id)))
+
+    assert (
+        prune_logs(UNLIMITED.model_copy(update={"max_llm_call_bytes": 2500}))
+        == 1
+    )
+    with Session(engine) as session:
+        assert (
+            sorted(session.exec(select(LanguageModelCallsTable.id)))
+            == sorted(call_ids)[1:]
+        )
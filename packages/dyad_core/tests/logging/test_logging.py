@@ -0,0 +1,82 @@
+import logging
+import os
+import threading
+import time
+from unittest.mock import patch
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.logging.logging import SQLiteHandler, clear_logs, get_recent_logs
+
+
+def _record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(__name__, level, __file__, 1, message, None, None)
+
+
+def _messages(prefix: str) -> list[str]:
+    # Other tests may log through the dyad logger at the same time.
+    return sorted(
+        entry.message
+        for entry in get_recent_logs(limit=1000)
+        if entry.message.startswith(prefix)
+    )
+
+
+def test_sqlite_handler_writes_in_batches():
+    clear_logs()
+    handler = SQLiteHandler(batch_size=3, flush_interval=60)
+    batch_sizes = []
+    write_rows = handler._write_rows
+
+    def record_batch(rows):
+        batch_sizes.append(len(rows))
+        write_rows(rows)
+
+    with patch.object(handler, "_write_rows", side_effect=record_batch):
+        for i in range(7):
+            handler.emit(_record(f"batch {i}"))
+        # Full batches are written without waiting for the interval.
+        handler.flush()
+    handler.close()
+
+    assert batch_sizes == [3, 3, 1]
+    assert _messages("batch ") == [f"batch {i}" for i in range(7)]
+
+
+def test_sqlite_handler_drops_records_when_the_queue_is_full():
+    clear_logs()
+    handler = SQLiteHandler(batch_size=1, flush_interval=60, max_queue_size=2)
+    writing = threading.Event()
+    release = threading.Event()
+    write_rows = handler._write_rows
+
+    def blocking_write(rows):
+        writing.set()
+        release.wait(5)
+        write_rows(rows)
+
+    with patch.object(handler, "_write_rows", side_effect=blocking_write):
+        handler.emit(_record("overflow 0"))
+        assert writing.wait(5)
+        handler.emit(_record("overflow 1"))
+        handler.emit(_record("overflow 2"))
+
+        start = time.monotonic()
+        handler.emit(_record("overflow info"))
+        # Info records are dropped right away.
+        assert time.monotonic() - start < 0.1
+        start = time.monotonic()
+        handler.emit(_record("overflow warning", logging.WARNING))
+        # Warnings wait a little for space before they're dropped.
+        assert time.monotonic() - start >= 0.1
+
+        release.set()
+        handler.flush()
+    handler.close()
+
+    assert _messages("overflow ") == ["overflow 0", "overflow 1", "overflow 2"]
+    assert _messages("Dropped ") == [
+        "Dropped 2 log records because the log queue was full"
+    ]
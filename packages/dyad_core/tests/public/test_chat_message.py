@@ -0,0 +1,105 @@
+import copy
+import os
+import threading
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.public.chat_message import Content, ErrorChunk, TextChunk
+from dyad.public.part import ImagePart, TextPart
+
+
+def _stream(content: Content, chunks: list[str]) -> list[str]:
+    texts = []
+    for chunk in chunks:
+        content.append_chunk(TextChunk(text=chunk))
+        texts.append(content.get_text())
+    return texts
+
+
+def test_streamed_text_is_read_and_serialized():
+    content = Content()
+    assert _stream(content, ["Hel", "lo", " world"]) == [
+        "Hel",
+        "Hello",
+        "Hello world",
+    ]
+    content.append_chunk(ErrorChunk(message="failed"))
+    assert content.get_direct_text() == "Hello world"
+
+    expected = Content.from_text("Hello world")
+    expected.errors = content.errors
+    assert content.model_dump_json() == expected.model_dump_json()
+    assert content.parts == [TextPart(text="Hello world")]
+    assert content == expected
+    # Streaming continues after the text was written to the parts.
+    _stream(content, ["!"])
+    assert content.model_dump()["parts"] == [
+        {"type": "text", "text": "Hello world!"}
+    ]
+
+
+def test_text_reflects_changes_to_parts_and_children():
+    content = Content.from_text("a")
+    _stream(content, ["b"])
+    assert content.get_direct_text() == "ab"
+
+    content.parts.append(ImagePart())
+    _stream(content, ["c"])
+    assert content.get_direct_text() == "abc"
+    assert [part.type for part in content.parts] == ["text", "image", "text"]
+
+    # Parts changed in place, without going through `Content`.
+    content.parts[0] = TextPart(text="x")
+    assert content.get_direct_text() == "xc"
+    content.parts.append(TextPart(text="d"))
+    assert content.get_direct_text() == "xcd"
+
+    child = Content()
+    content.add_child(child)
+    _stream(child, ["e"])
+    assert content.get_text() == "xcde"
+    content.children.append(Content.from_text("f"))
+    assert content.get_text() == "xcdef"
+
+    content.set_text("g")
+    assert content.get_text() == "gef"
+    assert Content(internal_data={"a": 1}).get_text() == "{'a': 1}"
+
+
+def test_copied_content_keeps_streamed_text():
+    content = Content()
+    _stream(content, ["a", "b"])
+    copied = copy.deepcopy(content)
+    _stream(content, ["c"])
+    _stream(copied, ["d"])
+
+    assert content.get_text() == "abc"
+    assert copied.get_text() == "abd"
+    copied.flush_text()
+    assert copied.parts == [TextPart(text="abd")]
+
+
+def test_reads_while_streaming():
+    content = Content()
+    chunks = [f"{i}," for i in range(5000)]
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            text = content.get_text()
+            assert "".join(chunks).startswith(text)
+            content.model_dump_json()
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for chunk in chunks:
+        content.append_chunk(TextChunk(text=chunk))
+    done.set()
+    reader.join()
+
+    assert content.get_text() == "".join(chunks)
+    assert content.model_dump()["parts"] == [
+        {"type": "text", "text": "".join(chunks)}
+    ]
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.settings.settings_cache import SettingsFileCache
+
+
+class _Settings(BaseModel):
+    name: str = "default"
+    tags: list[str] = []
+
+
+class _ReadOnlySettings(_Settings, frozen=True):
+    pass
+
+
+def _cache(path: str) -> SettingsFileCache[_Settings]:
+    return SettingsFileCache(_Settings, _ReadOnlySettings, lambda: path)
+
+
+def _write(path: str, settings: _Settings):
+    with open(path, "w") as f:
+        f.write(settings.model_dump_json())
+
+
+def test_reloads_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "settings.json")
+    cache = _cache(path)
+
+    # Defaults while the file doesn't exist.
+    assert cache.get_readonly().name == "default"
+    assert cache.get_readonly() is cache.get_readonly()
+
+    _write(path, _Settings(name="first"))
+    first = cache.get_readonly()
+    assert first.name == "first"
+    assert cache.get_readonly() is first
+
+    # Same size, only the mtime differs.
+    stat = os.stat(path)
+    _write(path, _Settings(name="other"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert cache.get_readonly().name == "other"
+
+    # Same size and mtime, but replaced by another file.
+    stat = os.stat(path)
+    replacement = str(tmp_path / "replacement.json")
+    _write(replacement, _Settings(name="again"))
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, path)
+    assert cache.get_readonly().name == "again"
+
+
+def test_readonly_settings_are_frozen_and_copies_are_not(tmp_path):
+    path = str(tmp_path / "settings.json")
+    cache = _cache(path)
+    _write(path, _Settings(tags=["a"]))
+
+    readonly = cache.get_readonly()
+    with pytest.raises(ValidationError):
+        readonly.name = "changed"
+
+    copy = cache.get_copy()
+    assert type(copy) is _Settings
+    copy.name = "changed"
+    copy.tags.append("b")
+    assert readonly.tags == ["a"]
+
+    # Saving updates the cached settings without reading the file again.
+    cache.save(copy)
+    saved = cache.get_readonly()
+    assert isinstance(saved, _ReadOnlySettings)
+    assert (saved.name, saved.tags) == ("changed", ["a", "b"])
+    assert cache.get_readonly() is saved
+    copy.tags.append("c")
+    assert saved.tags == ["a", "b"]
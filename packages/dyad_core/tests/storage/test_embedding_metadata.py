@@ -0,0 +1,78 @@
+import os
+from datetime import datetime
+
+# Set up environment variable before imports
+os.environ["DYAD_WORKSPACE_DIR"] = "/tmp/test_workspace"
+
+# Now do the imports
+from dyad.settings.user_settings import EmbeddingModelConfig
+from dyad.storage.models.embedding_metadata import (
+    EmbeddingMetadataUpdate,
+    bulk_upsert_embedding_metadata,
+    delete_embedding_metadata_for_model,
+    get_embedding_metadata_for_files,
+    mark_files_removed,
+)
+
+CONFIG = EmbeddingModelConfig(
+    provider_id="test",
+    embedding_model_name="test-metadata",
+    embedding_dim=2,
+)
+MODIFIED = datetime(2024, 1, 1).astimezone()
+
+
+def _update(file_path: str, file_hash: str) -> EmbeddingMetadataUpdate:
+    return EmbeddingMetadataUpdate(
+        file_path=file_path,
+        file_hash=file_hash,
+        vector_store_id=file_path,
+        file_last_modified=MODIFIED,
+        file_mtime_ns=1,
+        file_size=2,
+        file_inode=3,
+    )
+
+
+def test_bulk_upsert_and_lookup():
+    delete_embedding_metadata_for_model(CONFIG)
+    # More files than fit in one query.
+    paths = [f"src/{i}.py" for i in range(1200)]
+
+    bulk_upsert_embedding_metadata(
+        [_update(path, "old") for path in paths]
+        # Only the last update of a file is kept.
+        + [_update("src/0.py", "newer")],
+        branch="main",
+        embedding_model_config=CONFIG,
+    )
+    metadata = get_embedding_metadata_for_files(
+        [*paths, "missing.py"], "main", CONFIG
+    )
+    assert sorted(metadata) == sorted(paths)
+    assert metadata["src/0.py"].file_hash == "newer"
+    assert metadata["src/1.py"].file_hash == "old"
+    assert (
+        metadata["src/1.py"].file_mtime_ns,
+        metadata["src/1.py"].file_size,
+        metadata["src/1.py"].file_inode,
+    ) == (1, 2, 3)
+    assert get_embedding_metadata_for_files(paths, "other", CONFIG) == {}
+
+    mark_files_removed(paths[:600], "main")
+    # Updating a removed file makes it exist in the branch again.
+    bulk_upsert_embedding_metadata(
+        [_update("src/1.py", "updated")],
+        branch="main",
+        embedding_model_config=CONFIG,
+    )
+    metadata = get_embedding_metadata_for_files(paths, "main", CONFIG)
+    assert len(metadata) == 1200
+    assert metadata["src/1.py"].file_hash == "updated"
+    assert [path for path in paths if metadata[path].exists_in_branch] == [
+        "src/1.py",
+        *paths[600:],
+    ]
+
+    delete_embedding_metadata_for_model(CONFIG)
+    assert get_embedding_metadata_for_files(paths, "main", CONFIG) == {}
@@ -0,0 +1,127 @@
+"""
+uv run python scripts/benchmark_vector_index.py --rows 50000 --dim 768
+
+Compares exact (flat) search against the IVF-PQ vector index built by
+LanceEmbeddingStore on synthetic clustered embeddings, reporting recall@k and
+query latency.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def make_vectors(count: int, dim: int, clusters: int, rng: random.Random):
+    centers = [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(clusters)]
+    for _ in range(count):
+        center = rng.choice(centers)
+        yield [c + rng.gauss(0, 0.3) for c in center]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="dyad-vector-index-")
+    os.environ["DYAD_WORKSPACE_DIR"] = tmp_dir
+
+    # Imported after DYAD_WORKSPACE_DIR is set.
+    from dyad.indexing.lance_store import (
+        LanceEmbeddingStore,
+        get_embedding_record_type,
+    )
+    from dyad.settings.user_settings import (
+        EmbeddingModelConfig,
+        get_readonly_user_settings,
+    )
+
+    rng = random.Random(0)
+    store = LanceEmbeddingStore(
+        db_path=os.path.join(tmp_dir, "embeddings_lance"),
+        embedding_model_config=EmbeddingModelConfig(
+            provider_id="benchmark",
+            embedding_model_name="synthetic",
+            embedding_dim=args.dim,
+        ),
+    )
+    record_type = get_embedding_record_type(args.dim)
+    clusters = max(args.rows // 500, 1)
+    vectors = make_vectors(args.rows, args.dim, clusters, rng)
+    # Written to the table directly so the store does not build the index in
+    # the background while the exact search baseline is measured.
+    batch = []
+    for i, vector in enumerate(vectors):
+        batch.append(
+            record_type(
+                file_path=f"file_{i}.py#chunk_0",
+                source_path=f"file_{i}.py",
+                chunk_index=0,
+                file_hash="",
+                embedding=vector,
+                code=f"chunk {i}",
+                start_line=1,
+                end_line=1,
+            )
+        )
+        if len(batch) == 5_000:
+            store.table.add(batch)
+            batch = []
+    if batch:
+        store.table.add(batch)
+    queries = list(make_vectors(args.queries, args.dim, clusters, rng))
+
+    settings = get_readonly_user_settings().vector_index
+
+    def run(bypass: bool) -> tuple[list[set[str]], list[float]]:
+        results = []
+        latencies = []
+        for query in queries:
+            builder = store.table.search(query).limit(args.top_k)
+            if bypass:
+                builder = builder.bypass_vector_index()
+            else:
+                builder = builder.nprobes(settings.nprobes)
+                if settings.refine_factor:
+                    builder = builder.refine_factor(settings.refine_factor)
+            start = time.perf_counter()
+            rows = builder.to_list()
+            latencies.append(time.perf_counter() - start)
+            results.append({row["file_path"] for row in rows})
+        return results, latencies
+
+    exact, flat_latencies = run(bypass=True)
+    start = time.perf_counter()
+    store.build_vector_index()
+    build_seconds = time.perf_counter() - start
+    approximate, ann_latencies = run(bypass=False)
+
+    recall = statistics.mean(
+        len(a & e) / len(e)
+        for a, e in zip(approximate, exact, strict=True)
+        if e
+    )
+
+    def p95(latencies: list[float]) -> float:
+        return statistics.quantiles(latencies, n=20)[-1] * 1000
+
+    print(f"rows={args.rows} dim={args.dim} queries={args.queries}")
+    print(f"index build: {build_seconds:.1f}s")
+    print(
+        f"flat: p50={statistics.median(flat_latencies) * 1000:.1f}ms "
+        f"p95={p95(flat_latencies):.1f}ms"
+    )
+    print(
+        f"ivf-pq: p50={statistics.median(ann_latencies) * 1000:.1f}ms "
+        f"p95={p95(ann_latencies):.1f}ms recall@{args.top_k}={recall:.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from dyad.agent_api.agent import Agent, get_agent, maybe_get_agent
 from dyad.agent_api.agent_context import AgentContext
 from dyad.extension.extension_registry import extension_registry
 from dyad.file_tree import create_file_tree
+from dyad.indexing.file_indexing import prioritize_indexing
 from dyad.message_cache import message_cache
 from dyad.public.chat_message import (
     ChatMessage,
@@ -121,6 +122,7 @@ def process_input(
     # Add individual files
     for file_path in file_matches:
         file_paths.add(file_path)
+    prioritize_indexing(file_matches)
 
     # Add files from directories
     for dir_path in dir_matches:
@@ -80,6 +80,10 @@ def post_init():
 
     analytics().record_startup()
 
+    from dyad.logging.log_retention import start_log_retention_job
+
+    start_log_retention_job()
+
     from dyad.extension.extension_registry import extension_registry
 
     extension_registry.load_extensions()
@@ -10,12 +10,11 @@ from dyad.public.chat_message import (
     Content,
     ErrorChunk,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 from dyad.storage.models.chat import save_chat
 
 from dyad_app.chat_processor import generate_chat_response
-from dyad_app.logic.chat_files import has_code_blocks
-from dyad_app.ui.chat.message_parser import parse_content_with_pad
+from dyad_app.ui.chat.message_parser import StreamingContentParser
 from dyad_app.ui.chat.pad_helpers import generate_id
 from dyad_app.ui.side_pane_state import get_side_pane, set_side_pane
 from dyad_app.ui.state import (
@@ -170,15 +169,17 @@ def _handle_response(
     state = me.state(State)
     response, context = param
     has_opened_side_pane = False
+    # Only parses the text streamed since the previous iteration.
+    parser = StreamingContentParser()
     try:
         for _ in response:
             if me.state(State).is_chat_cancelled:
                 raise GeneratorExit
             current_assistant_message.content = context.content
-            message_text = current_assistant_message.content.get_text()
+            parser.feed(current_assistant_message.content.get_text())
             pad_id = generate_id()
-            if parse_content_with_pad(message_text).has_pad():
-                pad = parse_content_with_pad(message_text).get_first_pad()
+            if parser.has_pad():
+                pad = parser.result().get_first_pad()
                 pad.id = pad_id
                 # TODO: do not just hardcode to one
                 state.current_chat.pad_ids = [pad_id]
@@ -186,11 +187,11 @@ def _handle_response(
                 # Don't auto-open pads.
                 if (
                     not has_opened_side_pane
-                    and get_user_settings().pad_mode == "all"
+                    and get_readonly_user_settings().pad_mode == "all"
                 ):
                     set_side_pane("pad")
                     has_opened_side_pane = True
-            if has_code_blocks(message_text) > 0 and not has_opened_side_pane:
+            if parser.has_code_blocks() and not has_opened_side_pane:
                 set_side_pane("chat-files-overview")
                 has_opened_side_pane = True
 
@@ -43,6 +43,24 @@ class ContentWithPad:
         raise ValueError("No pad found in content")
 
 
+_COMPLETE_PAD_PATTERN = re.compile(
+    r'(?s)<dyad-pad\s+title="(.*?)"\s*(?:type="(.*?)")?\s*(?:id="(.*?)")?\s*>(.*?)</dyad-pad>'
+)
+_PAD_OPEN_PATTERN = re.compile(
+    r'<dyad-pad\s+title="(.*?)"\s*(?:type="(.*?)")?\s*(?:id="(.*?)")?\s*>'
+)
+_COLLECTION_PATTERN = re.compile(
+    r"<dyad-collection-id>(.*?)</dyad-collection-id>"
+)
+_PROMPTS_PATTERN = re.compile(r"<dyad-prompts>(.*?)</dyad-prompts>", re.DOTALL)
+
+
+def _parse_prompts(prompts_text: str) -> list[str]:
+    return [
+        line.lstrip("- ") for line in prompts_text.split("\n") if line.strip()
+    ]
+
+
 def parse_text_segment(text: str) -> list[ParsedSegment]:
     """Parse a text segment into its components."""
     segments: list[ParsedSegment] = []
@@ -51,19 +69,15 @@ def parse_text_segment(text: str) -> list[ParsedSegment]:
         return segments
 
     # Parse collection ID if it exists
-    collection_match = re.search(
-        r"<dyad-collection-id>(.*?)</dyad-collection-id>", text
-    )
+    collection_match = _COLLECTION_PATTERN.search(text)
     if collection_match:
         collection_id = collection_match.group(1)
         segments.append(AcademyCollection(collection_id=collection_id))
         # Remove the collection-id tags and content from the text
-        text = re.sub(r"<dyad-collection-id>.*?</dyad-collection-id>", "", text)
+        text = _COLLECTION_PATTERN.sub("", text)
 
     # Find follow-up prompts if they exist
-    follow_up_match = re.search(
-        r"<dyad-prompts>(.*?)</dyad-prompts>", text, re.DOTALL
-    )
+    follow_up_match = _PROMPTS_PATTERN.search(text)
     if follow_up_match:
         # Get the text before follow-up prompts
         pre_text = text[: follow_up_match.start()].strip()
@@ -71,12 +85,7 @@ def parse_text_segment(text: str) -> list[ParsedSegment]:
             segments.append(TextContent(text=pre_text))
 
         # Parse the follow-up prompts
-        prompts_text = follow_up_match.group(1)
-        prompts = [
-            line.lstrip("- ")
-            for line in prompts_text.split("\n")
-            if line.strip()
-        ]
+        prompts = _parse_prompts(follow_up_match.group(1))
         if prompts:
             segments.append(FollowUpPrompts(prompts=prompts))
 
@@ -98,14 +107,10 @@ def parse_content_with_pad(content: str) -> ContentWithPad:
     list contains TextContent, FollowUpPrompts, Pad, or AcademyCollection objects.
     """
     segments: list[ParsedSegment] = []
-    # Regex to match a complete dyad-pad element (with closing tag).
-    complete_pattern = re.compile(
-        r'(?s)<dyad-pad\s+title="(.*?)"\s*(?:type="(.*?)")?\s*(?:id="(.*?)")?\s*>(.*?)</dyad-pad>'
-    )
     last_index = 0
 
     # Process complete dyad-pad elements
-    for match in complete_pattern.finditer(content):
+    for match in _COMPLETE_PAD_PATTERN.finditer(content):
         # Add any text that precedes the dyad-pad element
         if match.start() > last_index:
             segments.extend(
@@ -134,10 +139,7 @@ def parse_content_with_pad(content: str) -> ContentWithPad:
     # Handle remaining text
     remaining = content[last_index:]
     if remaining:
-        opening_match = re.search(
-            r'<dyad-pad\s+title="(.*?)"\s*(?:type="(.*?)")?\s*(?:id="(.*?)")?\s*>',
-            remaining,
-        )
+        opening_match = _PAD_OPEN_PATTERN.search(remaining)
         if opening_match:
             # Process text before the opening tag
             text_before = remaining[: opening_match.start()]
@@ -166,3 +168,280 @@ def parse_content_with_pad(content: str) -> ContentWithPad:
             segments.extend(parse_text_segment(remaining))
 
     return ContentWithPad(segments=segments)
+
+
+_PAD_OPEN = "<dyad-pad"
+_PAD_CLOSE = "</dyad-pad>"
+_PROMPTS_OPEN = "<dyad-prompts>"
+_PROMPTS_CLOSE = "</dyad-prompts>"
+_COLLECTION_OPEN = "<dyad-collection-id>"
+_CODE_FENCE = "```"
+_CODE_FENCE_PATTERN = re.compile(r'```(?:\w+)?\s+path="([^"]+)"')
+# Matches the start of a fence which `_CODE_FENCE_PATTERN` may still match
+# once more text arrives.
+_PARTIAL_CODE_FENCE_PATTERN = re.compile(
+    r'```\w*(?:\s+(?:p(?:a(?:t(?:h(?:=(?:"[^"]*)?)?)?)?)?)?)?\Z'
+)
+
+
+class _StreamingTextSegmentParser:
+    """
+    Resumable version of `parse_text_segment` for the text after the last pad.
+
+    Collection ids can't span lines, so once a line is finished the text
+    before it is final: complete collection ids are removed from it and the
+    prompts tags found in it can't move. Only the text from the start of a
+    possible collection id tag on the last line is looked at again.
+    """
+
+    def __init__(self, start: int):
+        # Text from `start` up to `_pos` with the collection ids removed.
+        self._cleaned = ""
+        self._pos = start
+        self._collection_id: str | None = None
+        self._prompts_open = -1
+        self._prompts_close = -1
+        # Where to look for the prompts tags in the cleaned text next time.
+        self._prompts_open_search = 0
+        self._prompts_close_search = 0
+        self._prompts: list[str] = []
+
+    def result(self, text: str) -> list[ParsedSegment]:
+        self._scan_collections(text)
+        cleaned = self._cleaned + text[self._pos :]
+        segments: list[ParsedSegment] = []
+        if self._collection_id is not None:
+            segments.append(
+                AcademyCollection(collection_id=self._collection_id)
+            )
+
+        open_start, close_start = self._find_prompts(cleaned)
+        if close_start == -1:
+            if cleaned.strip():
+                segments.append(TextContent(text=cleaned.strip()))
+            return segments
+        pre_text = cleaned[:open_start].strip()
+        if pre_text:
+            segments.append(TextContent(text=pre_text))
+        if close_start == self._prompts_close:
+            prompts = self._prompts
+        else:
+            prompts = _parse_prompts(
+                cleaned[open_start + len(_PROMPTS_OPEN) : close_start]
+            )
+        if prompts:
+            segments.append(FollowUpPrompts(prompts=prompts))
+        post_text = cleaned[close_start + len(_PROMPTS_CLOSE) :].strip()
+        if post_text:
+            segments.append(TextContent(text=post_text))
+        return segments
+
+    def _scan_collections(self, text: str):
+        pieces = [self._cleaned]
+        while True:
+            match = _COLLECTION_PATTERN.search(text, self._pos)
+            if not match:
+                break
+            pieces.append(text[self._pos : match.start()])
+            if self._collection_id is None:
+                self._collection_id = match.group(1)
+            self._pos = match.end()
+        # Before the last line, and on it before anything which may become a
+        # collection id tag, there can't be another collection id.
+        final_end = max(self._pos, text.rfind("\n", self._pos) + 1)
+        while True:
+            final_end = text.find("<", final_end)
+            if final_end == -1:
+                final_end = len(text)
+                break
+            if text.startswith(
+                _COLLECTION_OPEN, final_end
+            ) or _COLLECTION_OPEN.startswith(text[final_end:]):
+                break
+            final_end += 1
+        pieces.append(text[self._pos : final_end])
+        self._pos = final_end
+        self._cleaned = "".join(pieces)
+
+    def _find_prompts(self, cleaned: str) -> tuple[int, int]:
+        """
+        Returns where the first prompts block opens and closes in `cleaned`.
+
+        Positions in the final part of the cleaned text are remembered.
+        """
+        final_length = len(self._cleaned)
+        open_start = self._prompts_open
+        if open_start == -1:
+            open_start = cleaned.find(_PROMPTS_OPEN, self._prompts_open_search)
+            if open_start == -1:
+                self._prompts_open_search = max(
+                    self._prompts_open_search,
+                    final_length - len(_PROMPTS_OPEN) + 1,
+                )
+                return -1, -1
+            if open_start + len(_PROMPTS_OPEN) <= final_length:
+                self._prompts_open = open_start
+                self._prompts_close_search = open_start + len(_PROMPTS_OPEN)
+        close_start = self._prompts_close
+        if close_start == -1:
+            close_start = cleaned.find(
+                _PROMPTS_CLOSE,
+                max(
+                    self._prompts_close_search, open_start + len(_PROMPTS_OPEN)
+                ),
+            )
+            if close_start == -1:
+                if self._prompts_open != -1:
+                    self._prompts_close_search = max(
+                        self._prompts_close_search,
+                        final_length - len(_PROMPTS_CLOSE) + 1,
+                    )
+            elif (
+                self._prompts_open != -1
+                and close_start + len(_PROMPTS_CLOSE) <= final_length
+            ):
+                self._prompts_close = close_start
+                self._prompts = _parse_prompts(
+                    cleaned[open_start + len(_PROMPTS_OPEN) : close_start]
+                )
+        return open_start, close_start
+
+
+class StreamingContentParser:
+    """
+    Resumable version of `parse_content_with_pad` for streamed messages.
+
+    `feed` is called with the whole message text every time it grows, and
+    only looks at the text appended since the previous call:
+
+    * Complete pads need a closing tag, so they're only searched for when a
+      new `</dyad-pad>` arrives. The text before a complete pad is final and
+      parsed once.
+    * The opening tag of an incomplete pad is searched for from the first
+      `<dyad-pad` after the last complete pad.
+    * The text after the last pad is parsed by a `_StreamingTextSegmentParser`.
+
+    If the text is not an extension of the previously fed text, parsing
+    restarts. It also tracks the ```` ```lang path="..." ```` fences which
+    `has_code_blocks` looks for.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._text = ""
+        # Segments up to the end of the last complete pad.
+        self._segments: list[ParsedSegment] = []
+        self._has_complete_pad = False
+        self._last_index = 0
+        self._close_search = 0
+        self._open_search = 0
+        self._open_match: re.Match | None = None
+        self._text_before_open: list[ParsedSegment] = []
+        self._text_parser = _StreamingTextSegmentParser(0)
+        self._fence_pos = 0
+        self.code_block_paths: list[str] = []
+
+    def feed(self, text: str) -> "StreamingContentParser":
+        if text is self._text:
+            return self
+        if not text.startswith(self._text):
+            self._reset()
+        self._text = text
+        if text.find(_PAD_CLOSE, self._close_search) != -1:
+            self._scan_complete_pads()
+        self._close_search = max(
+            self._last_index, len(text) - len(_PAD_CLOSE) + 1
+        )
+        if self._open_match is None:
+            self._scan_open_pad()
+        self._scan_code_fences()
+        return self
+
+    def result(self) -> ContentWithPad:
+        segments = [
+            segment.model_copy() if isinstance(segment, Pad) else segment
+            for segment in self._segments
+        ]
+        match = self._open_match
+        if match:
+            segments.extend(self._text_before_open)
+            segments.append(
+                Pad(
+                    title=match.group(1),
+                    content=self._text[match.end() :],
+                    complete=False,
+                    id=match.group(3) or "<unset>",
+                    type=match.group(2) or "text/markdown",
+                )
+            )
+        else:
+            segments.extend(self._text_parser.result(self._text))
+        return ContentWithPad(segments=segments)
+
+    def has_pad(self) -> bool:
+        return self._has_complete_pad or self._open_match is not None
+
+    def has_code_blocks(self) -> bool:
+        return bool(self.code_block_paths)
+
+    def _scan_complete_pads(self):
+        text = self._text
+        for match in _COMPLETE_PAD_PATTERN.finditer(text, self._last_index):
+            self._segments.extend(
+                parse_text_segment(text[self._last_index : match.start()])
+            )
+            self._segments.append(
+                Pad(
+                    title=match.group(1),
+                    content=match.group(4),
+                    complete=True,
+                    # Default to unset if id not specified
+                    id=match.group(3) or "<unset>",
+                    # Default to markdown if type not specified
+                    type=match.group(2) or "text/markdown",
+                )
+            )
+            self._has_complete_pad = True
+            self._last_index = match.end()
+            self._open_search = self._last_index
+            self._open_match = None
+            self._text_parser = _StreamingTextSegmentParser(self._last_index)
+
+    def _scan_open_pad(self):
+        text = self._text
+        open_start = text.find(_PAD_OPEN, self._open_search)
+        if open_start == -1:
+            # Resume just before the end in case the tag is split.
+            self._open_search = max(
+                self._open_search, len(text) - len(_PAD_OPEN) + 1
+            )
+            return
+        self._open_search = open_start
+        match = _PAD_OPEN_PATTERN.search(text, open_start)
+        if match:
+            self._open_match = match
+            self._text_before_open = parse_text_segment(
+                text[self._last_index : match.start()]
+            )
+
+    def _scan_code_fences(self):
+        text = self._text
+        while True:
+            fence_start = text.find(_CODE_FENCE, self._fence_pos)
+            if fence_start == -1:
+                self._fence_pos = max(
+                    self._fence_pos, len(text) - len(_CODE_FENCE) + 1
+                )
+                return
+            match = _CODE_FENCE_PATTERN.match(text, fence_start)
+            if match:
+                self.code_block_paths.append(match.group(1))
+                self._fence_pos = match.end()
+            elif _PARTIAL_CODE_FENCE_PATTERN.match(text, fence_start):
+                self._fence_pos = fence_start
+                return
+            else:
+                # A longer run of backticks may start a fence further on.
+                self._fence_pos = fence_start + 1
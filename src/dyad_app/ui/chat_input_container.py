@@ -8,6 +8,7 @@ from dyad.language_model.language_model_clients import (
 )
 from dyad.logging.logging import logger
 from dyad.settings.user_settings import (
+    get_readonly_user_settings,
     get_user_settings,
 )
 from dyad.storage.models.pad import get_pad
@@ -121,7 +122,9 @@ def toggle_pad_mode(e: me.ClickEvent):
 
 def modes_box():
     with me.content_button(
-        type="raised" if get_user_settings().pad_mode == "learning" else "flat",
+        type="raised"
+        if get_readonly_user_settings().pad_mode == "learning"
+        else "flat",
         on_click=toggle_pad_mode,
         # button doesn't properly re-render
         key="pad-mode-button" + str(me.state(PadModeState).counter),
@@ -274,7 +277,9 @@ def model_summary_box():
 
 
 def core_model_box(is_open: bool):
-    core_model = get_language_model(get_user_settings().core_language_model_id)
+    core_model = get_language_model(
+        get_readonly_user_settings().core_language_model_id
+    )
     with me.box(
         on_click=lambda e: open_model_picker_dialog(language_model_type="core"),
         style=me.Style(
@@ -1,4 +1,6 @@
 import functools
+import threading
+from collections import OrderedDict
 from collections.abc import Callable
 from dataclasses import field
 from datetime import datetime
@@ -23,7 +25,7 @@ from dyad.public.chat_message import (
     Checkpoint,
     Content,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 from dyad.storage.models.pad import get_pad
 from dyad.ui_proxy.ui_actions import set_markdown_proxy
 
@@ -44,8 +46,10 @@ from dyad_app.logic.chat_logic import (
 from dyad_app.logic.revert_code import propose_revert_to_checkpoint
 from dyad_app.ui.chat.message_parser import (
     AcademyCollection,
+    ContentWithPad,
     FollowUpPrompts,
     ParsedSegment,
+    StreamingContentParser,
     TextContent,
     parse_content_with_pad,
 )
@@ -610,6 +614,36 @@ def expansion_panel(*, icon: str, title: str, key: str, expanded: bool = False):
             me.slot()
 
 
+# Parsers for the contents which are streaming in, keyed by the id of the
+# content, so each render only parses the newly appended text. A parser is
+# dropped once its content has finished streaming.
+_streaming_content_parsers: OrderedDict[int, StreamingContentParser] = (
+    OrderedDict()
+)
+_streaming_content_parsers_lock = threading.Lock()
+# Bounds the parsers left behind by sessions which went away mid-stream.
+_MAX_STREAMING_CONTENT_PARSERS = 32
+
+
+def _parse_content(content: Content, *, is_streaming: bool) -> ContentWithPad:
+    text = content.get_direct_text()
+    if not is_streaming:
+        with _streaming_content_parsers_lock:
+            _streaming_content_parsers.pop(id(content), None)
+        return parse_content_with_pad(text)
+    with _streaming_content_parsers_lock:
+        parser = _streaming_content_parsers.pop(id(content), None)
+        if parser is None:
+            parser = StreamingContentParser()
+        # Most recently used last.
+        _streaming_content_parsers[id(content)] = parser
+        while len(_streaming_content_parsers) > _MAX_STREAMING_CONTENT_PARSERS:
+            _streaming_content_parsers.popitem(last=False)
+        # A reused id belongs to another content, the parser restarts when
+        # the text is not an extension of what it has seen.
+        return parser.feed(text).result()
+
+
 def render_chat_content(
     content: Content,
     turn_index: int,
@@ -623,7 +657,9 @@ def render_chat_content(
     turn = state.current_chat.turns[turn_index]
     messages = turn.messages
 
-    structured_output = parse_content_with_pad(content.get_direct_text())
+    structured_output = _parse_content(
+        content, is_streaming=state.in_progress and is_last_turn
+    )
     academy_collection_id = structured_output.get_academy_collection_id()
     segments = structured_output.segments
     if content.internal_checkpoint:
@@ -1049,7 +1085,7 @@ def academy_embed(academy_collection_id: str):
         src=f"{ACADEMY_BASE_URL}/embed?collection-id="
         + academy_collection_id
         + "&theme="
-        + get_user_settings().theme_mode,
+        + get_readonly_user_settings().theme_mode,
         style=me.Style(
             border=me.Border.all(me.BorderSide(width=0)),
             width="100%",
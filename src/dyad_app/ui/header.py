@@ -4,7 +4,7 @@ import dyad
 import mesop as me
 from dyad.dyad_pro import is_dyad_pro_enabled, is_dyad_pro_user
 from dyad.extension import extension_registry
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 
 from dyad_app.logic.actions import register_action
 from dyad_app.ui.helpers.button_link import button_link
@@ -115,7 +115,9 @@ def header(*, page_title: str | None = None):
                 gap=8,
             )
         ):
-            me.text("Workspace: " + get_user_settings().workspace_name())
+            me.text(
+                "Workspace: " + get_readonly_user_settings().workspace_name()
+            )
             with me.content_button(
                 type="icon",
                 key="header-menu-button",
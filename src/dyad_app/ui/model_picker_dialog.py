@@ -11,7 +11,10 @@ from dyad.language_model.language_model_clients import (
     is_model_supported_by_proxy,
     is_provider_setup,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import (
+    get_readonly_user_settings,
+    get_user_settings,
+)
 from pydantic import BaseModel, Field
 
 from dyad_app.ui.provider_setup_dialog import open_provider_setup_dialog
@@ -95,7 +98,7 @@ def model_picker_dialog():
                 models = get_language_models()
 
                 # Updated sorting to prioritize initial and recently used models
-                settings = get_user_settings()
+                settings = get_readonly_user_settings()
                 initial_id = dialog_state.initial_selected_model_id
                 recently_used = settings.recently_used_models.get(
                     dialog_state.language_model_type, []
@@ -222,7 +225,7 @@ def model_option(model: LanguageModel):
         and dialog_state.selected_model_state.models[
             dialog_state.language_model_type
         ].id
-    ) or get_user_settings().language_model_type_to_id[
+    ) or get_readonly_user_settings().language_model_type_to_id[
         dialog_state.language_model_type
     ]
     provider = get_language_model_provider(model.provider)
@@ -309,7 +312,7 @@ def model_option(model: LanguageModel):
                                 font_weight=500,
                             ),
                         )
-                settings = get_user_settings()
+                settings = get_readonly_user_settings()
                 if model.id in settings.recently_used_models.get(
                     dialog_state.language_model_type, []
                 ):
@@ -387,7 +390,7 @@ def open_model_picker_dialog(language_model_type: LanguageModelType):
     state.filter_text = ""
 
     # Set both the initial selected model ID and type
-    settings = get_user_settings()
+    settings = get_readonly_user_settings()
     state.initial_selected_model_id = settings.language_model_type_to_id[
         language_model_type
     ]
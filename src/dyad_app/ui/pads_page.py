@@ -2,7 +2,10 @@ from functools import partial
 
 import mesop as me
 from dyad.pad import Pad
-from dyad.settings.workspace_settings import get_workspace_settings
+from dyad.settings.workspace_settings import (
+    get_readonly_workspace_settings,
+    get_workspace_settings,
+)
 from dyad.storage.models.pad import get_pad, get_pads, save_pad
 
 from dyad_app.ui.pad_tags import pad_tags
@@ -126,7 +129,7 @@ def sync_box():
         if me.state(EditSyncPathState).is_editing:
             me.input(
                 label="Sync path",
-                value=get_workspace_settings().pads_glob_path,
+                value=get_readonly_workspace_settings().pads_glob_path,
                 on_blur=on_sync_path_blur,
                 subscript_sizing="dynamic",
                 style=me.Style(
@@ -144,7 +147,7 @@ def sync_box():
                     me.icon("save")
         else:
             me.text("Syncing with:", style=me.Style(font_weight=500))
-            me.text(get_workspace_settings().pads_glob_path)
+            me.text(get_readonly_workspace_settings().pads_glob_path)
             if not get_side_pane():
                 with me.tooltip(message="Edit sync path"):
                     with me.content_button(
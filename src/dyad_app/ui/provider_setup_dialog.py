@@ -6,7 +6,10 @@ from dyad.language_model.language_model_clients import (
     get_language_model_provider,
     is_provider_setup,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import (
+    get_readonly_user_settings,
+    get_user_settings,
+)
 from pydantic import BaseModel
 
 from dyad_app.web_components.dialog import dialog
@@ -106,7 +109,7 @@ Your ollama server must be running on `http://localhost:11434`.
                             )
                             me.box(style=me.Style(height=16))
                             me.input(
-                                value=get_user_settings().provider_id_to_api_key.get(
+                                value=get_readonly_user_settings().provider_id_to_api_key.get(
                                     dialog_state.provider, ""
                                 ),
                                 on_blur=change_api_key_settings,
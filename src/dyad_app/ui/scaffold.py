@@ -4,7 +4,7 @@ from functools import partial
 import mesop as me
 import mesop.labs as mel
 from dyad.settings.user_settings import (
-    get_user_settings,
+    get_readonly_user_settings,
     toggle_sidebar_settings,
 )
 
@@ -185,7 +185,7 @@ def noop(e):
 
 def sidebar():
     state = me.state(State)
-    is_sidebar_expanded = get_user_settings().sidebar_expanded
+    is_sidebar_expanded = get_readonly_user_settings().sidebar_expanded
     if me.state(ScaffoldState).show_sidebar_override:
         is_sidebar_expanded = True
 
@@ -1,26 +1,29 @@
 import mesop as me
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import (
+    get_readonly_user_settings,
+    get_user_settings,
+)
 
 
 def advanced_settings():
     me.slide_toggle(
         "Disable LLM Proxy (Dyad Pro)",
-        checked=get_user_settings().disable_llm_proxy,
+        checked=get_readonly_user_settings().disable_llm_proxy,
         on_change=on_change_use_llm_proxy,
     )
     me.slide_toggle(
         "Show dyad annotations",
-        checked=get_user_settings().show_dyad_annotations,
+        checked=get_readonly_user_settings().show_dyad_annotations,
         on_change=on_change_show_dyad_annotations,
     )
     me.slide_toggle(
         "Disable Anthropic cache",
-        checked=get_user_settings().disable_anthropic_cache,
+        checked=get_readonly_user_settings().disable_anthropic_cache,
         on_change=on_change_disable_anthropic_cache,
     )
     me.slide_toggle(
         "All pad",
-        checked=get_user_settings().pad_mode == "all",
+        checked=get_readonly_user_settings().pad_mode == "all",
         on_change=on_change_pad_mode,
     )
 
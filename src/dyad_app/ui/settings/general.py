@@ -1,25 +1,28 @@
 import mesop as me
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import (
+    get_readonly_user_settings,
+    get_user_settings,
+)
 
 
 def general_settings():
     me.text("Analytics")
     me.checkbox(
         "Help improve Dyad by sending anonymous usage data",
-        checked=get_user_settings().analytics.enabled,
+        checked=get_readonly_user_settings().analytics.enabled,
         on_change=on_change_analytics_enabled,
     )
     me.divider()
     me.text("Workspace name")
     me.input(
         label="Workspace name",
-        value=get_user_settings().workspace_name(),
+        value=get_readonly_user_settings().workspace_name(),
         on_blur=update_workspace_name,
     )
     me.divider()
     me.text("Theme mode")
     me.button_toggle(
-        value=get_user_settings().theme_mode,
+        value=get_readonly_user_settings().theme_mode,
         buttons=[
             me.ButtonToggleButton(label="Light", value="light"),
             me.ButtonToggleButton(label="Dark", value="dark"),
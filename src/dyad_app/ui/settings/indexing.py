@@ -3,12 +3,27 @@ from dyad.indexing.embeddings.embedding_provider import (
     get_embedding_models,
     get_embedding_providers,
 )
-from dyad.indexing.file_indexing import clear_cache_and_restart
-from dyad.language_model.language_model_clients import (
-    get_language_model_provider,
+from dyad.indexing.embeddings.local_embedding_provider import (
+    LOCAL_PROVIDER_ID,
+    get_local_model_path,
+    local_embedding_provider,
+)
+from dyad.indexing.file_indexing import (
+    clear_cache_and_restart,
+    invalidate_ignore_matchers,
+)
+from dyad.indexing.lance_store import VectorIndexStatus
+from dyad.indexing.semantic_search_store import (
+    maybe_get_semantic_search_store,
+)
+from dyad.settings.user_settings import (
+    get_readonly_user_settings,
+    get_user_settings,
+)
+from dyad.settings.workspace_settings import (
+    get_readonly_workspace_settings,
+    get_workspace_settings,
 )
-from dyad.settings.user_settings import get_user_settings
-from dyad.settings.workspace_settings import get_workspace_settings
 from dyad.suggestions import get_all_files
 
 
@@ -33,6 +48,7 @@ def on_ignore_files_enabled_change(e: me.SlideToggleChangeEvent):
     settings = get_workspace_settings()
     settings.ignore_files_enabled = not settings.ignore_files_enabled
     settings.save()
+    invalidate_ignore_matchers()
 
 
 def on_embeddings_provider_change(e: me.SelectSelectionChangeEvent):
@@ -49,15 +65,13 @@ def indexing_settings():
 
     options = [
         me.SelectOption(
-            label=get_language_model_provider(
-                provider.provider_id
-            ).display_name,
+            label=provider.display_name,
             value=provider.provider_id,
         )
         for provider in providers
     ]
     selected_provider_id = ""
-    embedding_model_config = get_user_settings().embedding_model_config
+    embedding_model_config = get_readonly_user_settings().embedding_model_config
     if embedding_model_config is not None:
         selected_provider_id = embedding_model_config.provider_id
 
@@ -102,6 +116,11 @@ def indexing_settings():
                 style=me.Style(font_weight=500),
             )
             me.text(f"{len(all_files)}", style=me.Style(font_size=32))
+        vector_index_status = get_vector_index_status()
+        if vector_index_status is not None:
+            with me.box(style=box_style):
+                me.text("Vector index", style=me.Style(font_weight=500))
+                vector_index_box(vector_index_status)
         with me.box(style=box_style):
             me.text("Embeddings provider", style=me.Style(font_weight=500))
             me.select(
@@ -116,6 +135,20 @@ def indexing_settings():
                     f"{embedding_model_config.embedding_model_name} ({embedding_model_config.embedding_dim} dim)",
                     style=me.Style(font_size=14),
                 )
+                if (
+                    embedding_model_config.provider_id == LOCAL_PROVIDER_ID
+                    and not local_embedding_provider.is_available()
+                ):
+                    me.text(
+                        "Install dyad-core[local-embeddings] and put the "
+                        "model's model.onnx and tokenizer.json in "
+                        + get_local_model_path(
+                            embedding_model_config.embedding_model_name
+                        ),
+                        style=me.Style(
+                            font_size=14, color=me.theme_var("error")
+                        ),
+                    )
             me.text(
                 "Note: changing this will restart indexing.",
                 style=me.Style(font_size=14),
@@ -136,7 +169,7 @@ def indexing_settings():
                 me.markdown("`.dyadignore`")
                 me.slide_toggle(
                     "Enabled",
-                    checked=get_workspace_settings().ignore_files_enabled,
+                    checked=get_readonly_workspace_settings().ignore_files_enabled,
                     on_change=on_ignore_files_enabled_change,
                 )
             me.text(
@@ -194,6 +227,38 @@ def indexing_settings():
                 )
 
 
+def get_vector_index_status() -> VectorIndexStatus | None:
+    store = maybe_get_semantic_search_store()
+    if store is None:
+        return None
+    try:
+        return store.store.get_vector_index_status()
+    except Exception:
+        return None
+
+
+def vector_index_box(status: VectorIndexStatus):
+    if status.state == "flat":
+        me.text("Exact search", style=me.Style(font_size=32))
+        me.text(
+            f"An index is built once there are {status.min_rows:,} chunks "
+            f"({status.total_rows:,} so far).",
+            style=me.Style(font_size=14),
+        )
+    elif status.state == "building":
+        me.text("Building...", style=me.Style(font_size=32))
+        me.text(
+            f"Indexing {status.total_rows:,} chunks.",
+            style=me.Style(font_size=14),
+        )
+    else:
+        me.text("Ready", style=me.Style(font_size=32))
+        me.text(
+            f"{status.indexed_rows:,} of {status.total_rows:,} chunks indexed.",
+            style=me.Style(font_size=14),
+        )
+
+
 def on_click_clear_index_cache(e: me.ClickEvent):
     clear_cache_and_restart()
 
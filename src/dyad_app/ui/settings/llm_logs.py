@@ -4,7 +4,7 @@ from typing import Literal
 
 import mesop as me
 from dyad.chat import LanguageModelRequest
-from dyad.logging.llm_calls import LanguageModelCallRecord, llm_call_logger
+from dyad.logging.llm_calls import LanguageModelCallSummary, llm_call_logger
 
 
 @me.stateclass
@@ -16,7 +16,9 @@ class LLMLogState:
 
 def llm_logs_settings():
     state = me.state(LLMLogState)
-    llm_calls = llm_call_logger().get_recent_calls()
+    # Only summaries are loaded for the list; the selected call's payloads
+    # are hydrated on demand by the detail panel.
+    llm_calls = llm_call_logger().get_recent_call_summaries()
 
     is_detail_selected = state.selected_call_id is not None
 
@@ -89,16 +91,13 @@ def llm_logs_settings():
             )
         ):
             if is_detail_selected:
-                render_detail_panel(state, llm_calls)
+                render_detail_panel(state)
             else:
                 # Render an empty box to maintain layout structure during transition
                 me.box(style=me.Style(height="100%"))
 
 
-def render_llm_call_summary(call: LanguageModelCallRecord):
-    request = call.request
-    response = call.response
-
+def render_llm_call_summary(call: LanguageModelCallSummary):
     time_ago = (datetime.utcnow() - call.timestamp).total_seconds()
     if time_ago < 60:
         time_display = f"{time_ago:.0f} secs ago"
@@ -181,8 +180,8 @@ def render_llm_call_summary(call: LanguageModelCallRecord):
                     )
                     if not me.state(LLMLogState).selected_call_id:
                         me.box()
-                        message_count = len(request.history)
-                        model = request.language_model_id
+                        message_count = call.message_count
+                        model = call.language_model_id
                         me.text(
                             "Model:",
                             style=me.Style(font_weight=500),
@@ -243,7 +242,7 @@ def render_llm_call_summary(call: LanguageModelCallRecord):
                         ),
                     )
                     me.box()
-                    completion_metadata = response.get_completion_metadata()
+                    completion_metadata = call.completion_metadata
                     if not me.state(LLMLogState).selected_call_id:
                         if not completion_metadata:
                             me.text("No metadata available.")
@@ -277,12 +276,9 @@ def render_llm_call_summary(call: LanguageModelCallRecord):
                 )
 
 
-def render_detail_panel(
-    state: LLMLogState, llm_calls: list[LanguageModelCallRecord]
-):
-    selected_call = next(
-        (call for call in llm_calls if call.id == state.selected_call_id), None
-    )
+def render_detail_panel(state: LLMLogState):
+    assert state.selected_call_id is not None
+    selected_call = llm_call_logger().get_call(state.selected_call_id)
 
     if not selected_call:
         me.text("Error: Selected call not found.", style=me.Style(color="red"))
@@ -367,24 +363,22 @@ def render_detail_panel(
 
             elif state.selected_detail_type == "response":
                 response = selected_call.response
-                if response.chunks:
-                    full_content = ""
-                    for chunk in response.chunks:
-                        if chunk.type == "text":
-                            full_content += chunk.text if chunk.text else ""
-
-                    if full_content:
-                        expandable_content_box(
-                            "Response Content",
-                            full_content,
-                            state,
-                            f"response_{state.selected_call_id}",
-                        )
-                    else:
-                        me.text("No text content in response chunks.")
-
+                if response.text:
+                    expandable_content_box(
+                        "Response Content",
+                        response.text,
+                        state,
+                        f"response_{state.selected_call_id}",
+                    )
                 else:
-                    me.text("Response contains no chunks.")
+                    me.text("No text content in response.")
+                for i, error in enumerate(response.errors):
+                    expandable_content_box(
+                        "Error",
+                        error,
+                        state,
+                        f"response_error_{state.selected_call_id}_{i}",
+                    )
 
 
 def expandable_input_box(request: LanguageModelRequest, state: LLMLogState):
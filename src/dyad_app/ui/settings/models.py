@@ -5,7 +5,10 @@ from dyad.language_model.language_model import LanguageModel
 from dyad.language_model.language_model_clients import (
     get_language_model_providers,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import (
+    get_readonly_user_settings,
+    get_user_settings,
+)
 from dyad_app.ui.add_model_dialog import add_model_dialog, open_add_model_dialog
 from dyad_app.ui.add_provider_dialog import (
     add_provider_dialog,
@@ -61,7 +64,7 @@ def custom_models_grid():
             min_width=400,
         )
     ):
-        for model in get_user_settings().custom_language_models:
+        for model in get_readonly_user_settings().custom_language_models:
             custom_model_box(model)
 
 
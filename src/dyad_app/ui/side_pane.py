@@ -1,6 +1,6 @@
 import mesop as me
 import mesop.labs as mel
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 from dyad.storage.models.pad import save_pad
 
 from dyad_app.ui.chat_files_pane import chat_files_pane
@@ -22,7 +22,7 @@ def side_pane():
     if get_side_pane() == "chat-files-overview":
         width = (
             "min(max(240px, 35%), 300px)"
-            if get_user_settings().sidebar_expanded
+            if get_readonly_user_settings().sidebar_expanded
             else "300px"
         )
         with side_pane_scaffold(open=True, width=width, min_width=width):
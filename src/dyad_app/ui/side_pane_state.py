@@ -1,6 +1,7 @@
 from collections.abc import Callable
 
 import mesop as me
+from dyad.indexing.file_indexing import prioritize_indexing
 from dyad.logging.logging import logger
 from dyad.todo_parser import get_todos
 from dyad.ui_proxy.ui_actions import set_open_code_pane
@@ -25,6 +26,7 @@ def open_code_side_pane(
         contents = read_workspace_file(file_path)
     except:  # noqa: E722
         return
+    prioritize_indexing([file_path])
     set_side_pane("edit-code")
     state = me.state(State)
     todos = [
@@ -11,7 +11,7 @@ from dyad.chat import (
 )
 from dyad.logging.analytics import analytics
 from dyad.pad import Pad
-from dyad.settings.workspace_settings import get_workspace_settings
+from dyad.settings.workspace_settings import get_readonly_workspace_settings
 from dyad.status.status import Status
 from dyad.suggestions import SuggestionsQuery
 from pydantic import BaseModel, Field
@@ -139,9 +139,9 @@ def new_chat(*, record_analytics: bool = True):
 
 def set_default_input_state():
     state = me.state(State)
-    if get_workspace_settings().last_agent_used:
+    if get_readonly_workspace_settings().last_agent_used:
         state.input_state.raw_input = (
-            f"@{get_workspace_settings().last_agent_used} "
+            f"@{get_readonly_workspace_settings().last_agent_used} "
         )
     else:
         state.input_state.raw_input = ""
@@ -20,7 +20,7 @@ from dyad.public.chat_message import (
     ChatMessage,
     Content,
 )
-from dyad.settings.user_settings import get_user_settings
+from dyad.settings.user_settings import get_readonly_user_settings
 from dyad.storage.models.pad import get_pad
 
 from dyad_app.academy.academy_util import ACADEMY_BASE_URL
@@ -752,7 +752,7 @@ def academy_embed(academy_collection_id: str):
         src=f"{ACADEMY_BASE_URL}/embed?collection-id="
         + academy_collection_id
         + "&theme="
-        + get_user_settings().theme_mode,
+        + get_readonly_user_settings().theme_mode,
         style=me.Style(
             border=me.Border.all(me.BorderSide(width=0)),
             width="100%",
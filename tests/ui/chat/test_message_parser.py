@@ -0,0 +1,87 @@
+import random
+import re
+
+from dyad_app.ui.chat.message_parser import (
+    FollowUpPrompts,
+    StreamingContentParser,
+    TextContent,
+    parse_content_with_pad,
+)
+
+MESSAGES = [
+    'Intro\n<dyad-pad title="Plan" type="text/markdown" id="p1">\n# Plan\n'
+    "</dyad-pad>\nAfter\n<dyad-prompts>\n- First\n- Second\n</dyad-prompts>\n",
+    "<dyad-collection-id>abc</dyad-collection-id>Hello\n"
+    "<dyad-collection-id>def</dyad-collection-id>\n<dyad-prompts>- a",
+    # Unclosed prompts / collection id tags before a pad.
+    '<dyad-prompts>\n- a\n<dyad-pad title="A">pad</dyad-pad>\nrest',
+    '<dyad-collection-id>x\n<dyad-pad title="A">open pad',
+    # Tags split across lines and malformed tags.
+    '<dyad-pad\ntitle="A"\n>a</dyad-pad><dyad-pad title="B\n">b',
+    '<dyad-pad title="A" type="t" bad>x</dyad-pad><dyad-pad title="B">',
+    "<dyad-prompts>a</dyad-prompts><dyad-prompts>b</dyad-prompts><dyad-",
+    'Edit:\n```python path="a.py"\nx = 1\n```\n````ts path="b.ts"\n```\npath="c"',
+]
+
+ATOMS = [
+    '<dyad-pad title="A">',
+    '<dyad-pad title="B" type="t" id="i">',
+    "</dyad-pad>",
+    "<dyad-prompts>",
+    "</dyad-prompts>",
+    "<dyad-collection-id>",
+    "</dyad-collection-id>",
+    "- item\n",
+    "\n",
+    " ",
+    "text",
+    '"',
+    ">",
+    "<",
+    "<dyad-",
+    '```py path="a.py"\n',
+    "```",
+    ' path="b.py"',
+]
+
+
+def _code_block_paths(text: str) -> list[str]:
+    # What `has_code_blocks` / `extract_partial_code_blocks` look for.
+    return re.findall(r'```(?:\w+)?\s+path="([^"]+)"', text)
+
+
+def _assert_matches_original(text: str, ends: list[int]):
+    parser = StreamingContentParser()
+    for end in ends:
+        prefix = text[:end]
+        parser.feed(prefix)
+        expected = parse_content_with_pad(prefix)
+        assert parser.result() == expected, prefix
+        assert parser.has_pad() == expected.has_pad(), prefix
+        assert parser.code_block_paths == _code_block_paths(prefix), prefix
+
+
+def test_streaming_parser_matches_original_for_every_prefix():
+    for message in MESSAGES:
+        _assert_matches_original(message, list(range(len(message) + 1)))
+
+
+def test_streaming_parser_matches_original_for_random_messages():
+    rng = random.Random(0)
+    for _ in range(500):
+        message = "".join(rng.choices(ATOMS, k=rng.randint(1, 20)))
+        ends = sorted(rng.sample(range(len(message)), min(len(message), 5)))
+        _assert_matches_original(message, [*ends, len(message)])
+
+
+def test_streaming_parser_restarts_on_edited_text():
+    parser = StreamingContentParser()
+    parser.feed('<dyad-pad title="A">x')
+    assert parser.has_pad()
+
+    result = parser.feed("<dyad-prompts>\n- a\n</dyad-prompts>done").result()
+    assert not parser.has_pad()
+    assert result.segments == [
+        FollowUpPrompts(prompts=["a"]),
+        TextContent(text="done"),
+    ]